@@ -1,53 +1,221 @@
-import requests
+import contextvars
+import hashlib
 import json
+import threading
+import time
+from collections import OrderedDict
 
-def get_ai_insight(api_key, data_summary):
-    api_key = api_key.strip()
-    base_url = "https://generativelanguage.googleapis.com/v1beta"
-    
-    headers = {'Content-Type': 'application/json'}
-    
-    # 1. 먼저 사용 가능한 모델 목록을 가져옵니다.
-    list_models_url = f"{base_url}/models?key={api_key}"
-    
-    try:
-        model_res = requests.get(list_models_url)
-        models_data = model_res.json()
-        
-        # 목록 중에서 gemini-1.5-flash나 gemini-pro를 찾습니다.
-        available_models = [m['name'] for m in models_data.get('models', []) 
-                           if 'generateContent' in m.get('supportedGenerationMethods', [])]
-        
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetry import span
+
+BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+PREFERRED_MODEL = 'gemini-1.5-flash'
+REPORT_PREFIX = "당신은 호텔 전문 분석가입니다. 퓨어힐 호텔의 다음 데이터를 보고 한국어로 친절하고 전문적인 분석 보고서를 작성하세요: "
+
+# 연결 5초 / 응답 90초, 일시 오류(429/5xx, 연결 실패)는 지수 백오프로 재시도
+DEFAULT_TIMEOUT = (5, 90)
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MODEL_TTL = 60 * 60       # 모델 목록은 1시간에 한 번만 조회
+RESPONSE_TTL = 10 * 60    # 같은 프롬프트는 10분간 캐시된 리포트 재사용
+MAX_CACHED_RESPONSES = 64
+MAX_CLIENTS = 4           # API 키를 바꿔 가며 넣어도 최근 키의 클라이언트만 남김
+
+
+class GeminiError(Exception):
+    pass
+
+
+class GeminiClient:
+    def __init__(self, api_key, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, model_ttl=MODEL_TTL, response_ttl=RESPONSE_TTL, pool_size=10):
+        self.api_key = api_key.strip()
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.model_ttl = model_ttl
+        self.response_ttl = response_ttl
+
+        # 하나의 세션을 재사용해 TLS 핸드셰이크/커넥션을 풀링합니다 (여러 매니저가 동시에 눌러도 공유)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json'})
+
+        self._lock = threading.Lock()
+        self._model = None
+        self._model_expires = 0.0
+        self._responses = OrderedDict()
+
+    def _request(self, method, path, params=None, **kwargs):
+        url = f"{self.base_url}/{path}"
+        params = {'key': self.api_key, **(params or {})}
+        for attempt in range(self.retries + 1):
+            try:
+                res = self.session.request(method, url, params=params, timeout=self.timeout, **kwargs)
+                if res.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return res
+            except requests.ConnectionError:
+                # 연결 실패/연결 타임아웃만 재시도 (응답 대기 타임아웃은 재시도해도 같은 시간만 더 묶이므로 바로 실패)
+                if attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def resolve_model(self):
+        with self._lock:
+            if self._model and time.monotonic() < self._model_expires:
+                return self._model
+
+        models_data = self._request('GET', 'models').json()
+        # 목록 중에서 generateContent 를 지원하는 모델만 후보로
+        available_models = [m['name'] for m in models_data.get('models', [])
+                            if 'generateContent' in m.get('supportedGenerationMethods', [])]
         if not available_models:
-            return "사용 가능한 AI 모델을 찾을 수 없습니다. API 키 권한을 확인해주세요."
+            raise GeminiError("사용 가능한 AI 모델을 찾을 수 없습니다. API 키 권한을 확인해주세요.")
 
         # 가장 좋은 모델(1.5 flash)을 우선 선택하고, 없으면 목록의 첫 번째를 씁니다.
-        target_model = ""
-        for m in available_models:
-            if 'gemini-1.5-flash' in m:
-                target_model = m
-                break
-        if not target_model:
-            target_model = available_models[0]
-
-        # 2. 선택된 모델로 분석 요청을 보냅니다.
-        gen_url = f"{base_url}/{target_model}:generateContent?key={api_key}"
-        
-        payload = {
-            "contents": [{
-                "parts": [{
-                    "text": f"당신은 호텔 전문 분석가입니다. 퓨어힐 호텔의 다음 데이터를 보고 한국어로 친절하고 전문적인 분석 보고서를 작성하세요: {data_summary}"
-                }]
-            }]
-        }
-
-        response = requests.post(gen_url, headers=headers, data=json.dumps(payload))
-        result = response.json()
-        
-        if 'candidates' in result:
-            return result['candidates'][0]['content']['parts'][0]['text']
-        else:
-            return f"AI 분석 실패: {result.get('error', {}).get('message', '응답 형식 오류')}"
-            
+        target_model = next((m for m in available_models if PREFERRED_MODEL in m), available_models[0])
+        with self._lock:
+            self._model, self._model_expires = target_model, time.monotonic() + self.model_ttl
+        return target_model
+
+    def _prompt(self, data_summary):
+        prompt = f"{REPORT_PREFIX}{data_summary}"
+        return prompt, hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+    def _payload(self, prompt):
+        return json.dumps({"contents": [{"parts": [{"text": prompt}]}]})
+
+    def _cached_response(self, key):
+        with self._lock:
+            hit = self._responses.get(key)
+            if hit and time.monotonic() < hit[1]:
+                self._responses.move_to_end(key)
+                return hit[0]
+            self._responses.pop(key, None)
+        return None
+
+    def _store_response(self, key, text):
+        with self._lock:
+            self._responses[key] = (text, time.monotonic() + self.response_ttl)
+            while len(self._responses) > MAX_CACHED_RESPONSES:
+                self._responses.popitem(last=False)
+
+    def generate(self, data_summary, use_cache=True):
+        prompt, key = self._prompt(data_summary)
+        with span('ai.generate', prompt_chars=len(prompt)) as sp:
+            if use_cache:
+                cached = self._cached_response(key)
+                if cached is not None:
+                    sp.set(cache='hit', chars=len(cached))
+                    return cached
+
+            target_model = self.resolve_model()
+            result = self._request('POST', f"{target_model}:generateContent", data=self._payload(prompt)).json()
+
+            if 'candidates' not in result:
+                raise GeminiError(f"AI 분석 실패: {result.get('error', {}).get('message', '응답 형식 오류')}")
+            text = result['candidates'][0]['content']['parts'][0]['text']
+            sp.set(cache='miss', model=target_model, chars=len(text))
+        self._store_response(key, text)
+        return text
+
+    def stream(self, data_summary, use_cache=True):
+        # streamGenerateContent(SSE)로 받은 텍스트 조각을 도착하는 대로 yield 합니다.
+        prompt, key = self._prompt(data_summary)
+        if use_cache:
+            cached = self._cached_response(key)
+            if cached is not None:
+                yield cached
+                return
+
+        # ⏱️ 구간 = 요청부터 마지막 조각까지, first_chunk_ms = 첫 조각이 도착하기까지
+        started = time.perf_counter()
+        with span('ai.stream', prompt_chars=len(prompt)) as sp:
+            target_model = self.resolve_model()
+            res = self._request('POST', f"{target_model}:streamGenerateContent", params={'alt': 'sse'},
+                                data=self._payload(prompt), stream=True)
+            with res:
+                if res.status_code != 200:
+                    raise GeminiError(f"AI 분석 실패: {res.json().get('error', {}).get('message', '응답 형식 오류')}")
+                res.encoding = 'utf-8'  # text/event-stream 은 charset 이 없어 기본값(latin-1)이면 한글이 깨집니다.
+                parts = []
+                for line in res.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    event = json.loads(line[len('data:'):])
+                    if 'error' in event:
+                        raise GeminiError(f"AI 분석 실패: {event['error'].get('message', '응답 형식 오류')}")
+                    for part in event.get('candidates', [{}])[0].get('content', {}).get('parts', []):
+                        text = part.get('text', '')
+                        if text:
+                            if not parts:
+                                sp.set(first_chunk_ms=round((time.perf_counter() - started) * 1000, 1))
+                            parts.append(text)
+                            yield text
+            sp.set(model=target_model, chunks=len(parts), chars=sum(len(p) for p in parts))
+        if parts:
+            self._store_response(key, ''.join(parts))
+
+
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=BASE_URL):
+    # API 키별로 클라이언트(세션/캐시)를 하나만 만들어 공유하고, 최근 MAX_CLIENTS 개만 남깁니다.
+    # 밀려난 클라이언트는 닫지 않습니다 (백그라운드 리포트가 아직 쓰는 중일 수 있음 → 참조가 끝나면 정리됨).
+    key = (api_key.strip(), base_url)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = GeminiClient(api_key, base_url=base_url)
+        _clients.move_to_end(key)
+        while len(_clients) > MAX_CLIENTS:
+            _clients.popitem(last=False)
+        return _clients[key]
+
+
+def get_ai_insight(api_key, data_summary):
+    try:
+        with span('ai.get_ai_insight'):
+            return get_client(api_key).generate(data_summary)
+    except GeminiError as e:
+        return str(e)
     except Exception as e:
         return f"통신 오류: {str(e)}"
+
+
+def stream_ai_insight(api_key, data_summary):
+    # 화면에 바로 흘려 쓸 수 있는 텍스트 조각 제너레이터 (오류도 메시지 조각으로 전달)
+    try:
+        yield from get_client(api_key).stream(data_summary)
+    except GeminiError as e:
+        yield str(e)
+    except Exception as e:
+        yield f"통신 오류: {str(e)}"
+
+
+class BackgroundReport:
+    # 리포트를 별도 스레드에서 받아 두고, 화면은 .text / .done 만 주기적으로 읽습니다.
+    def __init__(self, chunks):
+        self.text = ''
+        self.done = False
+        # 시작한 실행의 컨텍스트(계측 수집 번호)를 그대로 가지고 스레드에서 받습니다.
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run, chunks), daemon=True)
+        self._thread.start()
+
+    def _run(self, chunks):
+        try:
+            for chunk in chunks:
+                self.text += chunk
+        finally:
+            self.done = True
+
+
+def start_background_report(api_key, data_summary):
+    return BackgroundReport(stream_ai_insight(api_key, data_summary))
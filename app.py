@@ -1,11 +1,24 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from processor import process_data
-from ai_engine import get_ai_insight
+from cache import cache_key, cached_derive_by_key, cached_process_data
+from cube import (account_stats, breakfast_ratio, build_cubes, channel_stats, demand_by_stay, mean_of, rollup, segment, slice_stay,
+                  top_value, totals)
+from charts import (PAYLOAD_WARN_BYTES, account_rank_bar, breakfast_rate_bar, channel_mix_bar, country_pie, demand_matrix, gauge,
+                    ota_country_bar, pace_chart, payload_bytes, pickup_chart, segment_mix_area, yield_matrix)
+from metrics import (BUDGET_DATA, COMPARE_PREVIOUS, COMPARE_YOY, describe_shortfall, future_months, monthly_booking_attainment,
+                     otb_month_attainment, pct_change, period_windows, range_window, rolling_window, shortfall_simulation, stay_totals,
+                     window_slices)
+from portfolio import rollup_portfolio, run_properties
+from properties import PORTFOLIO, load_properties, property_store_dir
+from forecast import N_SIMS, describe_forecast, pickup_history, simulate_month_end
+from production_store import (StoreVersionError, clear_production, ingest_production, load_production, migrate_production,
+                              preview_production, store_version)
+from pace import build_pace, describe_pace, summarize_pace
+from sql_engine import MAX_RESULT_ROWS, SAVED_QUERIES, available_tables, run_query, sql_available
+from snapshot_store import STLY_OFFSET_DAYS, lookup_days_ago, lookup_stly, save_snapshot
+from ai_engine import start_background_report, stream_ai_insight
+import telemetry
 from datetime import timedelta, datetime
 import pandas as pd
-import calendar
 
 # 1. 화면 설정
 st.set_page_config(page_title="엠버퓨어힐 통합 관제 v15.5", layout="wide")
@@ -19,80 +32,276 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 🚀 [이미지 데이터 기반 12개월 4대 버짓 박제]
-BUDGET_DATA = {
-    1:  {"rev": 514992575,  "rn": 2270, "adr": 226869, "occ": 56.3},
-    2:  {"rev": 786570856,  "rn": 2577, "adr": 305227, "occ": 70.8},
-    3:  {"rev": 529599040,  "rn": 2248, "adr": 235587, "occ": 55.8},
-    4:  {"rev": 695351004,  "rn": 2414, "adr": 288049, "occ": 61.9},
-    5:  {"rev": 903705440,  "rn": 3082, "adr": 293220, "occ": 76.5},
-    6:  {"rev": 808203820,  "rn": 2776, "adr": 291140, "occ": 71.2},
-    7:  {"rev": 1231949142, "rn": 3671, "adr": 335590, "occ": 91.1},
-    8:  {"rev": 1388376999, "rn": 3873, "adr": 358476, "occ": 96.1},
-    9:  {"rev": 952171506,  "rn": 2932, "adr": 324752, "occ": 75.2},
-    10: {"rev": 897171539,  "rn": 3009, "adr": 298163, "occ": 74.7},
-    11: {"rev": 667146771,  "rn": 2402, "adr": 277746, "occ": 61.6},
-    12: {"rev": 804030110,  "rn": 2765, "adr": 290788, "occ": 68.6}
-}
+# 🚀 12개월 4대 버짓 기본값과 KPI 계산은 metrics.py (배치 리포트와 공유)
 
 # 2. 사이드바 (경영 타겟 관리)
 with st.sidebar:
     st.header("🎯 경영 타겟 설정")
     api_key = st.text_input("Gemini API Key", type="password", placeholder="여기에 키를 입력하세요")
     st.divider()
+
+    # 🏨 프로퍼티: properties.json 에 호텔이 둘 이상이면 호텔 선택 + 포트폴리오 합산 화면
+    properties = load_properties()
+    multi_property = len(properties) > 1
+    if multi_property:
+        active_property = st.selectbox("🏨 프로퍼티", [PORTFOLIO] + list(properties),
+                                       format_func=lambda p: "📊 포트폴리오 (전체 합산)" if p == PORTFOLIO else properties[p]['name'])
+    else:
+        active_property = next(iter(properties))
+    budget_data = properties[active_property]['budget'] if active_property != PORTFOLIO else BUDGET_DATA
+    rooms = properties[active_property]['rooms'] if active_property != PORTFOLIO else None
+    key_prefix = f"{active_property}_" if multi_property else ""
     
     targets = {}
-    with st.expander("📅 12개월 버짓 확인 및 수정", expanded=False):
-        st.info("이미지 데이터가 기본값으로 적용되어 있습니다.")
-        cols = st.columns(2)
-        for i in range(1, 13):
-            with cols[0 if i <= 6 else 1]:
-                st.write(f"**[{i}월]**")
-                rev_val = st.number_input(f"{i}월 매출(억)", value=BUDGET_DATA[i]['rev']/100000000, key=f"r_{i}")
-                rn_val = st.number_input(f"{i}월 RN", value=BUDGET_DATA[i]['rn'], key=f"n_{i}")
-                targets[i] = {"rev_won": rev_val * 100000000, "rn": rn_val, "occ": BUDGET_DATA[i]['occ'], "adr": BUDGET_DATA[i]['adr']}
+    if active_property != PORTFOLIO:
+        with st.expander("📅 12개월 버짓 확인 및 수정", expanded=False):
+            st.info("이미지 데이터가 기본값으로 적용되어 있습니다." if not multi_property else f"{properties[active_property]['name']} ({rooms}실) 설정 버짓이 기본값으로 적용되어 있습니다.")
+            cols = st.columns(2)
+            for i in range(1, 13):
+                with cols[0 if i <= 6 else 1]:
+                    st.write(f"**[{i}월]**")
+                    rev_val = st.number_input(f"{i}월 매출(억)", value=budget_data[i]['rev']/100000000, key=f"{key_prefix}r_{i}")
+                    rn_val = st.number_input(f"{i}월 RN", value=budget_data[i]['rn'], key=f"{key_prefix}n_{i}")
+                    targets[i] = {"rev_won": rev_val * 100000000, "rn": rn_val, "occ": budget_data[i]['occ'], "adr": budget_data[i]['adr']}
     
     st.divider()
     target_occ_ref = st.number_input("AI 판단 점유율 기준 (%)", value=85)
+    ai_background = st.toggle("AI 리포트 백그라운드 생성", value=False, help="켜면 리포트를 받는 동안에도 다른 탭/위젯을 계속 사용할 수 있습니다.")
+    lazy_render = st.toggle("⚡ 선택한 탭만 계산", value=True, help="켜면 열려 있는 탭/펼친 항목만 계산하고, 탭 안의 버튼은 그 탭만 다시 실행합니다.")
+    chart_audit = st.toggle("📦 차트 페이로드 점검", value=False, help="탭별로 브라우저에 전송되는 차트 데이터(JSON) 크기를 표시합니다.")
+    incremental_store = st.toggle("📚 실적 누적 적재 (증분)", value=False, help="켜면 올린 실적 파일을 예약 단위로 누적 창고에 합치고(새로 생기거나 바뀐 예약만 처리), 대시보드는 누적 이력 전체를 봅니다.")
+    trace_panel = st.toggle("⏱️ 성능 계측", value=False, help="파싱/대시보드/시뮬레이션/AI 구간별 소요 시간과 행 수를 표시하고 JSON 로그로 남깁니다 (환경변수 PMS_TRACE=1 로도 켤 수 있음).")
     st.caption("v15.5: 진짜 최종 무삭제 완결본")
 
 st.title("🏛️ 엠버퓨어힐 전략분석 및 AI 경영 관제탑")
 
+# ⏱️ 성능 계측: 이번 실행에서 기록된 구간만 사이드바 패널에 모읍니다 (꺼져 있으면 계측 코드는 no-op)
+telemetry.enable(trace_panel)
+trace_mark = telemetry.mark()
+
+# 🤖 AI 리포트 출력: 스트리밍(첫 문장부터 바로 표시) 또는 백그라운드 스레드 + 1초 간격 부분 갱신
+def run_ai_report(report_key, prompt):
+    if ai_background:
+        st.session_state[report_key] = start_background_report(api_key, prompt)
+        st.session_state.pop(f"{report_key}_final", None)
+    else:
+        st.session_state.pop(report_key, None)
+        with st.container(border=True):
+            st.write_stream(stream_ai_insight(api_key, prompt))
+
+def show_background_report(report_key):
+    report = st.session_state.get(report_key)
+    if report is None:
+        return
+
+    @st.fragment(run_every=None if report.done else 1.0)
+    def _poll():
+        with st.container(border=True):
+            st.markdown(report.text or "⏳ AI 리포트 생성 중...")
+        # 완료되면 전체를 한 번 다시 그려 1초 폴링을 멈춥니다.
+        if report.done and not st.session_state.get(f"{report_key}_final"):
+            st.session_state[f"{report_key}_final"] = True
+            st.rerun()
+    _poll()
+
+# 📦 차트 출력: 점검 모드에서는 탭별로 브라우저에 보내는 차트 JSON 크기를 합산해 둡니다.
+# 같은 그림이 두 탭에 그려질 수 있으므로(예: 기간 조회 = 이번달) 탭·순번으로 고정 key 를 줍니다 (탭을 그리기 시작할 때 순번 초기화).
+chart_payloads = {}
+chart_seq = {}
+def show_chart(fig, section, where=st):
+    if chart_audit:
+        chart_payloads[section] = chart_payloads.get(section, 0) + payload_bytes(fig)
+    chart_seq[section] = chart_seq.get(section, 0) + 1
+    with telemetry.span(f'chart.{section}'):
+        where.plotly_chart(fig, use_container_width=True, key=f"chart_{section}_{chart_seq[section]}")
+
+# ⚡ 지연 렌더링: 선택된 탭/펼친 expander 만 계산하고, 탭 안 위젯 조작은 해당 탭(fragment)만 다시 실행합니다.
+lazy_change = "rerun" if lazy_render else "ignore"
+render_section = st.fragment if lazy_render else (lambda fn: fn)
+def is_open(container):
+    return not lazy_render or container.open
+
+def get_delta_pct(curr, prev):
+    change = pct_change(curr, prev)
+    return "N/A" if change is None else f"{change:.1f}%"
+
+# 🏨 포트폴리오: 호텔별 파이프라인을 병렬(호텔당 프로세스 1개)로 돌리고, 미리 계산된 호텔별 요약만 합산합니다.
+def render_portfolio(uploads):
+    jobs = {pid: (properties[pid], prod, otb) for pid, (prod, otb) in uploads.items() if prod}
+    if not jobs:
+        st.info("호텔별 실적 파일을 업로드하면 포트폴리오 합산이 표시됩니다.")
+        return
+    token = tuple((pid, cache_key(prod), cache_key(otb, is_otb=True) if otb else None) for pid, (_, prod, otb) in jobs.items())
+    if st.session_state.get('portfolio_token') != token:
+        with st.spinner(f"{len(jobs)}개 호텔 데이터를 병렬로 처리 중..."):
+            st.session_state['portfolio_results'] = run_properties(jobs)
+        st.session_state['portfolio_token'] = token
+    results = st.session_state['portfolio_results']
+    for pid, result in results.items():
+        for err in result['errors']:
+            st.warning(f"⚠️ [{properties[pid]['name']}] 파일 처리 실패 (분석에서 제외됨): {err}")
+
+    roll = rollup_portfolio(results)
+    periods = roll['periods']
+    if periods.empty:
+        return
+    st.subheader(f"🏨 포트폴리오 통합 실적 ({len(results)}개 호텔 합산)")
+    st.caption(f"📅 공통 기준일: {roll['by_property']['as_of'].iloc[0]:%Y-%m-%d} (호텔별 최신 예약일 중 가장 이른 날 — 모든 호텔이 같은 날짜 구간으로 합산됩니다)")
+    for period in ('DAILY', 'WEEKLY', 'MONTHLY'):
+        cur = periods[(periods['period'] == period) & (periods['side'] == 'current')].iloc[0]
+        prev = periods[(periods['period'] == period) & (periods['side'] == 'previous')].iloc[0]
+        st.write(f"**[{period}] 현재: {cur['label']} vs 과거: {prev['label']}**")
+        pc1, pc2, pc3, pc4 = st.columns(4)
+        pc1.metric("총 매출액 (Gross)", f"{cur['total_sales']:,.0f}원", delta=f"{get_delta_pct(cur['total_sales'], prev['total_sales'])} (전기: {prev['total_sales']:,.0f})")
+        pc2.metric("순수 객실매출", f"{cur['room_sales']:,.0f}원", delta=f"{get_delta_pct(cur['room_sales'], prev['room_sales'])} (전기: {prev['room_sales']:,.0f})")
+        pc3.metric("판매 룸나잇", f"{cur['room_nights']:,.0f} RN", delta=f"{int(cur['room_nights'] - prev['room_nights']):+d} RN (전기: {prev['room_nights']:,.0f})")
+        pc4.metric("객실 ADR (Net)", f"{cur['adr']:,.0f}원", delta=f"{get_delta_pct(cur['adr'], prev['adr'])} (전기: {prev['adr']:,.0f})")
+
+    st.write("---")
+    st.subheader("🎯 포트폴리오 버짓 달성 현황 (호텔별 객실 수 / 버짓 합산)")
+    budget = roll['budget'].assign(source=lambda b: b['source'].map({'production': '이번달 생성 예약', 'otb': 'OTB 투숙월'}))
+    st.dataframe(budget[['source', 'month', 'rev', 'rn', 'adr', 'occ', 'rev_pct', 'rn_pct', 'adr_pct', 'occ_pct']].rename(columns={
+        'source': '기준', 'month': '월', 'rev': '매출', 'rn': 'RN', 'adr': 'ADR', 'occ': 'OCC(%)',
+        'rev_pct': '매출달성(%)', 'rn_pct': 'RN달성(%)', 'adr_pct': 'ADR달성(%)', 'occ_pct': 'OCC달성(%)'}), hide_index=True)
+
+    st.subheader("🏨 호텔별 이번달 성과")
+    by_prop = roll['by_property']
+    monthly = by_prop[(by_prop['period'] == 'MONTHLY') & (by_prop['side'] == 'current')]
+    month_budget = roll['budget_by_property'].query("source == 'production'")[['property', 'rev_pct', 'occ_pct']]
+    table = monthly[['property', 'latest', 'total_sales', 'room_nights', 'adr', 'breakfast_ratio']].merge(month_budget, on='property', how='left')
+    table['property'] = table['property'].map(lambda p: properties[p]['name'])
+    st.dataframe(table.rename(columns={'property': '호텔', 'latest': '최신 예약일', 'total_sales': '총매출', 'room_nights': 'RN', 'adr': 'ADR',
+                                       'breakfast_ratio': '조식 비중(%)', 'rev_pct': '매출달성(%)', 'occ_pct': 'OCC달성(%)'}), hide_index=True)
+
 # 3. 데이터 로드 및 처리
-col_up1, col_up2 = st.columns(2)
-with col_up1: prod_file = st.file_uploader("1. 실적 (Production)", type=['csv', 'xlsx'])
-with col_up2: otb_files = st.file_uploader("2. 온더북 (OTB)", type=['csv', 'xlsx'], accept_multiple_files=True)
+if multi_property:
+    # 호텔별 업로드 칸은 항상 모두 그려 둡니다 (선택 호텔을 바꿔도 다른 호텔 업로드가 유지되도록)
+    uploads = {}
+    with st.expander("🏨 프로퍼티별 파일 업로드", expanded=active_property == PORTFOLIO):
+        for pid, prop_conf in properties.items():
+            col_up1, col_up2 = st.columns(2)
+            with col_up1: p_prod = st.file_uploader(f"1. [{prop_conf['name']}] 실적 (Production)", type=['csv', 'xlsx'], key=f"prod_{pid}")
+            with col_up2: p_otb = st.file_uploader(f"2. [{prop_conf['name']}] 온더북 (OTB)", type=['csv', 'xlsx'], accept_multiple_files=True, key=f"otb_{pid}")
+            uploads[pid] = (p_prod, p_otb)
+    if active_property == PORTFOLIO:
+        render_portfolio(uploads)
+        st.stop()
+    prod_file, otb_files = uploads[active_property]
+else:
+    col_up1, col_up2 = st.columns(2)
+    with col_up1: prod_file = st.file_uploader("1. 실적 (Production)", type=['csv', 'xlsx'])
+    with col_up2: otb_files = st.file_uploader("2. 온더북 (OTB)", type=['csv', 'xlsx'], accept_multiple_files=True)
+store_dir = property_store_dir(active_property)
 
 # 🚀 이 부분만 otb_files 코드 아래에 복사해서 넣으세요
+# 호텔별 key: 다른 호텔로 바꾸면 빈 업로드 칸이 되어, A 호텔 파일이 B 호텔 스냅샷으로 저장되지 않습니다.
 st.divider()
 st.subheader("➕ 정밀 분석용 추가 데이터 업로드 (Pace/Pick-up/리드타임)")
 cau1, cau2, cau3 = st.columns(3)
-with cau1: stly_file = st.file_uploader("전년 동기 OTB (STLY)", type=['csv', 'xlsx'])
-with cau2: snap_file = st.file_uploader("1주일 전 OTB 스냅샷", type=['csv', 'xlsx'])
-with cau3: raw_file = st.file_uploader("상세 예약 리스트 (Raw Data)", type=['csv', 'xlsx'])
-
-prod_data = process_data(prod_file, is_otb=False) if prod_file else pd.DataFrame()
-otb_data = process_data(otb_files, is_otb=True) if otb_files else pd.DataFrame()
+with cau1: stly_file = st.file_uploader("전년 동기 OTB (STLY)", type=['csv', 'xlsx'], key=f"stly_{active_property}")
+with cau2: snap_file = st.file_uploader("1주일 전 OTB 스냅샷", type=['csv', 'xlsx'], key=f"snap_{active_property}")
+with cau3: raw_file = st.file_uploader("상세 예약 리스트 (Raw Data)", type=['csv', 'xlsx'], key=f"raw_{active_property}")
+
+load_errors = []
+if incremental_store:
+    # 📚 같은 업로드는 세션당 한 번만 창고에 합치고, 화면은 창고 버전이 바뀔 때만 다시 읽습니다.
+    # 처리기 버전이 바뀌면 보관된 원본으로 다시 처리하고, 원본이 없는 옛 창고는 사용자가 직접 다시 만들 때까지 적재를 막습니다.
+    try:
+        migrate_production(store_dir)
+        store_blocked = None
+    except StoreVersionError as e:
+        store_blocked = e
+    if store_blocked:
+        st.warning(f"📚 {store_blocked}")
+        if st.button("🧹 실적 누적 창고 다시 만들기 (기존 누적 실적 삭제)", key=f"rebuild_store_{active_property}"):
+            clear_production(store_dir)
+            st.session_state['ingested_exports'] = {k: v for k, v in st.session_state.get('ingested_exports', {}).items() if k[0] != active_property}
+            st.rerun()
+    if prod_file and not store_blocked:
+        token = (active_property, cache_key(prod_file))
+        ingested = st.session_state.setdefault('ingested_exports', {})
+        # 내보내기 기간 안에서 사라진 기존 예약은 지우기 전에 건수를 먼저 보여 주고, 확인을 받은 뒤에만 삭제합니다.
+        pending = st.session_state.setdefault('pending_store_deletes', {})
+        if token not in ingested:
+            try:
+                if token not in pending:
+                    preview = preview_production(prod_file, store_dir, window_deletes=True)
+                    if preview['missing']:
+                        pending[token] = preview
+                    else:
+                        ingested[token] = ingest_production(prod_file, store_dir, window_deletes=False)
+                if token in pending:
+                    preview = pending[token]
+                    lo, hi = preview['window']
+                    st.warning(f"📚 이번 실적 파일의 예약일 기간({lo:%Y-%m-%d} ~ {hi:%Y-%m-%d})에 있던 기존 예약 {preview['missing']:,}건이 "
+                               f"파일에 없습니다. 취소/삭제로 보고 누적 창고에서 지울까요? (신규 {preview['new']:,} · 변경 {preview['updated']:,}건)")
+                    c_del, c_keep = st.columns(2)
+                    if c_del.button(f"🗑️ {preview['missing']:,}건 삭제하고 반영", key=f"store_delete_{token[1]}"):
+                        ingested[token] = ingest_production(prod_file, store_dir, window_deletes=True)
+                        pending.pop(token)
+                        st.rerun()
+                    if c_keep.button("📥 삭제 없이 반영", key=f"store_keep_{token[1]}"):
+                        ingested[token] = ingest_production(prod_file, store_dir, window_deletes=False)
+                        pending.pop(token)
+                        st.rerun()
+            except Exception as e:
+                ingested[token] = None
+                pending.pop(token, None)
+                load_errors.append(f"{prod_file.name}: {e}")
+        if ingested.get(token):
+            st.sidebar.caption("📚 누적 반영: 신규 {new:,} · 변경 {updated:,} · 삭제 {deleted:,} · 동일 {unchanged:,}건".format(**ingested[token]))
+    prod_data = load_production(store_dir)
+    prod_source = f"store:{active_property}:{store_version(store_dir)}"
+else:
+    prod_data = cached_process_data(prod_file, is_otb=False, errors=load_errors) if prod_file else pd.DataFrame()
+    prod_source = cache_key(prod_file) if prod_file else None
+otb_data = cached_process_data(otb_files, is_otb=True, errors=load_errors) if otb_files else pd.DataFrame()
+
+# 🚀 OTB 스냅샷 창고: 올린 OTB 를 기준일 스냅샷으로 저장하고, STLY / 1주일 전은 창고에서 바로 조회
+default_as_of = prod_data['예약일'].max().date() if not prod_data.empty and pd.notna(prod_data['예약일'].max()) else datetime.now().date()
+as_of_date = pd.Timestamp(st.date_input("📸 OTB 기준일 (스냅샷 일자)", value=default_as_of))
+
+def store_snapshot(files, snap_date):
+    file_errors = []
+    df = cached_process_data(files, is_otb=True, errors=file_errors)
+    token = (active_property, cache_key(files, is_otb=True), snap_date)
+    saved = st.session_state.setdefault('saved_snapshots', set())
+    if not df.empty and not file_errors and token not in saved:
+        save_snapshot(df, snap_date, store_dir)
+        saved.add(token)
+    return file_errors
+
+if otb_files: store_snapshot(otb_files, as_of_date)  # 오류는 위 otb_data 로드에서 이미 수집됨
+if stly_file: load_errors.extend(store_snapshot(stly_file, as_of_date - timedelta(days=STLY_OFFSET_DAYS)))
+if snap_file: load_errors.extend(store_snapshot(snap_file, as_of_date - timedelta(days=7)))
+
+stay_start = as_of_date.replace(day=1)
+stay_end = stay_start + timedelta(days=365)
+stly_data = lookup_stly(as_of_date, stay_start, stay_end, store_dir=store_dir)
+snap_data = lookup_days_ago(as_of_date, 7, stay_start, stay_end, store_dir=store_dir)
+
+for err in load_errors:
+    st.warning(f"⚠️ 파일 처리 실패 (분석에서 제외됨): {err}")
+if 'memory' in prod_data.attrs:
+    mem = prod_data.attrs['memory']
+    st.sidebar.caption(f"💾 실적 데이터 메모리: {mem['before']/1024**2:,.1f}MB → {mem['after']/1024**2:,.1f}MB")
 
 if not prod_data.empty:
     latest_booking_date = prod_data['예약일'].max()
     analysis_month = latest_booking_date.month
+    # 📦 적재 시 한 번만 만드는 집계 큐브 (같은 파일이면 캐시에서 재사용)
+    prod_cubes = cached_derive_by_key(prod_source, 'cubes', build_cubes, prod_data)
 
-    def calc_metrics(df):
-        total_sales = df['총매출액'].sum()
-        room_sales = df['객실매출액'].sum()
-        rn = df['room_nights'].sum()
-        adr = room_sales / rn if rn > 0 else 0
-        return total_sales, room_sales, rn, adr
-
-    def render_booking_dashboard(curr_df, prev_df, title_label, current_label, prev_label):
-        def get_delta_pct(curr, prev):
-            if prev == 0: return "N/A"
-            return f"{((curr - prev) / prev * 100):.1f}%"
+    @render_section
+    def render_booking_dashboard(curr, prev, title_label, current_label, prev_label):
+        # curr / prev = 집계 큐브 조각 (cube.slice_cubes) → 원본 예약 행을 다시 훑지 않습니다
+        curr_df, prev_df = curr['booking'], prev['booking']
+        timer = telemetry.laps(f'dashboard.{title_label}', cube_rows=len(curr_df))
+        chart_seq[title_label] = 0
 
         # 성과 계산
-        t_tot, t_room, t_rn, t_adr = calc_metrics(curr_df)
-        p_tot, p_room, p_rn, p_adr = calc_metrics(prev_df)
+        t_tot, t_room, t_rn, t_adr = totals(curr_df)
+        p_tot, p_room, p_rn, p_adr = totals(prev_df)
 
         st.subheader(f"✅ [{title_label} TOTAL 실적 직관 대조]")
         st.info(f"📊 현재: {current_label} vs 과거: {prev_label}")
@@ -102,44 +311,41 @@ if not prod_data.empty:
         c2.metric("순수 객실매출", f"{t_room:,.0f}원", delta=f"{get_delta_pct(t_room, p_room)} (전기: {p_room:,.0f})")
         c3.metric("판매 룸나잇", f"{t_rn:,.0f} RN", delta=f"{int(t_rn - p_rn):+d} RN (전기: {p_rn:,.0f})")
         c4.metric("객실 ADR (Net)", f"{t_adr:,.0f}원", delta=f"{get_delta_pct(t_adr, p_adr)} (전기: {p_adr:,.0f})")
+        timer.lap('totals')
+
+        # FIT / Group 세그먼트 분리 (큐브 그룹 단위)
+        f_curr, f_prev = segment(curr_df, 'FIT'), segment(prev_df, 'FIT')
+        g_curr, g_prev = segment(curr_df, 'Group'), segment(prev_df, 'Group')
 
         # 조식 비중 분석
         st.write("---")
         st.subheader("🍳 조식 포함 예약 비중 (Segment Breakdown)")
-        def get_bf_ratio(df):
-            if df.empty: return 0
-            total = len(df)
-            bf = len(df[df['breakfast_status'] == '조식포함'])
-            return (bf / total * 100) if total > 0 else 0
-
         bc1, bc2, bc3 = st.columns(3)
-        bf_total_val = get_bf_ratio(curr_df)
-        bf_fit_val = get_bf_ratio(curr_df[curr_df['market_segment'] == 'FIT'])
+        bf_total_val = breakfast_ratio(curr_df)
+        bf_fit_val = breakfast_ratio(f_curr)
         bc1.metric("전체 조식 비중", f"{bf_total_val:.1f}%")
         bc2.metric("FIT 조식 비중", f"{bf_fit_val:.1f}%")
-        bc3.metric("Group 조식 비중", f"{get_bf_ratio(curr_df[curr_df['market_segment'] == 'Group']):.1f}%")
+        bc3.metric("Group 조식 비중", f"{breakfast_ratio(g_curr):.1f}%")
+        timer.lap('breakfast')
 
         # Monthly 버짓 게이지
         if title_label == "MONTHLY":
-            m_target = targets.get(analysis_month)
+            att = monthly_booking_attainment(curr_df, targets.get(analysis_month), rooms)
             st.write("---")
             st.write(f"### 🎯 {analysis_month}월 누적 버짓 달성 현황")
             gauges = st.columns(4)
-            with gauges[0]: st.plotly_chart(go.Figure(go.Indicator(mode="gauge+number", value=(t_tot/m_target['rev_won'])*100, title={'text':"매출달성(%)"})).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
-            with gauges[1]: st.plotly_chart(go.Figure(go.Indicator(mode="gauge+number", value=(t_rn/m_target['rn'])*100, title={'text':"RN달성(%)"})).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
-            with gauges[2]: st.plotly_chart(go.Figure(go.Indicator(mode="gauge+number", value=(t_adr/m_target['adr'])*100, title={'text':"ADR달성(%)"})).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
-            with gauges[3]: 
-                act_occ = (t_rn / (130 * 30)) * 100
-                st.plotly_chart(go.Figure(go.Indicator(mode="gauge+number", value=(act_occ/m_target['occ'])*100, title={'text':"OCC달성(%)"})).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
+            with gauges[0]: show_chart(gauge(att['rev_pct'], "매출달성(%)"), title_label)
+            with gauges[1]: show_chart(gauge(att['rn_pct'], "RN달성(%)"), title_label)
+            with gauges[2]: show_chart(gauge(att['adr_pct'], "ADR달성(%)"), title_label)
+            with gauges[3]: show_chart(gauge(att['occ_pct'], "OCC달성(%)"), title_label)
+            timer.lap('budget_gauges')
 
         # FIT / Group 세그먼트 성과 대조
         st.write("---")
-        f_curr, f_prev = curr_df[curr_df['market_segment'] == 'FIT'], prev_df[prev_df['market_segment'] == 'FIT']
-        g_curr, g_prev = curr_df[curr_df['market_segment'] == 'Group'], prev_df[prev_df['market_segment'] == 'Group']
-        ft_tot, ft_room, ft_rn, ft_adr = calc_metrics(f_curr)
-        fp_tot, fp_room, fp_rn, fp_adr = calc_metrics(f_prev)
-        gt_tot, gt_room, gt_rn, gt_adr = calc_metrics(g_curr)
-        gp_tot, gp_room, gp_rn, gp_adr = calc_metrics(g_prev)
+        ft_tot, ft_room, ft_rn, ft_adr = totals(f_curr)
+        fp_tot, fp_room, fp_rn, fp_adr = totals(f_prev)
+        gt_tot, gt_room, gt_rn, gt_adr = totals(g_curr)
+        gp_tot, gp_room, gp_rn, gp_adr = totals(g_prev)
 
         st.subheader("👤 FIT 세그먼트 성과 대조")
         fc1, fc2, fc3, fc4 = st.columns(4)
@@ -151,10 +357,12 @@ if not prod_data.empty:
         if not f_curr.empty:
             st.write("**[FIT 전체 행동 패턴 분석]**")
             fa1, fa2, fa3 = st.columns(3)
-            fa1.metric("FIT 평균 리드타임", f"{f_curr['lead_time'].mean():.1f}일")
-            fa2.metric("FIT 평균 LOS", f"{f_curr['los'].mean():.1f}박")
-            fa3.metric("FIT 최다 투숙 국적", f_curr['country'].value_counts().index[0])
-            st.plotly_chart(px.pie(f_curr, names='country', title="FIT 전체 국적 비중", hole=0.4), use_container_width=True)
+            fa1.metric("FIT 평균 리드타임", f"{mean_of(f_curr, 'lead_time'):.1f}일")
+            fa2.metric("FIT 평균 LOS", f"{mean_of(f_curr, 'los'):.1f}박")
+            fa3.metric("FIT 최다 투숙 국적", top_value(f_curr, 'country'))
+            country_mix = rollup(f_curr, 'country', ['count'])
+            show_chart(country_pie(country_mix, "FIT 전체 국적 비중"), title_label)
+        timer.lap('fit', rows=len(f_curr))
 
         st.write("---")
         st.subheader("👥 Group 세그먼트 성과 대조")
@@ -163,78 +371,66 @@ if not prod_data.empty:
         gc2.metric("그룹 객실매출", f"{gt_room:,.0f}원", delta=f"{get_delta_pct(gt_room, gp_room)} (전기: {gp_room:,.0f})")
         gc3.metric("그룹 RN", f"{gt_rn:,.0f} RN", delta=f"{int(gt_rn - gp_rn):+d} RN")
         gc4.metric("그룹 ADR (Net)", f"{gt_adr:,.0f}원", delta=f"{get_delta_pct(gt_adr, gp_adr)}")
+        timer.lap('group', rows=len(g_curr))
+
+        # 🏷️ 채널별 실적: 적재 때 거래처마다 붙인 채널(channels.attach_channels)로 큐브를 다시 합칩니다.
+        st.write("---")
+        st.subheader("🏷️ 채널별 실적 (MICE/그룹 · 글로벌 OTA · 국내 OTA · 다이렉트)")
+        ch_stats = channel_stats(curr_df)
+        if not ch_stats.empty:
+            show_chart(channel_mix_bar(ch_stats), title_label)
+        timer.lap('channels', rows=len(ch_stats))
 
         st.write("---")
         # FIT 거래처 심층 분석
         st.subheader("📊 FIT 거래처별 심층 분석 (마이스/그룹 제외)")
-        pure_f = f_curr[~f_curr['account'].str.contains('마이스|그룹|GRP|MICE', na=False, case=False)]
+        # 🏷️ 거래처 필터는 적재 때 붙인 거래처 플래그 컬럼 조회입니다 (문자열 스캔 없음)
+        pure_f = f_curr[~f_curr['is_mice_group']]
         acc_stats = pd.DataFrame()
         if not pure_f.empty:
-            acc_stats = pure_f.groupby('account').agg({'room_nights':'sum','객실매출액':'sum','los':'mean','lead_time':'mean'}).reset_index()
-            acc_stats['Net_ADR'] = acc_stats['객실매출액'] / acc_stats['room_nights']
+            acc_stats = account_stats(pure_f)
             g_col1, g_col2 = st.columns(2)
-            with g_col1: st.plotly_chart(px.bar(acc_stats.sort_values('room_nights').tail(10), x='room_nights', y='account', orientation='h', title="거래처별 룸나잇", text_auto=True, color_continuous_scale='Blues', color='room_nights'), use_container_width=True)
-            with g_col2: st.plotly_chart(px.bar(acc_stats.sort_values('Net_ADR').tail(10), x='Net_ADR', y='account', orientation='h', title="거래처별 객실 ADR", text_auto=',.0f', color_continuous_scale='Greens', color='Net_ADR'), use_container_width=True)
+            with g_col1: show_chart(account_rank_bar(acc_stats, 'room_nights', "거래처별 룸나잇", True, 'Blues'), title_label)
+            with g_col2: show_chart(account_rank_bar(acc_stats, 'Net_ADR', "거래처별 객실 ADR", ',.0f', 'Greens'), title_label)
             g_col3, g_col4 = st.columns(2)
-            with g_col3: st.plotly_chart(px.bar(acc_stats.sort_values('los').tail(10), x='los', y='account', orientation='h', title="거래처별 평균 LOS", text_auto='.1f', color_continuous_scale='Purples', color='los'), use_container_width=True)
-            with g_col4: st.plotly_chart(px.bar(acc_stats.sort_values('lead_time').tail(10), x='lead_time', y='account', orientation='h', title="거래처별 평균 리드타임", text_auto='.1f', color_continuous_scale='Oranges', color='lead_time'), use_container_width=True)
+            with g_col3: show_chart(account_rank_bar(acc_stats, 'los', "거래처별 평균 LOS", '.1f', 'Purples'), title_label)
+            with g_col4: show_chart(account_rank_bar(acc_stats, 'lead_time', "거래처별 평균 리드타임", '.1f', 'Oranges'), title_label)
+        timer.lap('accounts', rows=len(acc_stats))
 
         # 글로벌 OTA 분석
         st.write("---")
-        gl_ch = ['아고다', 'AGODA', '익스피디아', '부킹', '트립']
-        gl_df = f_curr[f_curr['account'].str.upper().str.contains('|'.join(gl_ch), na=False)]
+        gl_df = f_curr[f_curr['is_global_ota']]
         if not gl_df.empty:
-            st.plotly_chart(px.bar(gl_df, x="account", color="country", title="글로벌 OTA 채널별 국적 비중", barmode="stack", text_auto=True), use_container_width=True)
+            gl_mix = rollup(gl_df, ['account', 'country'], ['count'])
+            show_chart(ota_country_bar(gl_mix), title_label)
+        timer.lap('global_ota', rows=len(gl_df))
         
-        # 조식 선택률 분석
-        targets_acc = ['아고다', '부킹닷컴', '익스피디아 e.c', '익스피디아 h.c', '트립닷컴', '네이버', '홈페이지', '야놀자', '호텔타임', '트립비토즈', '마이리얼트립', '올마이투어', '타이드스퀘어', 'personal']
-        f_acc_df = curr_df[curr_df['account'].str.lower().str.replace(" ", "").isin([a.lower().replace(" ","") for a in targets_acc])]
+        # 조식 선택률 분석 (지정 거래처: channels.BREAKFAST_TARGET_ACCOUNTS)
+        f_acc_df = curr_df[curr_df['is_breakfast_target']]
         if not f_acc_df.empty:
             st.write("---")
             st.subheader("🍳 지정 거래처 조식 선택률 분석")
-            bf_s = f_acc_df.groupby(['account', 'breakfast_status']).size().unstack(fill_value=0).reset_index()
+            bf_s = f_acc_df.groupby(['account', 'breakfast_status'], observed=True)['count'].sum().unstack(fill_value=0).reset_index()
             if '조식포함' in bf_s.columns:
                 bf_s['ratio'] = (bf_s['조식포함'] / bf_s.iloc[:, 1:].sum(axis=1)) * 100
-                st.plotly_chart(px.bar(bf_s.sort_values('ratio', ascending=False), x='ratio', y='account', orientation='h', title="거래처별 조식 선택률 (%)", color_continuous_scale='YlOrRd', color='ratio'), use_container_width=True)
+                show_chart(breakfast_rate_bar(bf_s), title_label)
+        timer.lap('breakfast_accounts', rows=len(f_acc_df))
 
         # 🚀 [v15.7 매트릭스 긴급 복구] 예약생성일 기준 -> 체크인 분포 분석
         if not curr_df.empty:
             st.write("---")
-            st.subheader(f"🎯 [{title_label}] 생성 예약의 체크인 날짜별 수요 매트릭스")
-            
-            # 💡 [핵심 수정] 날짜형 컬럼 중 '예약일'이 아닌 다른 날짜 컬럼(투숙일)을 자동으로 찾습니다.
-            all_date_cols = curr_df.select_dtypes(include=['datetime64']).columns.tolist()
-            # '예약일'을 제외한 나머지 날짜 컬럼이 실제 투숙일(Stay Date)입니다.
-            stay_date_candidates = [c for c in all_date_cols if '예약' not in c]
+            st.subheader(f"🎯 [{title_label}] 생성 예약의 투숙일(숙박일)별 수요 매트릭스")
             
-            # 만약 후보가 없다면 '일자' 혹은 '체크인'이라는 이름이 포함된 컬럼을 강제로 찾음
-            if not stay_date_candidates:
-                stay_date_candidates = [c for c in curr_df.columns if any(x in c for x in ['일자', '체크인', 'Stay', 'Date'])]
+            # 💡 투숙일 컬럼은 큐브 생성 시 정해 둡니다 (연박은 박마다 나눠 집계: cube.build_cubes → nights.nights_by)
+            target_date_col = curr['stay_col']
             
-            if stay_date_candidates:
-                target_date_col = stay_date_candidates[0] # 가장 유력한 투숙일 컬럼 선택
-                
-                # 데이터 집계
-                demand_matrix = curr_df.groupby(target_date_col).agg({'room_nights': 'sum', '객실매출액': 'sum'}).reset_index()
-                demand_matrix['Net_ADR'] = demand_matrix['객실매출액'] / demand_matrix['room_nights']
-                
-                # 차트 생성
-                fig_matrix = px.scatter(
-                    demand_matrix, 
-                    x=target_date_col, 
-                    y='Net_ADR', 
-                    size='room_nights', 
-                    color='room_nights',
-                    color_continuous_scale='Viridis', 
-                    title=f"현재 선택된 예약들({current_label})의 실제 투숙일(체크인) 분포",
-                    labels={target_date_col: '체크인 예정일 (Stay Date)', 'Net_ADR': 'ADR(Net)', 'room_nights': '예약량(RN)'}
-                )
-                
-                # 차트 레이아웃 최적화
-                fig_matrix.update_layout(hovermode='closest')
-                st.plotly_chart(fig_matrix, use_container_width=True)
+            if target_date_col:
+                # 데이터 집계 (예약일 × 투숙일 수요 큐브에서 투숙일 기준으로 다시 합산, 기간이 길면 날짜 구간으로 묶음)
+                stay_matrix = demand_by_stay(curr['demand'], target_date_col)
+                show_chart(demand_matrix(stay_matrix, target_date_col, current_label), title_label)
             else:
                 st.warning("⚠️ 투숙일(체크인 날짜) 데이터를 찾을 수 없어 매트릭스를 표시할 수 없습니다. 데이터의 컬럼명을 확인해주세요.")
+            timer.lap('demand_matrix', rows=len(curr['demand']))
 
         
 
@@ -264,21 +460,27 @@ if not prod_data.empty:
                     
                     형식: 서술형 제외, 임팩트 있는 불렛포인트로 보고할 것.
                     """
-                    st.info(get_ai_insight(api_key, prompt))
+                    run_ai_report(f"ai_report_{title_label}", prompt)
+        show_background_report(f"ai_report_{title_label}")
 
     # 4. 탭 구성
-    tab_d, tab_w, tab_m, tab_f = st.tabs(["📅 Daily", "📊 Weekly", "📈 Monthly", "🚀 Future OTB (전략관제)"])
-    with tab_d: render_booking_dashboard(prod_data[prod_data['예약일'] == latest_booking_date], prod_data[prod_data['예약일'] == latest_booking_date - timedelta(days=1)], "DAILY", "오늘", "어제")
-    with tab_w:
-        w_start = latest_booking_date - timedelta(days=latest_booking_date.weekday())
-        render_booking_dashboard(prod_data[prod_data['예약일'] >= w_start], prod_data[(prod_data['예약일'] >= w_start - timedelta(days=7)) & (prod_data['예약일'] < w_start)], "WEEKLY", "이번주", "지난주")
-    with tab_m:
-        m_start = latest_booking_date.replace(day=1)
-        render_booking_dashboard(prod_data[prod_data['예약일'] >= m_start], prod_data[(prod_data['예약일'] >= (m_start - timedelta(days=1)).replace(day=1)) & (prod_data['예약일'] < m_start)], "MONTHLY", "이번달", "지난달")
+    compare_labels = {COMPARE_PREVIOUS: "직전 기간 (어제/지난주/지난달)", COMPARE_YOY: "전년 동기 (52주 전 같은 요일)"}
+    compare_basis = st.radio("📆 비교 기준", list(compare_labels), format_func=compare_labels.get, horizontal=True, key="compare_basis")
+    tab_d, tab_w, tab_m, tab_f, tab_r = st.tabs(["📅 Daily", "📊 Weekly", "📈 Monthly", "🚀 Future OTB (전략관제)", "🔎 기간 조회"],
+                                                key="dashboard_tab", on_change=lazy_change)
+    windows = period_windows(latest_booking_date, compare=compare_basis)
+    for tab, title_label in ((tab_d, "DAILY"), (tab_w, "WEEKLY"), (tab_m, "MONTHLY")):
+        with tab:
+            if is_open(tab):
+                curr, prev = window_slices(prod_cubes, windows[title_label])
+                render_booking_dashboard(curr, prev, title_label, windows[title_label][2], windows[title_label][3])
 
 # 5. 미래 OTB 및 시뮬레이션 (tab_f)
-    with tab_f:
+    @render_section
+    def render_future_dashboard():
+        chart_seq['FUTURE'] = 0
         if not otb_data.empty:
+            timer = telemetry.laps('future', otb_rows=len(otb_data))
             st.subheader("🚀 당월 통합 버짓 달성 현황 및 잔여 일수 시뮬레이션")
             
             # 🔥 [v15.9 핵심 수정] OTB 데이터 클리닝 (소계/총합계 행 제거)
@@ -287,46 +489,45 @@ if not prod_data.empty:
             
             # 미래 페이스 분석을 위한 오늘 이후 데이터 필터링 (차트용)
             otb_future = otb_clean[otb_clean['일자_dt'] >= latest_booking_date]
+
+            # 📸 스냅샷 비교(1주일 전 / STLY) 기반 투숙일별 픽업 계산
+            pace_labels = ['1주전', 'STLY']
+            pace_df = build_pace(otb_clean, {'1주전': snap_data, 'STLY': stly_data})
+            pace_future = pace_df[pace_df.index >= latest_booking_date]
+            pace_summary = summarize_pace(pace_df[pace_df.index >= latest_booking_date.replace(day=1)], pace_labels)
+            timer.lap('pace', rows=len(pace_df))
             
             # 🔥 [달성률 정상화 핵심] 금월(1월)의 전체 달성 현황 계산
             # OTB 리포트는 과거 날짜의 실적과 미래 예약을 모두 포함하고 있습니다. 
             # 1월 1일부터 31일까지 '전체'를 합쳐야 사장님이 말씀하신 90%대 진짜 수치가 나옵니다.
             cur_month = latest_booking_date.month
-            m_bud = targets.get(cur_month)
+            # 1일부터 말일까지 해당 월의 모든 OTB 데이터 합산 (확정 실적 + 미래 예약) → metrics.shortfall_simulation
+            sim = shortfall_simulation(otb_clean, latest_booking_date, targets.get(cur_month))
+            # 🎲 몬테카를로 월말 예측: 픽업 분포 표는 실적 출처마다 한 번만 만들고, 시뮬레이션은 rerun 마다 다시 돌립니다 (수십 ms)
+            pickup_hist = cached_derive_by_key(prod_source, 'pickup_history', pickup_history, prod_data)
+            forecast = simulate_month_end(otb_clean, pickup_hist, latest_booking_date, targets, rooms).set_index('month')
+            timer.lap('forecast', rows=N_SIMS)
             
-            # 1일부터 31일까지 해당 월의 모든 OTB 데이터를 가져옴 (확정 실적 + 미래 예약 합산)
-            month_otb_all = otb_clean[otb_clean['일자_dt'].dt.month == cur_month]
-            
-            if not month_otb_all.empty:
+            if sim is not None:
                 st.error(f"🚨 {cur_month}월 버짓 달성 통합 시뮬레이션 (Total Month Analysis)")
-                
-                # 현재 전체 확보 수치 (이미 지나온 1~14일 실적 + 남은 날짜 예약 합계)
-                c_rev = month_otb_all['합계_매출'].sum()
-                c_rn = month_otb_all['합계_객실'].sum()
-                
-                # 달성률 계산
-                rev_ach_rate = (c_rev / m_bud['rev_won']) * 100
-                rn_ach_rate = (c_rn / m_bud['rn']) * 100
+                rev_ach_rate, days_left = sim['rev_ach_rate'], sim['days_left']
                 
                 # 📊 상단 통합 달성률 메트릭 (여기서 95%대의 수치가 정확히 찍힙니다)
                 sc1, sc2, sc3 = st.columns(3)
-                sc1.metric("1월 총 확보 매출 (실적+OTB)", f"{c_rev:,.0f}원", delta=f"{rev_ach_rate:.1f}% 달성")
-                sc2.metric("1월 총 확보 RN", f"{c_rn:,.0f} RN", delta=f"{rn_ach_rate:.1f}% 달성")
-                sc3.metric("1월 현재 ADR (통합)", f"{(c_rev/c_rn if c_rn > 0 else 0):,.0f}원")
+                sc1.metric("1월 총 확보 매출 (실적+OTB)", f"{sim['rev']:,.0f}원", delta=f"{rev_ach_rate:.1f}% 달성")
+                sc2.metric("1월 총 확보 RN", f"{sim['rn']:,.0f} RN", delta=f"{sim['rn_ach_rate']:.1f}% 달성")
+                sc3.metric("1월 현재 ADR (통합)", f"{sim['adr']:,.0f}원")
+                if cur_month in forecast.index:
+                    fc_cur = forecast.loc[cur_month]
+                    st.info(f"🎲 과거 픽업 분포 기반 {N_SIMS:,}회 시뮬레이션: 월말 매출 P50 {fc_cur['rev_p50']:,.0f}원 "
+                            f"(P10 {fc_cur['rev_p10']:,.0f} ~ P90 {fc_cur['rev_p90']:,.0f}원) · 매출 버짓 달성 확률 {fc_cur['rev_prob']:.0f}%")
 
                 # 🚨 숏폴 시뮬레이션 (Shortfall Analysis)
                 st.write("---")
                 st.write(f"### 🎯 {cur_month}월 버짓 100% 달성까지 남은 과제")
                 
-                last_day = calendar.monthrange(latest_booking_date.year, cur_month)[1]
-                days_left = last_day - latest_booking_date.day
-                
                 if days_left > 0:
-                    short_rev = max(0, m_bud['rev_won'] - c_rev)
-                    short_rn = max(0, m_bud['rn'] - c_rn)
-                    
-                    req_rn_day = short_rn / days_left
-                    req_adr = short_rev / short_rn if short_rn > 0 else 0
+                    req_rn_day, req_adr = sim['req_rn_day'], sim['req_adr']
                     
                     ss1, ss2, ss3 = st.columns(3)
                     ss1.metric("남은 기간", f"{days_left}일")
@@ -339,83 +540,60 @@ if not prod_data.empty:
                         st.warning(f"💡 **분석:** 목표 달성을 위해 남은 {days_left}일간 매일 {req_rn_day:.1f}실을 {req_adr:,.0f}원 이상의 단가로 방어해야 합니다.")
                 else:
                     st.info("현재 분석일이 월말이므로 금월 시뮬레이션을 종료합니다.")
+            timer.lap('simulation')
 
             # 📌 향후 4개월 월별 상세 달성 현황 (Expanders)
             st.write("---")
             st.subheader("📅 향후 4개월 월별 버짓 달성 현황")
             
-            for i in range(4):
-                t_m = (cur_month - 1 + i) % 12 + 1
-                m_b = targets.get(t_m)
+            for i, t_m in enumerate(future_months(latest_booking_date)):
+                att = otb_month_attainment(otb_clean, t_m, targets.get(t_m), latest_booking_date.year, rooms)
                 
-                # 데이터 필터링 (소계 제외된 깨끗한 데이터)
-                m_data = otb_clean[otb_clean['일자_dt'].dt.month == t_m]
-                
-                if not m_data.empty:
-                    m_rev_val = m_data['합계_매출'].sum()
-                    m_rn_val = m_data['합계_객실'].sum()
-                    
-                    with st.expander(f"📌 {t_m}월 상세 달성 현황", expanded=(i==0)):
-                        fg = st.columns(4)
-                        # 매출 게이지
-                        fg[0].plotly_chart(go.Figure(go.Indicator(
-                            mode="gauge+number", 
-                            value=(m_rev_val/m_b['rev_won'])*100, 
-                            title={'text':"매출달성(%)"},
-                            gauge={'bar':{'color':"#FF4B4B"}}
-                        )).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
-                        
-                        # RN 게이지
-                        fg[1].plotly_chart(go.Figure(go.Indicator(
-                            mode="gauge+number", 
-                            value=(m_rn_val/m_b['rn'])*100, 
-                            title={'text':"RN달성(%)"},
-                            gauge={'bar':{'color':"#FF4B4B"}}
-                        )).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
-                        
-                        # ADR 게이지
-                        m_adr_val = (m_rev_val/m_rn_val) if m_rn_val > 0 else 0
-                        fg[2].plotly_chart(go.Figure(go.Indicator(
-                            mode="gauge+number", 
-                            value=(m_adr_val/m_b['adr'])*100, 
-                            title={'text':"ADR달성(%)"},
-                            gauge={'bar':{'color':"#FF4B4B"}}
-                        )).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
-                        
-                        # OCC 게이지
-                        days_in_m = calendar.monthrange(latest_booking_date.year, t_m)[1]
-                        m_occ_val = (m_rn_val / (130 * days_in_m)) * 100
-                        fg[3].plotly_chart(go.Figure(go.Indicator(
-                            mode="gauge+number", 
-                            value=(m_occ_val/m_b['occ'])*100, 
-                            title={'text':"OCC달성(%)"},
-                            gauge={'bar':{'color':"#FF4B4B"}}
-                        )).update_layout(height=180, margin=dict(t=30,b=0,l=10,r=10)), use_container_width=True)
+                if att is not None:
+                    month_panel = st.expander(f"📌 {t_m}월 상세 달성 현황", expanded=(i==0), key=f"future_month_{i}", on_change=lazy_change)
+                    with month_panel:
+                        if is_open(month_panel):
+                            fg = st.columns(4)
+                            show_chart(gauge(att['rev_pct'], "매출달성(%)", bar_color="#FF4B4B"), 'FUTURE', fg[0])
+                            show_chart(gauge(att['rn_pct'], "RN달성(%)", bar_color="#FF4B4B"), 'FUTURE', fg[1])
+                            show_chart(gauge(att['adr_pct'], "ADR달성(%)", bar_color="#FF4B4B"), 'FUTURE', fg[2])
+                            show_chart(gauge(att['occ_pct'], "OCC달성(%)", bar_color="#FF4B4B"), 'FUTURE', fg[3])
+                            if t_m in forecast.index:
+                                fc_m = forecast.loc[t_m]
+                                pf = st.columns(4)
+                                show_chart(gauge(fc_m['rev_prob'], "매출 버짓 달성확률(%)", bar_color="#1f77b4"), 'FUTURE', pf[0])
+                                pf[1].metric("월말 예상 매출 (P50)", f"{fc_m['rev_p50']:,.0f}원", delta=f"버짓 대비 {fc_m['rev_pct_p50']:.1f}%")
+                                pf[2].metric("비관 시나리오 (P10)", f"{fc_m['rev_p10']:,.0f}원")
+                                pf[3].metric("낙관 시나리오 (P90)", f"{fc_m['rev_p90']:,.0f}원")
+            timer.lap('future_months')
 
             # 📈 미래 예약 가속도(Pace) 분석 차트
             st.divider()
             st.subheader("📈 미래 예약 가속도(Pace) 분석")
-            fig_p = go.Figure()
-            fig_p.add_trace(go.Bar(x=otb_future['일자_dt'], y=otb_future['점유율'], name='점유율(%)', marker_color='#a2d2ff'))
-            fig_p.add_trace(go.Scatter(x=otb_future['일자_dt'], y=otb_future['합계_ADR'], name='ADR(원)', yaxis='y2', line=dict(color='#FF4B4B', width=3)))
-            fig_p.update_layout(
-                yaxis2=dict(overlaying='y', side='right'), 
-                title="날짜별 점유율 vs ADR 추이 (Pace 관제)",
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
-            st.plotly_chart(fig_p, use_container_width=True)
+            show_chart(pace_chart(otb_future), 'FUTURE')
+
+            # 📸 픽업 분석 (1주일 전 스냅샷 / 전년 동기 대비)
+            if pace_future['1주전_객실'].notna().any() or pace_future['STLY_객실'].notna().any():
+                show_chart(pickup_chart(pace_future), 'FUTURE')
+                if not pace_summary.empty:
+                    pk = pace_summary.iloc[0]
+                    pk1, pk2, pk3 = st.columns(3)
+                    pk1.metric(f"{pace_summary.index[0]} 1주 픽업", f"{pk['픽업_1주전_객실']:+,.0f} RN" if pd.notna(pk['픽업_1주전_객실']) else "비교불가")
+                    pk2.metric(f"{pace_summary.index[0]} 1주 픽업 매출", f"{pk['픽업_1주전_매출']:+,.0f}원" if pd.notna(pk['픽업_1주전_매출']) else "비교불가")
+                    pk3.metric(f"{pace_summary.index[0]} STLY 대비", f"{pk['픽업_STLY_객실']:+,.0f} RN" if pd.notna(pk['픽업_STLY_객실']) else "비교불가")
             
             # 믹스 분석 차트
             cs1, cs2 = st.columns(2)
-            with cs1: st.plotly_chart(px.area(otb_future, x='일자_dt', y=['개인_객실', '단체_객실'], title="세그먼트 믹스 (Room Nights)"), use_container_width=True)
-            with cs2: st.plotly_chart(px.scatter(otb_future, x='점유율', y='합계_ADR', size='합계_매출', color='요일', hover_name='일자', title="수익 최적화 매트릭스 (Yield Matrix)"), use_container_width=True)
+            with cs1: show_chart(segment_mix_area(otb_future), 'FUTURE')
+            with cs2: show_chart(yield_matrix(otb_future), 'FUTURE')
+            timer.lap('charts', rows=len(otb_future))
 
             if st.button("🤖 AI 전문가 미래 전략 리포트"):
                 if api_key:
                     with st.spinner("전문가가 팩트를 기반으로 전략을 구상 중입니다..."):
                         # 데이터 존재 여부 확인 텍스트 생성
-                        stly_info = "제공됨" if stly_file else "부재(비교불가)"
-                        snap_info = "제공됨" if snap_file else "부재(Pace분석불가)"
+                        stly_info = f"제공됨 (스냅샷 {stly_data['snapshot_date'].iloc[0]:%Y-%m-%d})" if not stly_data.empty else "부재(비교불가)"
+                        snap_info = f"제공됨 (스냅샷 {snap_data['snapshot_date'].iloc[0]:%Y-%m-%d})" if not snap_data.empty else "부재(Pace분석불가)"
                         raw_info = "제공됨" if raw_file else "부재(리드타임분석불가)"
                         
                         # 🔥 강력한 페르소나 및 팩트 체크 프롬프트
@@ -423,20 +601,21 @@ if not prod_data.empty:
                         "너는 20년 경력의 RM 전문가다. 하지만 반드시 내가 제공한 데이터(업로드한 파일) 내에서만 수치를 인용하라. 전년 데이터나 과거 리드타임 데이터가 없다면 임의로 숫자를 지어내지 말고, **'데이터 부재로 비교 불가'**라고 명시한 뒤 현재의 OTB Pace와 버짓 달성률만 가지고 전략을 짜라. 소설 쓰지 말고 팩트 위주로 보고하라."
 
                         [현재 상황 데이터]
-                        - 당월(1월) 매출 달성률: {rev_ach_rate:.1f}%
-                        - 남은 일수: {days_left}일
-                        - 목표 달성 위해 매일 필요한 판매량: {req_rn_day:.1f}실
-                        - 목표 달성 위해 필요한 단가: {req_adr:,.0f}원
+{describe_shortfall(sim, cur_month)}
 
                         [업로드 데이터 현황]
                         - 전년 동기 OTB(STLY): {stly_info}
                         - 1주일 전 스냅샷: {snap_info}
                         - 상세 예약 리스트(Raw): {raw_info}
-                        - 당월 매출 달성률: {rev_ach_rate:.1f}%
-                        - 남은 일수: {days_left}일 / 필요 일일판매량: {req_rn_day:.1f}실 / 필요 단가: {req_adr:,.0f}원
+
+                        [월별 OTB Pace / 픽업 실제 수치 (스냅샷 비교)]
+{describe_pace(pace_summary, pace_labels)}
+
+                        [몬테카를로 월말 예측 (과거 투숙일 픽업 분포 기반 {N_SIMS:,}회 시뮬레이션)]
+{describe_forecast(forecast.reset_index())}
                         
                         1. [종합 경영 판단 및 버짓 예측]
-                        - 버짓 달성 예측: 현재 예약 Pace를 고려할 때 당월 매출 목표 달성 가능성을 %로 예측하라. 숏폴(Shortfall) 발생 시 정확한 부족 금액을 산출하라.
+                        - 버짓 달성 예측: 위 몬테카를로 달성 확률과 P10/P50/P90 수치를 그대로 인용하여 당월 매출 목표 달성 가능성을 판단하라 (확률을 새로 지어내지 말 것). 숏폴(Shortfall) 발생 시 정확한 부족 금액을 산출하라.
                         - 세그먼트 믹스: FIT(개인)와 Group(단체) 비중을 분석하여 ADR을 훼손하는 세그먼트를 찾아내고, 수익성 개선을 위한 믹스 조정안을 제안하라.
                         - 페이스 특이사항: 전주 또는 전월 대비 예약 속도가 급변한 날짜를 특정하고 그 원인을 진단하라.
 
@@ -457,6 +636,105 @@ if not prod_data.empty:
 
                         보고 형식: 서술형은 지양하고, 임팩트 있는 불렛포인트 위주로 요약할 것.
                         """
-                        st.info(get_ai_insight(api_key, prompt))
+                        run_ai_report("ai_report_future", prompt)
+            show_background_report("ai_report_future")
+
+    with tab_f:
+        if is_open(tab_f): render_future_dashboard()
+
+# 6. 기간 조회 (tab_r): 예약일/투숙일로 정렬된 큐브에서 임의 구간 · 최근 N일 · 전년 동기를 이진 탐색으로 잘라 봅니다.
+    def render_stay_range(window):
+        (c_start, c_end), (p_start, p_end), current_label, prev_label = window
+        chart_seq['RANGE'] = 0
+        cur, prev = stay_totals(prod_cubes, c_start, c_end, rooms), stay_totals(prod_cubes, p_start, p_end, rooms)
+        st.subheader("🛏️ 투숙일 기준 실적 (연박은 박마다 나눠 집계)")
+        st.info(f"📊 현재: {current_label} vs 과거: {prev_label}")
+        sr1, sr2, sr3, sr4 = st.columns(4)
+        sr1.metric("투숙 룸나잇", f"{cur['rn']:,.0f} RN", delta=f"{cur['rn'] - prev['rn']:+,.0f} RN (전기: {prev['rn']:,.0f})")
+        sr2.metric("투숙 객실매출", f"{cur['rev']:,.0f}원", delta=f"{get_delta_pct(cur['rev'], prev['rev'])} (전기: {prev['rev']:,.0f})")
+        sr3.metric("투숙 ADR (Net)", f"{cur['adr']:,.0f}원", delta=f"{get_delta_pct(cur['adr'], prev['adr'])} (전기: {prev['adr']:,.0f})")
+        sr4.metric("점유율 (OCC)", f"{cur['occ']:.1f}%", delta=f"{cur['occ'] - prev['occ']:+.1f}%p (전기: {prev['occ']:.1f}%)")
+        nights = slice_stay(prod_cubes, c_start, c_end)
+        if not nights.empty:
+            show_chart(demand_matrix(demand_by_stay(nights, prod_cubes['stay_col']), prod_cubes['stay_col'], current_label), 'RANGE')
+
+    with tab_r:
+        if is_open(tab_r):
+            rc1, rc2, rc3 = st.columns(3)
+            range_basis = rc1.radio("기준 날짜", ["예약일", "투숙일"], horizontal=True, key="range_basis")
+            range_mode = rc2.radio("조회 방식", ["직접 지정", "최근 N일 (롤링)"], horizontal=True, key="range_mode")
+            range_compare = rc3.radio("비교 기준", list(compare_labels), format_func=compare_labels.get, key="range_compare")
+            window = None
+            if range_mode == "직접 지정":
+                picked = st.date_input("구간 (시작일 ~ 종료일, 종료일 포함)", value=(latest_booking_date.replace(day=1).date(), latest_booking_date.date()), key="range_dates")
+                if len(picked) == 2:
+                    window = range_window(picked[0], pd.Timestamp(picked[1]) + timedelta(days=1), range_compare)
+                else:
+                    st.info("종료일까지 선택하면 조회합니다.")
+            else:
+                range_days = st.number_input("최근 며칠 (기준: 최신 예약일)", min_value=1, max_value=730, value=28, key="range_days")
+                window = rolling_window(latest_booking_date, int(range_days), range_compare)
+            if window is not None and range_basis == "예약일":
+                curr, prev = window_slices(prod_cubes, window)
+                render_booking_dashboard(curr, prev, "RANGE", window[2], window[3])
+            elif window is not None:
+                if prod_cubes['stay_col'] is None:
+                    st.warning("⚠️ 투숙일(체크인 날짜) 데이터를 찾을 수 없어 투숙일 기준 조회를 할 수 없습니다.")
+                else:
+                    render_stay_range(window)
 else:
     st.info("실적 파일을 업로드하여 경영 관제를 시작하세요.")
+
+# 7. 🗄️ 누적 데이터 SQL 분석: 로컬 창고(실적 누적 · OTB 스냅샷) Parquet 를 DuckDB 로 직접 조회 (업로드 없이도 사용 가능)
+@render_section
+def render_sql_panel():
+    if not sql_available():
+        st.info("DuckDB 가 설치되어 있지 않습니다. `pip install duckdb` 후 사용할 수 있습니다.")
+        return
+    tables = available_tables(store_dir)
+    if not tables:
+        st.info("조회할 누적 데이터가 없습니다. '📚 실적 누적 적재'를 켜고 실적을 올리거나, OTB 를 올려 스냅샷을 쌓아 주세요.")
+        return
+    st.caption(f"테이블: {', '.join(tables)} · 파라미터: $start / $end (조회 구간), $as_of (OTB 기준일)")
+    q1, q2 = st.columns([2, 1])
+    saved = q1.selectbox("저장된 쿼리", list(SAVED_QUERIES), key="sql_saved")
+    picked = q2.date_input("조회 구간 ($start ~ $end, 종료일 포함)", value=(as_of_date.date() - timedelta(days=365), as_of_date.date()), key="sql_dates")
+    sql = st.text_area("SQL (수정해서 바로 실행 가능)", value=SAVED_QUERIES[saved].strip(), height=280, key=f"sql_text_{saved}")
+    if st.button("▶️ 쿼리 실행", key="sql_run"):
+        if len(picked) != 2:
+            st.info("종료일까지 선택하면 조회합니다.")
+            return
+        params = {'start': picked[0], 'end': pd.Timestamp(picked[1]) + timedelta(days=1), 'as_of': as_of_date}
+        try:
+            st.session_state['sql_result'] = run_query(sql, params, store_dir)
+        except Exception as e:
+            st.session_state.pop('sql_result', None)
+            st.error(f"⚠️ 쿼리 실패: {e}")
+    result = st.session_state.get('sql_result')
+    if result is not None:
+        st.caption(f"{len(result):,}행" + (f" (최대 {MAX_RESULT_ROWS:,}행까지 표시)" if len(result) >= MAX_RESULT_ROWS else ""))
+        st.dataframe(result, hide_index=True)
+
+st.divider()
+sql_panel = st.expander("🗄️ 누적 데이터 SQL 분석 (실적 누적 · OTB 스냅샷)", expanded=False, key="sql_panel", on_change=lazy_change)
+with sql_panel:
+    if is_open(sql_panel): render_sql_panel()
+
+# 📦 차트 페이로드 점검 결과 (탭별 합계)
+if chart_audit and chart_payloads:
+    with st.sidebar:
+        st.write("**📦 탭별 차트 페이로드**")
+        for section, size in chart_payloads.items():
+            st.caption(f"{section}: {size/1024:,.1f}KB")
+            if size > PAYLOAD_WARN_BYTES:
+                st.warning(f"⚠️ {section} 탭 차트 데이터가 {size/1024**2:,.1f}MB 입니다. 집계 단위를 확인하세요.")
+
+# ⏱️ 이번 실행의 구간별 소요 시간 (탭 안 버튼으로 그 탭만 다시 실행될 때는 갱신되지 않음)
+if trace_panel:
+    trace = telemetry.spans_since(trace_mark)
+    with st.sidebar:
+        st.write("**⏱️ 구간별 소요 시간**")
+        if trace:
+            st.dataframe(pd.DataFrame(trace)[['span', 'ms', 'rows']].rename(columns={'span': '구간', 'rows': '행 수'}), hide_index=True)
+        else:
+            st.caption("기록된 구간이 없습니다.")
@@ -0,0 +1,130 @@
+# 🌙 야간 배치 리포트: 브라우저 없이 모든 월 / 기간(DAILY·WEEKLY·MONTHLY) KPI 를 미리 계산해 JSON / Parquet 로 저장
+# 실행: python batch_report.py --production 실적.csv --otb otb.xlsx --out reports [--workers 4] [--format json parquet]
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+
+import pandas as pd
+
+from columnar import write_parquet
+from cube import build_cubes
+from metrics import TOTAL_ROOMS, booking_budget_row, budget_targets, otb_budget_rows, period_rows
+from processor import PROCESSOR_VERSION, process_data
+from properties import DEFAULT_PROPERTY, load_properties
+
+_worker = {}
+
+
+def _init_worker(cubes, targets, rooms):
+    # 큐브/버짓은 워커마다 한 번만 넘겨받고, 작업 단위로는 기준일만 주고받습니다.
+    _worker.update(cubes=cubes, targets=targets, rooms=rooms)
+
+
+def as_of_dates(prod_df, months=None):
+    # 예약이 있는 달마다 그 달의 마지막 예약일을 기준일로 (마지막 달 = 대시보드의 최신 예약일)
+    dates = prod_df['예약일'].dropna()
+    last = dates.groupby(dates.dt.to_period('M')).max()
+    if months:
+        last = last[last.index.astype(str).isin(months)]
+    return list(last)
+
+
+def _as_of_rows(as_of):
+    # 기준일 하나의 기간별 현재/비교 성과 + 월간 생성 예약의 버짓 달성률
+    cubes = _worker['cubes']
+    return period_rows(cubes, as_of), booking_budget_row(cubes, as_of, _worker['targets'], _worker['rooms'])
+
+
+def compute_report(prod_df, otb_df=None, targets=None, as_of=None, months=None, workers=None, rooms=TOTAL_ROOMS):
+    targets = targets or budget_targets()
+    cubes = build_cubes(prod_df)
+    dates = as_of_dates(prod_df, months)
+
+    if workers == 1 or len(dates) <= 1:
+        _init_worker(cubes, targets, rooms)
+        results = [_as_of_rows(d) for d in dates]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cubes, targets, rooms)) as pool:
+            results = list(pool.map(_as_of_rows, dates))
+
+    periods = pd.DataFrame([row for rows, _ in results for row in rows])
+    budget_rows = [budget for _, budget in results]
+    if otb_df is not None and not otb_df.empty:
+        budget_rows += otb_budget_rows(otb_df, as_of or prod_df['예약일'].max(), targets, rooms)
+    return {'periods': periods, 'budget': pd.DataFrame(budget_rows)}
+
+
+def write_report(tables, out_dir, formats=('json', 'parquet')):
+    written = []
+    for name, df in tables.items():
+        if 'parquet' in formats:
+            written.append(write_parquet(df, os.path.join(out_dir, f"{name}.parquet"), index=False))
+        if 'json' in formats:
+            os.makedirs(out_dir, exist_ok=True)
+            path = os.path.join(out_dir, f"{name}.json")
+            df.to_json(path, orient='records', force_ascii=False, date_format='iso', indent=1)
+            written.append(path)
+    return written
+
+
+def load_targets(path, base=None):
+    # {"1": {"rev": 원, "rn": .., "adr": .., "occ": ..}, ...} 형식 (metrics.BUDGET_DATA 와 동일, 없는 달은 프로퍼티 기본값)
+    base = budget_targets(base)
+    if not path:
+        return base
+    with open(path, encoding='utf-8') as f:
+        overrides = {int(m): b for m, b in json.load(f).items()}
+    return {**base, **budget_targets(overrides)}
+
+
+def run(production, otb=(), out_dir='reports', formats=('json', 'parquet'), workers=None, months=None, as_of=None, budget=None,
+        property_id=DEFAULT_PROPERTY):
+    prop = load_properties()[property_id]
+    errors = []
+    with ExitStack() as stack:
+        prod_files = [stack.enter_context(open(p, 'rb')) for p in production]
+        otb_files = [stack.enter_context(open(p, 'rb')) for p in otb]
+        prod_df = process_data(prod_files, is_otb=False, errors=errors, max_workers=workers)
+        otb_df = process_data(otb_files, is_otb=True, errors=errors, max_workers=workers) if otb_files else None
+    if prod_df.empty:
+        raise SystemExit(f"실적 데이터가 비어 있습니다. {errors}")
+
+    tables = compute_report(prod_df, otb_df, load_targets(budget, prop['budget']), pd.Timestamp(as_of) if as_of else None,
+                            months, workers, prop['rooms'])
+    for df in tables.values():
+        df.insert(0, 'property', property_id)
+    written = write_report(tables, out_dir, formats)
+    manifest = {'generated_at': datetime.now().isoformat(timespec='seconds'), 'processor_version': PROCESSOR_VERSION,
+                'property': property_id, 'rooms': prop['rooms'],
+                'as_of_dates': [f"{d:%Y-%m-%d}" for d in tables['periods']['as_of'].unique()] if not tables['periods'].empty else [],
+                'files': written, 'errors': errors}
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="퓨어힐 KPI 야간 배치 리포트")
+    parser.add_argument('--production', nargs='+', required=True, help="실적(Production) CSV/XLSX 경로")
+    parser.add_argument('--otb', nargs='*', default=[], help="온더북(OTB) CSV/XLSX 경로")
+    parser.add_argument('--out', default='reports', help="결과 폴더 (기본: reports)")
+    parser.add_argument('--format', nargs='+', choices=['json', 'parquet'], default=['json', 'parquet'])
+    parser.add_argument('--workers', type=int, default=None, help="병렬 워커 프로세스 수 (기본: CPU 수, 1 = 단일 프로세스)")
+    parser.add_argument('--months', nargs='*', default=None, help="특정 예약월만 (예: 2026-01 2026-02)")
+    parser.add_argument('--as-of', default=None, help="OTB 시뮬레이션 기준일 (기본: 최신 예약일)")
+    parser.add_argument('--budget', default=None, help="버짓 JSON 경로 (기본: 프로퍼티 설정의 버짓)")
+    parser.add_argument('--property', default=DEFAULT_PROPERTY, help="프로퍼티 ID (properties.json, 객실 수/버짓 기준)")
+    args = parser.parse_args(argv)
+
+    manifest = run(args.production, args.otb, args.out, args.format, args.workers, args.months, args.as_of, args.budget, args.property)
+    for path in manifest['files']:
+        print(path)
+    for err in manifest['errors']:
+        print(f"⚠️ 파일 처리 실패: {err}")
+
+
+if __name__ == '__main__':
+    main()
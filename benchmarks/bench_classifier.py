@@ -0,0 +1,63 @@
+# 분류 엔진 벤치마크: 기존 행 단위 apply vs 벡터화 classify() + 거래처 차원 조회
+# 실행: python benchmarks/bench_classifier.py [--sizes 100000 1000000]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from channels import attach_channels  # noqa: E402
+from classifier import classify  # noqa: E402
+
+
+def legacy_classify(df):
+    # v15.x process_data 의 기존 로직 그대로 (비교 기준) — 글로벌 OTA 는 기존 대시보드 표의 '부킹'/'트립' 부분 일치까지 합친 기준
+    df['breakfast_status'] = df.apply(lambda r: '조식포함' if any(kw in f"{r.get('service_code','')} {r.get('rate_type','')} {r.get('package','')}".upper() for kw in ['BF', '조식', 'BFR', 'BB', 'B.F']) else '조식불포함', axis=1)
+    df['market_segment'] = df['market'].apply(lambda x: 'Group' if any(k in str(x).upper() for k in ['GRP', 'GROUP', 'DOS', 'BGRP', 'MICE']) else 'FIT')
+    df['is_global_ota'] = df['account'].apply(lambda x: any(g in str(x).upper() for g in ['AGODA', 'EXPEDIA', 'BOOKING', 'TRIP', '아고다', '부킹', '익스피디아', '트립']))
+    return df
+
+
+def vector_classify(df):
+    # 현재 적재 경로 (processor.clean_production): 규칙 테이블 분류 + 거래처 차원 조회
+    return attach_channels(classify(df))
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    pick = lambda vals: rng.choice(np.array(vals, dtype=object), n)
+    return pd.DataFrame({
+        'service_code': pick(['RO', 'BF2', 'b.f', None, 'SPA', np.nan, 101]),
+        'rate_type': pick(['BAR', 'BB_PKG', 'PROMO', '조식패키지', 'corp']),
+        'package': pick(['', 'BFR', None, 'DINNER', 'room only']),
+        'market': pick(['FIT', 'OTA', 'grp', 'Group Tour', 'DOS', 'MICE', None, 'CORP']),
+        'account': pick(['아고다', 'Agoda', 'EXPEDIA H.C', '부킹닷컴', '트립닷컴', '마이리얼트립', '네이버', '홈페이지', '야놀자', 'personal', np.nan]),
+    })
+
+
+def timed(fn, df):
+    start = time.perf_counter()
+    out = fn(df.copy())
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy(s)':>10} {'vector(s)':>10} {'speedup':>8}")
+    for n in args.sizes:
+        df = make_frame(n)
+        old, t_old = timed(legacy_classify, df)
+        new, t_new = timed(vector_classify, df)
+        for col in ['breakfast_status', 'market_segment', 'is_global_ota']:
+            assert (old[col].astype(object) == new[col].astype(object)).all(), f"{col} 결과 불일치"
+        print(f"{n:>10,} {t_old:>10.3f} {t_new:>10.3f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# 엑셀 적재 벤치마크: 기존 openpyxl 전체 읽기 vs calamine + 필요 컬럼 + Parquet 변환(최초/재적재)
+# 실행: python benchmarks/bench_excel.py [--sizes 10000 100000 500000]
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import processor  # noqa: E402
+import synth  # noqa: E402
+
+
+def make_workbook(n, path, seed=0):
+    # 공용 합성 데이터 생성기(benchmarks/synth.py)의 실적 엑셀 (제목 2줄 + 한글 헤더 + 소계/총합계 행)
+    return synth.write_production(n, path, 'xlsx', seed=seed)
+
+
+def upload(path):
+    buf = io.BytesIO(open(path, 'rb').read())
+    buf.name = os.path.basename(path)
+    return buf
+
+
+def legacy_load(path):
+    df = pd.read_excel(upload(path), skiprows=2, engine='openpyxl')
+    df.columns = df.columns.str.strip()
+    return processor.clean_production(df)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 500_000])
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='pms_bench_excel_')
+    processor.EXCEL_COLUMNAR_DIR = os.path.join(work, 'columnar')
+    print(f"engine: {processor.excel_engine() or 'openpyxl'}")
+    print(f"{'rows':>9} {'openpyxl(s)':>12} {'fast 1st(s)':>12} {'parquet(s)':>11} {'1st x':>6} {'repeat x':>9}")
+    try:
+        for n in args.sizes:
+            path = os.path.join(work, f'prod_{n}.xlsx')
+            make_workbook(n, path)
+            old, t_old = timed(legacy_load, path)
+            new, t_first = timed(processor.parse_file, upload(path))
+            again, t_repeat = timed(processor.parse_file, upload(path))
+            for col in ['예약일', '도착일', '총매출액', '객실매출액', 'room_nights', 'breakfast_status', 'market_segment']:
+                assert (old[col].astype(object).to_numpy() == again[col].astype(object).to_numpy()).all(), f"{col} 결과 불일치"
+            print(f"{n:>9,} {t_old:>12.2f} {t_first:>12.2f} {t_repeat:>11.3f} {t_old / t_first:>5.1f}x {t_old / t_repeat:>8.0f}x")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
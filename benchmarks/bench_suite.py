@@ -0,0 +1,200 @@
+# 벤치마크 스위트: 적재 → 분류 → 큐브 → 기간 슬라이스 → 대시보드 집계 단계별 시간을 재고 결과를 누적 저장합니다.
+# 실행: python benchmarks/bench_suite.py [--sizes 1000 100000 1000000] [--xlsx] [--repeat 3] [--fail-on-regression]
+# 결과: benchmarks/results.jsonl (한 줄 = 한 단계 측정), 직전 실행과 비교해 느려진 단계를 표시합니다.
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# 캐시/창고 위치는 모듈 import 시점에 정해지므로, 앱이 쓰는 실제 .pms_cache / .pms_store 대신 임시 작업 폴더를 먼저 지정합니다.
+# (cold_excel 이 캐시 폴더를 지워도 앱 캐시는 건드리지 않도록)
+WORK_DIR = tempfile.mkdtemp(prefix='pms_bench_suite_')
+os.environ['PMS_CACHE_DIR'] = os.path.join(WORK_DIR, 'cache')
+os.environ['PMS_STORE_DIR'] = os.path.join(WORK_DIR, 'store')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+import processor  # noqa: E402
+import production_store  # noqa: E402
+import sql_engine  # noqa: E402
+import synth  # noqa: E402
+from channels import attach_channels  # noqa: E402
+from charts import demand_matrix, pace_chart, payload_bytes  # noqa: E402
+from classifier import classify  # noqa: E402
+from cube import account_stats, build_cubes, channel_stats, demand_by_stay, rollup, segment  # noqa: E402
+from forecast import pickup_history, simulate_month_end  # noqa: E402
+from metrics import (COMPARE_YOY, budget_targets, period_metrics, period_windows, rolling_window, shortfall_simulation,  # noqa: E402
+                     window_slices)
+from nights import expand_nights  # noqa: E402
+from pace import build_pace, summarize_pace  # noqa: E402
+
+RESULTS_FILE = os.path.join(BENCH_DIR, 'results.jsonl')
+REGRESSION_RATIO = 1.25  # 직전 대비 25% 이상 느려지면 회귀로 표시
+REGRESSION_MIN_S = 0.01  # 단, 10ms 미만 차이는 측정 잡음으로 보고 무시
+
+
+def timed(fn, repeat):
+    times, out = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - start)
+    return out, times
+
+
+def _raw_production(path):
+    # 분류 단계만 따로 재기 위해 classify 직전 상태(헤더 매핑 + 상태 필터)까지 준비
+    df = pd.read_csv(path, skiprows=2).rename(columns=processor.PROD_MAPPING)
+    df = df[df['status'].isin(['RR', 'CI', 'RC'])]
+    return df
+
+
+def run_size(n, work, repeat, xlsx, days):
+    prod_csv = synth.write_production(n, os.path.join(work, f'production_{n}.csv'), 'csv', days=days)
+    otb_csv = synth.write_otb(os.path.join(work, 'otb.csv'), 'csv', days=days)
+    stages = {}
+
+    prod, stages['ingest_csv'] = timed(lambda: processor.process_data(synth.as_upload(prod_csv)), repeat)
+    if xlsx and n < synth.XLSX_MAX_ROWS:
+        prod_xlsx = synth.write_production(n, os.path.join(work, f'production_{n}.xlsx'), 'xlsx', days=days)
+
+        assert processor.EXCEL_COLUMNAR_DIR.startswith(work), "벤치마크가 앱 캐시 폴더를 지우려 합니다"
+
+        def cold_excel():
+            # 매번 Parquet 변환 캐시를 비워 최초 적재 시간을 잽니다.
+            shutil.rmtree(processor.EXCEL_COLUMNAR_DIR, ignore_errors=True)
+            return processor.process_data(synth.as_upload(prod_xlsx))
+        _, stages['ingest_xlsx'] = timed(cold_excel, repeat)
+        _, stages['ingest_xlsx_cached'] = timed(lambda: processor.process_data(synth.as_upload(prod_xlsx)), repeat)
+
+    # 📚 누적 창고: 같은 내보내기를 다시 합칠 때(변경 0건) 비용 = 매일 겹치는 구간 재적재 비용
+    store = os.path.join(work, f'store_{n}')
+    production_store.ingest_production(synth.as_upload(prod_csv), store, window_deletes=True)
+    _, stages['ingest_incremental'] = timed(lambda: production_store.ingest_production(synth.as_upload(prod_csv), store, window_deletes=True), repeat)
+
+    if sql_engine.sql_available():
+        # 🗄️ 창고 Parquet 직접 SQL (국적 × 리드타임 ADR, 최근 30일 예약일 → pushdown)
+        params = {'start': prod['예약일'].max() - pd.Timedelta(days=30), 'end': prod['예약일'].max() + pd.Timedelta(days=1)}
+        _, stages['sql_saved_query'] = timed(
+            lambda: sql_engine.run_query(sql_engine.SAVED_QUERIES['국적 × 리드타임 구간별 ADR'], params, store), repeat)
+
+    raw = _raw_production(prod_csv)
+    _, stages['classify'] = timed(lambda: classify(raw.copy()), repeat)
+    _, stages['expand_nights'] = timed(lambda: expand_nights(prod), repeat)
+    cubes, stages['build_cubes'] = timed(lambda: build_cubes(prod), repeat)
+
+    latest = prod['예약일'].max()
+    windows = period_windows(latest)
+    slices, stages['period_slicing'] = timed(lambda: {k: window_slices(cubes, w) for k, w in windows.items()}, repeat)
+    # 임의 구간 조회 100회 (최근 1~100일 롤링 vs 전년 동기, 이진 탐색)
+    _, stages['range_query_x100'] = timed(
+        lambda: [window_slices(cubes, rolling_window(latest, d, COMPARE_YOY)) for d in range(1, 101)], repeat)
+    _, stages['period_metrics'] = timed(
+        lambda: [period_metrics(part['booking']) for pair in slices.values() for part in pair], repeat)
+
+    monthly = slices['MONTHLY'][0]
+    fit = segment(monthly['booking'], 'FIT')
+    _, stages['account_stats'] = timed(lambda: account_stats(fit), repeat)
+    # 🏷️ 거래처 차원 부착 (적재 때 한 번: 거래처별 채널/플래그 → 코드로 펼침) + 채널별 실적
+    _, stages['attach_channels'] = timed(lambda: attach_channels(prod.copy()), repeat)
+    _, stages['channel_stats'] = timed(lambda: channel_stats(monthly['booking']), repeat)
+    _, stages['country_mix'] = timed(lambda: rollup(fit, 'country', ['count']), repeat)
+    _, stages['breakfast_by_account'] = timed(
+        lambda: monthly['booking'].groupby(['account', 'breakfast_status'], observed=True)['count'].sum().unstack(fill_value=0), repeat)
+    matrix, stages['demand_by_stay'] = timed(lambda: demand_by_stay(monthly['demand'], monthly['stay_col']), repeat)
+
+    otb, stages['ingest_otb'] = timed(lambda: processor.process_data([synth.as_upload(otb_csv)], is_otb=True), repeat)
+    pace_df, stages['build_pace'] = timed(lambda: build_pace(otb, {'1주전': otb, 'STLY': otb}), repeat)
+    _, stages['summarize_pace'] = timed(lambda: summarize_pace(pace_df, ['1주전', 'STLY']), repeat)
+    as_of = otb['일자_dt'].min() + pd.Timedelta(days=14)
+    _, stages['shortfall_simulation'] = timed(lambda: shortfall_simulation(otb, as_of, budget_targets()[as_of.month]), repeat)
+    # 🎲 몬테카를로 월말 예측: 픽업 분포 표(실적 출처당 1회) + 4개월 × N_SIMS 시뮬레이션(rerun 마다)
+    history, stages['pickup_history'] = timed(lambda: pickup_history(prod), repeat)
+    _, stages['monte_carlo_forecast'] = timed(lambda: simulate_month_end(otb, history, as_of, budget_targets()), repeat)
+    _, stages['chart_payload'] = timed(
+        lambda: payload_bytes(demand_matrix(matrix, monthly['stay_col'], '이번달')) + payload_bytes(pace_chart(otb)), repeat)
+    return stages
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'commit': commit or None, 'processor_version': processor.PROCESSOR_VERSION, 'python': platform.python_version(),
+            'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def load_previous(path, run_id):
+    # (rows, stage) 별 가장 최근 이전 실행 기록
+    previous = {}
+    if not os.path.exists(path):
+        return previous
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            rec = json.loads(line)
+            if rec['run_id'] != run_id:
+                previous[(rec['rows'], rec['stage'])] = rec
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PMS 처리/집계 벤치마크 스위트")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--xlsx', action='store_true', help="엑셀 적재도 측정 (느림, 1,048,576행 미만만)")
+    parser.add_argument('--results', default=RESULTS_FILE)
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:12]
+    env = environment()
+    previous = load_previous(args.results, run_id)
+    work = WORK_DIR
+    records, regressions = [], []
+    print(f"commit={env['commit']} processor={env['processor_version']} pandas={env['pandas']} repeat={args.repeat}")
+    print(f"{'rows':>10} {'stage':<22} {'best(s)':>9} {'median(s)':>10} {'prev(s)':>9} {'ratio':>6}")
+    try:
+        for n in args.sizes:
+            for stage, times in run_size(n, work, args.repeat, args.xlsx, args.days).items():
+                best = min(times)
+                rec = {'run_id': run_id, 'timestamp': datetime.now().isoformat(timespec='seconds'), **env,
+                       'rows': n, 'stage': stage, 'best_s': best, 'median_s': statistics.median(times), 'repeat': len(times)}
+                records.append(rec)
+                prev = previous.get((n, stage))
+                ratio = best / prev['best_s'] if prev and prev['best_s'] > 0 else None
+                flag = ''
+                if ratio is not None and ratio > REGRESSION_RATIO and best - prev['best_s'] > REGRESSION_MIN_S:
+                    flag = '  ⚠️ 회귀'
+                    regressions.append((n, stage, ratio))
+                prev_s = f"{prev['best_s']:>9.4f}" if prev else f"{'-':>9}"
+                ratio_s = f"{ratio:>5.2f}x" if ratio is not None else f"{'-':>6}"
+                print(f"{n:>10,} {stage:<22} {best:>9.4f} {rec['median_s']:>10.4f} {prev_s} {ratio_s}{flag}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if not args.no_save:
+        with open(args.results, 'a', encoding='utf-8') as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        print(f"saved {len(records)} results → {args.results}")
+    if regressions:
+        print(f"⚠️ 직전 실행 대비 {REGRESSION_RATIO:.2f}배 이상 느려진 단계 {len(regressions)}개")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# 합성 PMS 데이터 생성기: process_data 가 기대하는 그대로의 실적(Production) / 온더북(OTB) 내보내기 파일
+#  - 실적: 제목 2줄 + 한글 헤더 + 입실일별 '합계' 소계 행 + 마지막 '총합계'
+#  - OTB : 제목 3줄 + 19컬럼 + 월별 '소계' 행 + 마지막 '총합계'
+# 실행: python benchmarks/synth.py --rows 1000 100000 5000000 --format csv xlsx --out /tmp/pms_synth
+import argparse
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+PROD_TITLE_ROWS = ['Production Report', '기간: {start} ~ {end}']
+OTB_TITLE_ROWS = ['On The Books Report', '기준일: {start}', '단위: 실 / 원']
+PROD_HEADERS = ['고객명', '예약일자', '입실일자', '퇴실일자', '총금액', '객실료', '박수', '객실타입', '국적', '시장', '상태',
+                '거래처', '객실수', '서비스코드', '요금타입', '패키지', '메모', '담당자']
+OTB_HEADERS = ['일자', '요일', '개인 객실', '개인 비율', '개인 ADR', '개인 매출', '개인 매출비율',
+               '단체 객실', '단체 비율', '단체 ADR', '단체 매출', '단체 매출비율',
+               '내부이용', '무료', '합계 객실', '점유율', '합계 ADR', 'RevPAR', '합계 매출']
+XLSX_MAX_ROWS = 1_048_576  # 엑셀 시트 최대 행 수 (제목/헤더/소계 포함)
+CHUNK_ROWS = 500_000       # 대용량 CSV 는 이 단위로 만들어 바로 씁니다 (메모리 상한)
+
+ACCOUNTS = ['아고다', '부킹닷컴', '익스피디아 e.c', '익스피디아 h.c', '트립닷컴', '네이버', '홈페이지', '야놀자',
+            '마이리얼트립', 'personal', '마이스 A', '그룹 GRP', 'CORP 삼성', 'Agoda.com', 'EXPEDIA']
+MARKETS = ['FIT', 'OTA', 'CORP', 'GRP', 'Group Tour', 'MICE', 'DOS', 'BGRP']
+COUNTRIES = ['KOR', 'JPN', 'CHN', 'USA', 'TWN', 'HKG', 'SGP', 'VNM']
+
+
+def production_frame(n, start='2025-01-01', days=365, seed=0, subtotal_every=500):
+    # 예약 n 건 + 입실일 묶음마다 '합계' 소계 행 (실제 PMS 출력처럼 입실일 정렬)
+    rng = np.random.default_rng(seed)
+    booked = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n), 'D')
+    arrival = booked + pd.to_timedelta(np.minimum(rng.exponential(30, n), 365).astype(int), 'D')
+    los = rng.choice([1, 1, 1, 2, 2, 3, 4, 7], n)
+    rooms = rng.choice([1, 1, 1, 1, 2, 3], n)
+    room_rate = rng.integers(80, 450, n) * 1000 * los * rooms
+    df = pd.DataFrame({
+        '고객명': rng.choice(['홍길동', 'KIM MINSU', 'TANAKA YUKI', 'LEE', 'WANG', 'SMITH'], n),
+        '예약일자': booked, '입실일자': arrival, '퇴실일자': arrival + pd.to_timedelta(los, 'D'),
+        '총금액': room_rate + rng.integers(0, 80, n) * 1000, '객실료': room_rate, '박수': los,
+        '객실타입': rng.choice(['DLX', 'STE', 'TWN', 'FAM', 'PRE'], n), '국적': rng.choice(COUNTRIES, n),
+        '시장': rng.choice(MARKETS, n, p=[.3, .3, .1, .1, .05, .05, .05, .05]),
+        '상태': rng.choice(['RR', 'CI', 'RC', 'CX', '취소'], n, p=[.45, .25, .15, .1, .05]),
+        '거래처': rng.choice(ACCOUNTS, n), '객실수': rooms,
+        '서비스코드': rng.choice(['BF', 'RO', '', 'B.F', 'SPA'], n), '요금타입': rng.choice(['BAR', 'BB_PKG', 'PROMO', 'corp'], n),
+        '패키지': rng.choice(['', '조식', 'DINNER', 'room only'], n), '메모': rng.choice(['', '늦은 체크인', 'VIP'], n),
+        '담당자': rng.choice(['A', 'B', 'C'], n),
+    }).sort_values('입실일자', kind='stable', ignore_index=True)
+    for col in ['예약일자', '입실일자', '퇴실일자']:
+        df[col] = df[col].dt.strftime('%Y-%m-%d')
+    return _with_subtotals(df, '고객명', '합계', '총합계', ['총금액', '객실료', '박수', '객실수'], subtotal_every)
+
+
+def otb_frame(start='2025-01-01', days=365, rooms=130, seed=0):
+    # 투숙일별 OTB 19컬럼 + 월별 '소계' + '총합계'
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days)
+    fit = rng.integers(0, int(rooms * 0.7), days)
+    grp = np.minimum(rng.integers(0, int(rooms * 0.4), days), rooms - fit)
+    fit_adr = rng.integers(120, 380, days) * 1000
+    grp_adr = rng.integers(90, 250, days) * 1000
+    fit_rev, grp_rev = fit * fit_adr, grp * grp_adr
+    total, total_rev = fit + grp, fit * fit_adr + grp * grp_adr
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = pd.DataFrame({
+            '일자': dates.strftime('%Y-%m-%d'), '요일': dates.day_name(),
+            '개인 객실': fit, '개인 비율': np.nan_to_num(fit / total * 100), '개인 ADR': fit_adr, '개인 매출': fit_rev,
+            '개인 매출비율': np.nan_to_num(fit_rev / total_rev * 100),
+            '단체 객실': grp, '단체 비율': np.nan_to_num(grp / total * 100), '단체 ADR': grp_adr, '단체 매출': grp_rev,
+            '단체 매출비율': np.nan_to_num(grp_rev / total_rev * 100),
+            '내부이용': rng.integers(0, 3, days), '무료': rng.integers(0, 2, days), '합계 객실': total,
+            '점유율': total / rooms * 100, '합계 ADR': np.nan_to_num(total_rev / total), 'RevPAR': total_rev / rooms, '합계 매출': total_rev,
+        })
+    month = dates.to_period('M')
+    parts = []
+    for _, block in df.groupby(month, sort=True):
+        parts.append(block)
+        parts.append(_subtotal(block, '일자', '소계', ['개인 객실', '개인 매출', '단체 객실', '단체 매출', '합계 객실', '합계 매출']))
+    parts.append(_subtotal(df, '일자', '총합계', ['개인 객실', '개인 매출', '단체 객실', '단체 매출', '합계 객실', '합계 매출']))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _subtotal(block, label_col, label, sum_cols):
+    row = {c: '' for c in block.columns}
+    row[label_col] = label
+    row.update(block[sum_cols].sum().to_dict())
+    return pd.DataFrame([row])
+
+
+def _with_subtotals(df, label_col, label, total_label, sum_cols, every):
+    parts = [piece for start in range(0, len(df), every)
+             for piece in (df.iloc[start:start + every], _subtotal(df.iloc[start:start + every], label_col, label, sum_cols))]
+    parts.append(_subtotal(df, label_col, total_label, sum_cols))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _title_rows(template, start, end):
+    return [line.format(start=start, end=end) for line in template]
+
+
+def write_csv(df, path, title_rows):
+    # 제목 줄(skiprows 대상) + 헤더 + 데이터, PMS 내보내기처럼 BOM 포함 UTF-8
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        for line in title_rows:
+            f.write(f"{line}\n")
+        df.to_csv(f, index=False)
+    return path
+
+
+def write_xlsx(df, path, title_rows):
+    from openpyxl import Workbook
+
+    if len(df) + len(title_rows) + 1 > XLSX_MAX_ROWS:
+        raise ValueError(f"XLSX 는 시트당 {XLSX_MAX_ROWS:,}행까지입니다 ({len(df):,}행 요청). CSV 를 사용하세요.")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for line in title_rows:
+        ws.append([line])
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        ws.append([v.item() if hasattr(v, 'item') else v for v in row])
+    wb.save(path)
+    return path
+
+
+def write_production(n, path, fmt='csv', start='2025-01-01', days=365, seed=0):
+    # 대용량 CSV 는 CHUNK_ROWS 단위로 생성해 이어 씁니다 (각 청크 = 독립 시드, 총합계는 마지막 한 번)
+    title = _title_rows(PROD_TITLE_ROWS, start, f"{pd.Timestamp(start) + pd.Timedelta(days=days - 1):%Y-%m-%d}")
+    if fmt == 'xlsx':
+        return write_xlsx(production_frame(n, start, days, seed), path, title)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        for line in title:
+            f.write(f"{line}\n")
+        sums, header = None, True
+        for i, offset in enumerate(range(0, n, CHUNK_ROWS)):
+            chunk = production_frame(min(CHUNK_ROWS, n - offset), start, days, seed + i)
+            chunk = chunk[chunk['고객명'] != '총합계']
+            rows = chunk[chunk['고객명'] != '합계']
+            part = rows[['총금액', '객실료', '박수', '객실수']].astype('int64').sum()
+            sums = part if sums is None else sums + part
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+        total = {c: '' for c in PROD_HEADERS}
+        total.update({'고객명': '총합계', **sums.to_dict()})
+        pd.DataFrame([total]).to_csv(f, index=False, header=False)
+    return path
+
+
+def write_otb(path, fmt='csv', start='2025-01-01', days=365, rooms=130, seed=0):
+    df = otb_frame(start, days, rooms, seed)
+    title = _title_rows(OTB_TITLE_ROWS, start, start)
+    return write_xlsx(df, path, title) if fmt == 'xlsx' else write_csv(df, path, title)
+
+
+def as_upload(path):
+    # Streamlit 업로드 객체처럼 .name 이 있는 메모리 파일
+    with open(path, 'rb') as f:
+        buf = io.BytesIO(f.read())
+    buf.name = os.path.basename(path)
+    return buf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 PMS 실적/OTB 파일 생성")
+    parser.add_argument('--rows', nargs='+', type=int, default=[1_000, 100_000])
+    parser.add_argument('--format', nargs='+', choices=['csv', 'xlsx'], default=['csv'])
+    parser.add_argument('--days', type=int, default=365, help="예약일 분포 기간(일) / OTB 투숙일 수")
+    parser.add_argument('--start', default='2025-01-01')
+    parser.add_argument('--out', default='synthetic')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for fmt in args.format:
+        print(write_otb(os.path.join(args.out, f"otb.{fmt}"), fmt, args.start, args.days))
+        for n in args.rows:
+            if fmt == 'xlsx' and n >= XLSX_MAX_ROWS:
+                print(f"skip xlsx {n:,} rows (엑셀 행 제한)")
+                continue
+            print(write_production(n, os.path.join(args.out, f"production_{n}.{fmt}"), fmt, args.start, args.days))
+
+
+if __name__ == '__main__':
+    main()
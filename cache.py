@@ -0,0 +1,139 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+from columnar import CACHE_DIR, file_bytes, write_parquet
+from processor import PROCESSOR_VERSION, process_data
+from telemetry import span
+
+# 🚀 파싱 결과 캐시: 메모리(최근 사용분) + 로컬 디스크(Parquet)
+# 키 = 파일 내용 해시 + is_otb + 처리기 버전 → 같은 파일을 다시 올려도, 서버를 재시작해도 엑셀을 다시 읽지 않습니다.
+# 메모리/디스크 모두 최근 사용분만 남깁니다 (디스크는 파일 수정 시각 = 마지막 사용 시각 기준, 버전이 바뀐 옛 키도 자연히 밀려남).
+MAX_MEMORY_ENTRIES = 8
+MAX_DIGEST_ENTRIES = 64   # 업로드 file_id → 내용 해시 (한 키에 여러 파일이 들어가므로 넉넉히)
+MAX_DISK_ENTRIES = 32
+
+_memory = OrderedDict()
+_derived = OrderedDict()
+_digests = OrderedDict()
+
+
+def file_digest(uploaded_file):
+    # Streamlit 업로드 객체는 file_id 가 있으므로 같은 업로드는 한 번만 해시합니다.
+    file_id = getattr(uploaded_file, 'file_id', None)
+    if file_id is not None and file_id in _digests:
+        _digests.move_to_end(file_id)
+        return _digests[file_id]
+    digest = hashlib.sha256(file_bytes(uploaded_file)).digest()
+    if file_id is not None:
+        _remember(_digests, file_id, digest, MAX_DIGEST_ENTRIES)
+    return digest
+
+
+def cache_key(uploaded_files, is_otb=False):
+    files = uploaded_files if isinstance(uploaded_files, list) else [uploaded_files]
+    h = hashlib.sha256(f"{PROCESSOR_VERSION}|otb={bool(is_otb)}".encode())
+    # 업로드 순서도 결과(중복 일자 제거)에 영향을 주므로 순서대로 해시합니다.
+    for f in files:
+        h.update(file_digest(f))
+    return h.hexdigest()
+
+
+def _remember(store, key, entry, limit=MAX_MEMORY_ENTRIES):
+    store[key] = entry
+    store.move_to_end(key)
+    while len(store) > limit:
+        store.popitem(last=False)
+
+
+def _spill(df, path):
+    try:
+        write_parquet(df, path)
+    except Exception:
+        # pyarrow 미설치/디스크 오류 시에도 메모리 캐시만으로 계속 동작
+        return
+    _prune_disk()
+
+
+def _load(path):
+    try:
+        df = pd.read_parquet(path)
+        os.utime(path)  # 최근 사용으로 표시 (정리 대상에서 뒤로)
+        return df
+    except Exception:
+        return None
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+def _prune_disk(keep=None):
+    # 디스크 캐시는 최근 사용 keep 개만 남기고 지웁니다 (다른 프로세스가 먼저 지운 파일은 무시)
+    keep = MAX_DISK_ENTRIES if keep is None else keep
+    if not os.path.isdir(CACHE_DIR):
+        return
+    paths = [os.path.join(CACHE_DIR, n) for n in os.listdir(CACHE_DIR) if n.endswith('.parquet')]
+    for path in sorted(paths, key=_mtime, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def cached_process_data(uploaded_files, is_otb=False, errors=None):
+    if not uploaded_files:
+        return pd.DataFrame()
+
+    key = cache_key(uploaded_files, is_otb)
+    path = os.path.join(CACHE_DIR, f"{key}.parquet")
+
+    with span('cache.process_data', otb=is_otb) as sp:
+        entry = _memory.get(key)
+        source = 'memory'
+        if entry is None and os.path.exists(path):
+            df = _load(path)
+            if df is not None:
+                entry, source = (df, []), 'disk'
+        if entry is None:
+            file_errors = []
+            df = process_data(uploaded_files, is_otb=is_otb, errors=file_errors)
+            entry, source = (df, file_errors), 'parse'
+            # 일부 파일이 실패한 결과는 디스크에 남기지 않습니다 (파일을 고쳐 올리면 다시 처리되도록).
+            if not file_errors:
+                _spill(df, path)
+        sp.set(rows=len(entry[0]), source=source)
+    _remember(_memory, key, entry)
+
+    df, file_errors = entry
+    if errors is not None:
+        errors.extend(file_errors)
+    # 얕은 복사: 호출부에서 컬럼을 추가해도 캐시 원본은 그대로 유지됩니다.
+    return df.copy(deep=False)
+
+
+def cached_derive(uploaded_files, is_otb, name, build, df):
+    # 처리된 프레임에서 파생되는 결과(집계 큐브 등)도 같은 키로 한 번만 만듭니다 (메모리 전용)
+    return cached_derive_by_key(cache_key(uploaded_files, is_otb), name, build, df)
+
+
+def cached_derive_by_key(source_key, name, build, df):
+    # 업로드 파일이 아닌 출처(예: 실적 누적 창고 버전)로 만든 프레임용
+    key = (source_key, name)
+    if key not in _derived:
+        _remember(_derived, key, build(df))
+    _derived.move_to_end(key)
+    return _derived[key]
+
+
+def clear_cache(disk=False):
+    _memory.clear()
+    _derived.clear()
+    _digests.clear()
+    if disk:
+        _prune_disk(0)
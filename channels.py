@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from classifier import compile_keywords
+
+# 🏷️ 거래처(채널) 차원 테이블: 적재(clean_production) 때 거래처 이름마다 한 번만 정규화/분류하고,
+# 그 결과(채널 + 플래그)를 account 의 category 코드로 펼쳐 행에 붙입니다 → 큐브 차원으로 그대로 따라가므로
+# 대시보드 필터(마이스/그룹 제외, 글로벌 OTA, 조식 지정 거래처)와 채널별 실적은 컬럼 조회/그룹 합계뿐입니다.
+# 채널은 위에서부터 먼저 걸리는 규칙 하나 (없으면 '기타'), 플래그(is_*)는 규칙마다 따로 판정합니다.
+# 글로벌 OTA 플래그는 기존 글로벌 OTA 표의 부분 일치('부킹', '트립' 포함)를 그대로 따르므로 '마이리얼트립'처럼
+# 이름에 '트립'이 든 국내 OTA 도 플래그는 켜집니다 — 채널은 국내 OTA 규칙을 먼저 보아 국내 OTA 로 둡니다.
+CHANNEL_RULES = {
+    'MICE/그룹': {'flag': 'is_mice_group', 'keywords': ['마이스', '그룹', 'GRP', 'MICE']},
+    '국내 OTA': {'keywords': ['네이버', 'NAVER', '야놀자', '여기어때', '호텔타임', '트립비토즈', '마이리얼트립', '올마이투어', '타이드스퀘어', '인터파크']},
+    '글로벌 OTA': {'flag': 'is_global_ota', 'keywords': ['AGODA', 'EXPEDIA', 'BOOKING', 'TRIP', '아고다', '부킹', '익스피디아', '트립']},
+    '다이렉트': {'keywords': ['홈페이지', 'PERSONAL', '워크인', 'WALK', '직접']},
+}
+OTHER_CHANNEL = '기타'
+CHANNELS = list(CHANNEL_RULES) + [OTHER_CHANNEL]
+# 조식 선택률을 따로 보는 지정 거래처 (공백/대소문자 무시 정확 일치)
+BREAKFAST_TARGET_ACCOUNTS = ['아고다', '부킹닷컴', '익스피디아 e.c', '익스피디아 h.c', '트립닷컴', '네이버', '홈페이지', '야놀자', '호텔타임',
+                             '트립비토즈', '마이리얼트립', '올마이투어', '타이드스퀘어', 'personal']
+CHANNEL_FLAGS = [rule['flag'] for rule in CHANNEL_RULES.values() if 'flag' in rule] + ['is_breakfast_target']
+CHANNEL_COLUMNS = ['channel'] + CHANNEL_FLAGS
+
+_PATTERNS = {name: compile_keywords(rule['keywords']) for name, rule in CHANNEL_RULES.items()}
+
+
+def normalize_account(name):
+    return str(name).lower().replace(' ', '')
+
+
+_BREAKFAST_KEYS = {normalize_account(a) for a in BREAKFAST_TARGET_ACCOUNTS}
+
+
+def resolve_account(name):
+    upper = str(name).upper()
+    hits = {channel: bool(p.search(upper)) for channel, p in _PATTERNS.items()}
+    return {'account_key': normalize_account(name),
+            'channel': next((c for c, hit in hits.items() if hit), OTHER_CHANNEL),
+            **{rule['flag']: hits[c] for c, rule in CHANNEL_RULES.items() if 'flag' in rule},
+            'is_breakfast_target': normalize_account(name) in _BREAKFAST_KEYS}
+
+
+def _codes(accounts):
+    # category 면 만들어 둔 코드를 그대로, 아니면 여기서 한 번 factorize (결측 = -1)
+    if isinstance(accounts.dtype, pd.CategoricalDtype):
+        return accounts.array.codes, accounts.cat.categories
+    codes, uniques = pd.factorize(accounts)
+    return codes, pd.Index(uniques)
+
+
+def channel_table(accounts):
+    # 코드 순서와 같은 순서의 차원 테이블 (거래처 / 정규화 키 / 채널 / 플래그)
+    _, uniques = _codes(accounts)
+    return pd.DataFrame([{'account': a, **resolve_account(a)} for a in uniques],
+                        columns=['account', 'account_key'] + CHANNEL_COLUMNS)
+
+
+def attach_channels(df):
+    # 행별 채널/플래그 = 거래처별 값[코드] (결측 거래처는 '기타' / False)
+    codes, _ = _codes(df['account'])
+    table = channel_table(df['account'])
+    channel_codes = np.append(table['channel'].map(CHANNELS.index).to_numpy(dtype='int8'), CHANNELS.index(OTHER_CHANNEL))
+    df['channel'] = pd.Categorical.from_codes(channel_codes.take(codes), categories=CHANNELS)
+    for flag in CHANNEL_FLAGS:
+        df[flag] = np.append(table[flag].to_numpy(dtype=bool), False).take(codes)  # 코드 -1 → 마지막 자리표시
+    return df
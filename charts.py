@@ -0,0 +1,130 @@
+import math
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# 🚀 차트 데이터 계층: 그림에 필요한 점(포인트)만 미리 집계해서 Plotly 에 넘깁니다.
+# 예약 원본 행을 그대로 넘기면 브라우저로 수 MB 의 JSON 이 전송되고 집계도 브라우저에서 일어납니다.
+MAX_SERIES_POINTS = 370          # 일별 1년치까지는 그대로, 더 길면 N일 구간으로 합산
+PAYLOAD_WARN_BYTES = 1024 ** 2   # 탭 하나의 차트 JSON 합계가 이보다 크면 경고
+GAUGE_LAYOUT = dict(height=180, margin=dict(t=30, b=0, l=10, r=10))
+
+
+def payload_bytes(fig):
+    return len(fig.to_json())
+
+
+def bucket_dates(df, date_col, sums=(), means=(), max_points=MAX_SERIES_POINTS):
+    # 날짜 점이 max_points 를 넘으면 같은 폭의 날짜 구간으로 묶습니다 (합계형은 sum, 비율형은 mean)
+    # 반환: (집계된 프레임, 구간 폭(일))
+    if len(df) <= max_points:
+        return df, 1
+    dates = pd.to_datetime(df[date_col])
+    start = dates.min()
+    width = math.ceil(((dates.max() - start).days + 1) / max_points)
+    bucket = start + pd.to_timedelta((dates - start).dt.days // width * width, unit='D')
+    grouped = df.groupby(bucket.rename(date_col))
+    parts = []
+    if sums:
+        parts.append(grouped[list(sums)].sum())
+    if means:
+        parts.append(grouped[list(means)].mean())
+    return pd.concat(parts, axis=1).reset_index(), width
+
+
+def _bucket_note(width):
+    return "" if width == 1 else f" ({width}일 구간 합산)"
+
+
+def gauge(value, title, bar_color=None):
+    indicator = dict(mode="gauge+number", value=value, title={'text': title})
+    if bar_color:
+        indicator['gauge'] = {'bar': {'color': bar_color}}
+    return go.Figure(go.Indicator(**indicator)).update_layout(**GAUGE_LAYOUT)
+
+
+def country_pie(country_counts, title):
+    # country_counts: 국적별 예약 건수 (cube.rollup(..., 'country', ['count']))
+    return px.pie(country_counts, names='country', values='count', title=title, hole=0.4)
+
+
+def ota_country_bar(mix):
+    # mix: 거래처 × 국적 예약 건수
+    return px.bar(mix, x="account", y="count", color="country", title="글로벌 OTA 채널별 국적 비중", barmode="stack", text_auto=True)
+
+
+def account_rank_bar(stats, measure, title, text_auto, scale, top=10):
+    return px.bar(stats.sort_values(measure).tail(top), x=measure, y='account', orientation='h', title=title,
+                  text_auto=text_auto, color_continuous_scale=scale, color=measure)
+
+
+def channel_mix_bar(stats):
+    return px.bar(stats, x='channel', y='객실매출액', color='channel', title="채널별 객실매출 (비중 %)",
+                  text=stats['share'].map('{:.1f}%'.format), hover_data=['count', 'room_nights', 'Net_ADR'])
+
+
+def breakfast_rate_bar(bf_s):
+    return px.bar(bf_s.sort_values('ratio', ascending=False), x='ratio', y='account', orientation='h',
+                  title="거래처별 조식 선택률 (%)", color_continuous_scale='YlOrRd', color='ratio')
+
+
+def demand_matrix(matrix, stay_col, current_label):
+    # matrix: 투숙일별 room_nights / 객실매출액 합계 → 길면 구간 합산 후 ADR 재계산
+    matrix, width = bucket_dates(matrix, stay_col, sums=['room_nights', '객실매출액'])
+    matrix = matrix.assign(Net_ADR=matrix['객실매출액'] / matrix['room_nights'])
+    fig = px.scatter(
+        matrix,
+        x=stay_col,
+        y='Net_ADR',
+        size='room_nights',
+        color='room_nights',
+        color_continuous_scale='Viridis',
+        title=f"현재 선택된 예약들({current_label})의 실제 투숙일(숙박일) 분포{_bucket_note(width)}",
+        labels={stay_col: '투숙일 (Stay Night)', 'Net_ADR': 'ADR(Net)', 'room_nights': '예약량(RN)'}
+    )
+    fig.update_layout(hovermode='closest')
+    return fig
+
+
+def pace_chart(otb_future):
+    series, width = bucket_dates(otb_future, '일자_dt', sums=['합계_매출', '합계_객실'], means=['점유율', '합계_ADR'])
+    if width > 1:
+        series['합계_ADR'] = series['합계_매출'] / series['합계_객실'].where(series['합계_객실'] > 0)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=series['일자_dt'], y=series['점유율'], name='점유율(%)', marker_color='#a2d2ff'))
+    fig.add_trace(go.Scatter(x=series['일자_dt'], y=series['합계_ADR'], name='ADR(원)', yaxis='y2', line=dict(color='#FF4B4B', width=3)))
+    fig.update_layout(
+        yaxis2=dict(overlaying='y', side='right'),
+        title=f"날짜별 점유율 vs ADR 추이 (Pace 관제){_bucket_note(width)}",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+def pickup_chart(pace_future):
+    series, width = bucket_dates(pace_future.reset_index(), '일자_dt',
+                                 sums=['픽업_1주전_FIT', '픽업_1주전_Group', '합계_객실', 'STLY_객실'])
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=series['일자_dt'], y=series['픽업_1주전_FIT'], name='FIT 픽업(1주)', marker_color='#1f77b4'))
+    fig.add_trace(go.Bar(x=series['일자_dt'], y=series['픽업_1주전_Group'], name='Group 픽업(1주)', marker_color='#ff7f0e'))
+    fig.add_trace(go.Scatter(x=series['일자_dt'], y=series['합계_객실'], name='현재 OTB(RN)', yaxis='y2', line=dict(color='#2ca02c', width=3)))
+    fig.add_trace(go.Scatter(x=series['일자_dt'], y=series['STLY_객실'], name='STLY OTB(RN)', yaxis='y2', line=dict(color='#7f7f7f', dash='dot')))
+    fig.update_layout(
+        barmode='relative',
+        yaxis2=dict(overlaying='y', side='right'),
+        title=f"투숙일별 1주일 픽업(FIT/Group) vs 현재·STLY OTB{_bucket_note(width)}",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+
+def segment_mix_area(otb_future):
+    series, width = bucket_dates(otb_future, '일자_dt', sums=['개인_객실', '단체_객실'])
+    return px.area(series, x='일자_dt', y=['개인_객실', '단체_객실'], title=f"세그먼트 믹스 (Room Nights){_bucket_note(width)}")
+
+
+def yield_matrix(otb_future):
+    # 점 하나 = 투숙일 하나 (이미 일 단위 집계), 필요한 컬럼만 넘깁니다.
+    cols = otb_future[['점유율', '합계_ADR', '합계_매출', '요일', '일자']]
+    return px.scatter(cols, x='점유율', y='합계_ADR', size='합계_매출', color='요일', hover_name='일자', title="수익 최적화 매트릭스 (Yield Matrix)")
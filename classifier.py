@@ -0,0 +1,45 @@
+import re
+import numpy as np
+import pandas as pd
+
+# 🚀 분류 규칙 테이블 (키워드 추가/수정은 여기서만 하면 됩니다)
+# source 컬럼들 중 하나라도 키워드를 포함하면 labels[0], 아니면 labels[1]
+CLASSIFICATION_RULES = {
+    'breakfast_status': {
+        'source': ['service_code', 'rate_type', 'package'],
+        'keywords': ['BF', '조식', 'BFR', 'BB', 'B.F'],
+        'labels': ('조식포함', '조식불포함'),
+    },
+    'market_segment': {
+        'source': ['market'],
+        'keywords': ['GRP', 'GROUP', 'DOS', 'BGRP', 'MICE'],
+        'labels': ('Group', 'FIT'),
+    },
+}
+# 거래처(채널) 분류(글로벌 OTA 등)는 거래처 차원 테이블: channels.CHANNEL_RULES
+
+
+def compile_keywords(keywords):
+    # 키워드는 대문자 비교 기준이므로 미리 대문자로 맞추고, 'B.F' 같은 특수문자는 이스케이프
+    return re.compile('|'.join(re.escape(str(k).upper()) for k in keywords))
+
+
+def match_keywords(series, pattern):
+    # 고유값만 한 번씩 검사한 뒤 코드로 펼칩니다 (거래처/시장처럼 반복이 많은 컬럼에서 특히 빠름)
+    # 기존 str(x).upper() 와 동일하게 NaN/None 도 문자열로 취급 ('NAN'은 어떤 키워드에도 걸리지 않음)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    hit = pd.Series(uniques, dtype=object).astype(str).str.upper().str.contains(pattern, regex=True, na=False)
+    return hit.to_numpy(dtype=bool)[codes]
+
+
+def classify(df, rules=None):
+    rules = CLASSIFICATION_RULES if rules is None else rules
+    for target, rule in rules.items():
+        pattern = compile_keywords(rule['keywords'])
+        hit = np.zeros(len(df), dtype=bool)
+        for col in rule['source']:
+            if col in df.columns:
+                hit = hit | match_keywords(df[col], pattern)
+        yes, no = rule['labels']
+        df[target] = hit if (yes, no) == (True, False) else np.where(hit, yes, no)
+    return df
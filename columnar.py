@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+# 🚀 로컬 컬럼형(Parquet) 저장 공통 도구
+CACHE_DIR = os.environ.get('PMS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.pms_cache'))
+
+
+def file_bytes(uploaded_file):
+    if hasattr(uploaded_file, 'getvalue'):
+        return uploaded_file.getvalue()
+    data = uploaded_file.read()
+    uploaded_file.seek(0)
+    return data
+
+
+def arrow_safe(df):
+    # 엑셀에서 숫자/문자가 섞여 들어온 object 컬럼은 Parquet 로 쓸 수 없으므로 문자열로 통일합니다.
+    out = df.copy(deep=False)
+    for col in out.columns[out.dtypes == object]:
+        if pd.api.types.infer_dtype(out[col], skipna=True) in ('mixed', 'mixed-integer', 'mixed-integer-float'):
+            out[col] = out[col].where(out[col].isna(), out[col].astype(str))
+    return out
+
+
+def write_parquet(df, path, **kwargs):
+    # 임시 파일에 쓰고 교체 → 쓰는 도중 죽어도 반쯤 쓰인 파일이 남지 않습니다.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    arrow_safe(df).to_parquet(tmp, **kwargs)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from nights import STAY_NIGHT_COL, nights_by
+
+from channels import CHANNEL_COLUMNS
+
+# 🚀 집계 큐브: 예약 원본을 적재 시 한 번만 (예약일 × 세그먼트 × 거래처 × 조식 × 국적)으로 묶어 두고
+# Daily/Weekly/Monthly 탭은 큐브를 잘라(slice) 다시 합치기만 합니다 → 렌더 비용이 예약 건수가 아닌 그룹 수에 비례
+# 채널/거래처 플래그는 거래처에 딸린 값이라 그룹 수를 늘리지 않고 큐브 차원으로 함께 따라갑니다.
+CUBE_DIMS = ['예약일', 'market_segment', 'account', 'breakfast_status', 'country'] + CHANNEL_COLUMNS
+CUBE_MEASURES = ['총매출액', '객실매출액', 'room_nights', 'lead_time', 'los']
+DEMAND_MEASURES = ['room_nights', '객실매출액']
+
+
+def stay_date_column(df):
+    # 날짜형 컬럼 중 '예약일'이 아닌 컬럼(투숙일)을 찾습니다. 없으면 이름으로 추정
+    all_date_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
+    candidates = [c for c in all_date_cols if '예약' not in c]
+    if not candidates:
+        candidates = [c for c in df.columns if any(x in c for x in ['일자', '체크인', 'Stay', 'Date'])]
+    return candidates[0] if candidates else None
+
+
+def _widen(df, measures):
+    # 압축(int8/int16)된 개수형 컬럼을 그대로 groupby-sum 하면 넘칠 수 있으므로 합산 전에 넓혀 둡니다.
+    return df.astype({m: 'int64' if pd.api.types.is_integer_dtype(df[m]) else 'float64' for m in measures})
+
+
+def build_cubes(df):
+    # booking: 가산 가능한 측정값의 합계 + 건수(count)  /  demand: 예약일 × 투숙일(숙박한 밤) 수요
+    df = _widen(df, CUBE_MEASURES)
+    booking = (df.assign(count=1)
+                 .groupby(CUBE_DIMS, dropna=False, observed=True, sort=False)[CUBE_MEASURES + ['count']]
+                 .sum().reset_index().sort_values('예약일', kind='stable').reset_index(drop=True))
+    stay_col = stay_date_column(df)
+    demand = pd.DataFrame()
+    if stay_col is not None and 'los' in df.columns:
+        # 🌙 연박 예약은 박마다 나눠 담습니다 (5박이면 RN·매출을 도착일에 몰지 않고 5개 투숙일에 1/5씩)
+        demand = nights_by(df, ['예약일'], stay_col, 'los', DEMAND_MEASURES)
+        demand = demand.sort_values('예약일', kind='stable').reset_index(drop=True)
+        stay_col = STAY_NIGHT_COL
+    elif stay_col is not None:
+        demand = (df.groupby(['예약일', stay_col], dropna=False, observed=True, sort=False)[DEMAND_MEASURES]
+                    .sum().reset_index().sort_values('예약일', kind='stable').reset_index(drop=True))
+    # 같은 수요 큐브를 투숙일 순으로도 한 벌 정렬해 두면 투숙일 구간 조회도 이진 탐색 한 번입니다.
+    stay = demand.sort_values(stay_col, kind='stable').reset_index(drop=True) if not demand.empty else demand
+    return {'booking': booking, 'demand': demand, 'stay': stay, 'stay_col': stay_col}
+
+
+def _cut(frame, col, start=None, end=None):
+    # frame 이 col 로 정렬돼 있을 때 [start, end) 구간을 이진 탐색으로 잘라냅니다 (복사 없음)
+    if frame.empty:
+        return frame
+    dates = frame[col].to_numpy()
+    # NaT 는 정렬 시 맨 뒤 → 첫 NaT 위치도 이진 탐색으로 찾고, 어떤 구간에도 포함하지 않습니다.
+    valid = int(np.searchsorted(dates, np.array('NaT', dtype=dates.dtype), side='left'))
+    lo = 0 if start is None else np.searchsorted(dates[:valid], pd.Timestamp(start).to_datetime64(), side='left')
+    hi = valid if end is None else np.searchsorted(dates[:valid], pd.Timestamp(end).to_datetime64(), side='left')
+    return frame.iloc[lo:hi]
+
+
+def slice_cubes(cubes, start=None, end=None):
+    # 예약일 [start, end) 구간만 남깁니다. 큐브는 예약일로 정렬돼 있으므로 이진 탐색으로 자릅니다.
+    return {'booking': _cut(cubes['booking'], '예약일', start, end), 'demand': _cut(cubes['demand'], '예약일', start, end),
+            'stay_col': cubes['stay_col']}
+
+
+def slice_stay(cubes, start=None, end=None):
+    # 투숙일 [start, end) 에 묵는 수요 (예약일 무관) — 투숙일 정렬본에서 이진 탐색
+    if cubes['stay_col'] is None:
+        return pd.DataFrame()
+    return _cut(cubes['stay'], cubes['stay_col'], start, end)
+
+
+def segment(cube, name):
+    return cube[cube['market_segment'] == name]
+
+
+def totals(cube):
+    # 총매출, 객실매출, RN, ADR (기존 calc_metrics 와 동일)
+    total_sales = cube['총매출액'].sum()
+    room_sales = cube['객실매출액'].sum()
+    rn = cube['room_nights'].sum()
+    adr = room_sales / rn if rn > 0 else 0
+    return total_sales, room_sales, rn, adr
+
+
+def breakfast_ratio(cube):
+    total = cube['count'].sum()
+    if total == 0:
+        return 0
+    return cube.loc[cube['breakfast_status'] == '조식포함', 'count'].sum() / total * 100
+
+
+def mean_of(cube, measure):
+    # 예약 건 평균 = 합계 / 건수
+    n = cube['count'].sum()
+    return cube[measure].sum() / n if n > 0 else np.nan
+
+
+def top_value(cube, dim):
+    # value_counts().index[0] 과 같은 최빈값
+    counts = cube.groupby(dim, observed=True)['count'].sum()
+    return counts.sort_values(ascending=False, kind='stable').index[0] if not counts.empty else None
+
+
+def rollup(cube, by, measures=None):
+    measures = measures or CUBE_MEASURES + ['count']
+    return cube.groupby(by, observed=True)[measures].sum().reset_index()
+
+
+def account_stats(cube):
+    # 거래처별 RN/객실매출 합계 + 평균 LOS/리드타임 + Net ADR
+    stats = rollup(cube, 'account')
+    stats['los'] = stats['los'] / stats['count']
+    stats['lead_time'] = stats['lead_time'] / stats['count']
+    stats['Net_ADR'] = stats['객실매출액'] / stats['room_nights']
+    return stats[['account', 'room_nights', '객실매출액', 'los', 'lead_time', 'Net_ADR']]
+
+
+def channel_stats(cube):
+    # 채널별 건수/RN/객실매출 + Net ADR + 객실매출 비중(%)
+    stats = rollup(cube, 'channel', ['count', 'room_nights', '객실매출액'])
+    stats['Net_ADR'] = stats['객실매출액'] / stats['room_nights']
+    stats['share'] = stats['객실매출액'] / stats['객실매출액'].sum() * 100
+    return stats
+
+
+def demand_by_stay(demand, stay_col):
+    matrix = demand.groupby(stay_col)[DEMAND_MEASURES].sum().reset_index()
+    matrix['Net_ADR'] = matrix['객실매출액'] / matrix['room_nights']
+    return matrix
@@ -0,0 +1,139 @@
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from metrics import FUTURE_MONTHS, TOTAL_ROOMS
+from nights import STAY_NIGHT_COL, expand_nights
+from telemetry import span
+
+# 🎲 월말 예측 (몬테카를로): 투숙일마다 "지금 OTB + 앞으로 들어올 픽업"을 수천 번 뽑아 월말 결과 분포를 만듭니다.
+# 픽업 분포 = 실적(예약일·투숙일)에서 본 과거 투숙일들의 실제 픽업: 투숙 L일 전 이후에 들어온 RN/매출.
+# 미래 투숙일(리드 L, 요일 w)마다 같은 요일의 과거 투숙일 하나를 무작위로 골라 그날의 'L일 전 이후 픽업'을 더합니다.
+# → (시뮬레이션 × 투숙일) 배열 한 번의 인덱싱으로 끝나며, 월별 합계에서 P10/P50/P90 과 버짓 달성 확률을 읽습니다.
+# (실적은 현재 살아 있는 예약만 담으므로 픽업은 취소를 뺀 순픽업입니다.)
+N_SIMS = 5000
+MAX_LEAD = 180          # 이보다 먼 리드타임은 MAX_LEAD 로 봅니다 (그 이전 픽업은 과소 추정)
+LOOKBACK_DAYS = 365     # 픽업 분포에 쓰는 과거 투숙일 범위
+QUANTILES = (10, 50, 90)
+_WEEKDAY_SPAN = 1_000_000  # (요일, 일자) 정렬 키 간격 — 일자 인덱스보다 커야 합니다
+
+
+def _days(values):
+    return np.asarray(values, dtype='datetime64[D]').astype('int64')
+
+
+def _weekday(days):
+    return (days + 3) % 7  # 1970-01-01 = 목요일 → 월요일 0
+
+
+def pickup_history(prod_df, as_of=None, max_lead=MAX_LEAD, lookback_days=LOOKBACK_DAYS):
+    # 과거 투숙일 × 리드 L(0..max_lead) 누적 픽업 표: rn[i, L] = 투숙일 i 에 대해 리드 < L 로 들어온 RN (매출 rev 동일)
+    if prod_df.empty or prod_df['예약일'].isna().all():
+        return None
+    with span('forecast.history', rows=len(prod_df)) as sp:
+        booked_all = prod_df['예약일']
+        end = _days((pd.Timestamp(as_of) if as_of is not None else booked_all.max()).normalize())
+        data_start = _days(booked_all.min().normalize())
+        # 기준일 전날까지 끝난 투숙일만 (기준일 당일은 아직 예약이 들어오는 중), 실적 시작일 이전은 픽업을 알 수 없어 제외
+        start = max(end - lookback_days, data_start)
+        n = int(end - start)
+        if n <= 0:
+            return None
+
+        nights = expand_nights(prod_df, keep=['예약일'])
+        stay = _days(nights[STAY_NIGHT_COL])
+        booked = nights['예약일'].to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(booked) & (stay >= start) & (stay < end)
+        lead = np.clip(stay[valid] - _days(booked[valid]), 0, max_lead)
+        cells = (stay[valid] - start) * (max_lead + 1) + lead
+        tables = {}
+        for name, col in (('rn', 'room_nights'), ('rev', '객실매출액')):
+            by_lead = np.bincount(cells, weights=nights[col].to_numpy()[valid], minlength=n * (max_lead + 1)).reshape(n, max_lead + 1)
+            cum = np.zeros_like(by_lead)
+            cum[:, 1:] = np.cumsum(by_lead[:, :-1], axis=1)  # 리드 < L 합계 (L=0 → 0)
+            tables[name] = cum
+        sp.set(rows=int(valid.sum()), stay_days=n)
+
+    days = start + np.arange(n)
+    order = np.lexsort((days, _weekday(days)))  # 요일별로 모은 뒤 일자순
+    return {'rn': tables['rn'], 'rev': tables['rev'], 'days': days, 'data_start': data_start, 'max_lead': max_lead,
+            'order': order, 'keys': _weekday(days)[order] * _WEEKDAY_SPAN + (days[order] - start)}
+
+
+def _sample_pickup(history, stay_days, leads, n_sims, rng):
+    # (시뮬레이션 × 투숙일) 픽업 RN/매출. 투숙일마다 같은 요일이면서 리드 L 전체를 관측한 과거 투숙일 중 하나를 고릅니다.
+    shape = (n_sims, len(stay_days))
+    if history is None or not len(stay_days):
+        return np.zeros(shape), np.zeros(shape)
+    base, keys, max_lead = history['days'][0], history['keys'], history['max_lead']
+    lead = np.clip(leads, 0, max_lead)
+    wd = _weekday(stay_days) * _WEEKDAY_SPAN
+    # 리드 L 픽업을 다 보려면 과거 투숙일 ≥ 실적 시작일 + L - 1 이어야 합니다. 그런 날이 없으면 같은 요일 전체로 대신합니다.
+    lo = np.searchsorted(keys, wd + np.maximum(history['data_start'] + lead - 1 - base, 0))
+    hi = np.searchsorted(keys, wd + _WEEKDAY_SPAN)
+    lo = np.where(hi > lo, lo, np.searchsorted(keys, wd))
+    count = hi - lo
+    pick = lo + (rng.random(shape) * count).astype('int64')
+    rows = history['order'][np.minimum(pick, len(keys) - 1)]
+    has = (count > 0) & (leads > 0)  # 리드 0 이하(지난 날짜·당일)는 OTB 가 곧 실적
+    return (np.where(has, history['rn'][rows, lead], 0.0),
+            np.where(has, history['rev'][rows, lead], 0.0))
+
+
+def forecast_months(as_of, months=FUTURE_MONTHS):
+    as_of = pd.Timestamp(as_of)
+    return [((as_of.month - 1 + i) // 12 + as_of.year, (as_of.month - 1 + i) % 12 + 1) for i in range(months)]
+
+
+def simulate_month_end(otb_clean, history, as_of, targets, rooms=TOTAL_ROOMS, months=FUTURE_MONTHS, n_sims=N_SIMS, seed=0):
+    # 향후 months 개월 월말 매출/RN 분포 → 월별 P10/P50/P90 · 버짓 달성 확률(%)
+    # seed 고정: 같은 데이터면 rerun 마다 같은 숫자 (화면이 깜빡이며 바뀌지 않도록)
+    periods = forecast_months(as_of, months)
+    first = _days(pd.Timestamp(periods[0][0], periods[0][1], 1))
+    lengths = np.array([calendar.monthrange(y, m)[1] for y, m in periods])
+    stay_days = first + np.arange(lengths.sum())
+
+    with span('forecast.simulate', rows=n_sims * len(stay_days), sims=n_sims) as sp:
+        daily = otb_clean.groupby(otb_clean['일자_dt'].dt.normalize())[['합계_객실', '합계_매출']].sum()
+        daily = daily.reindex(pd.DatetimeIndex(stay_days.astype('datetime64[D]').astype('datetime64[ns]')), fill_value=0)
+        otb_rn, otb_rev = daily['합계_객실'].to_numpy(dtype='float64'), daily['합계_매출'].to_numpy(dtype='float64')
+
+        leads = stay_days - _days(pd.Timestamp(as_of).normalize())
+        pick_rn, pick_rev = _sample_pickup(history, stay_days, leads, n_sims, np.random.default_rng(seed))
+        # 객실 수를 넘는 픽업은 잘라내고, 매출은 잘린 비율만큼 줄입니다.
+        cap = np.maximum(rooms if rooms else np.inf, otb_rn)
+        final_rn = np.minimum(otb_rn + pick_rn, cap)
+        kept = np.divide(final_rn - otb_rn, pick_rn, out=np.zeros_like(pick_rn), where=pick_rn > 0)
+        final_rev = otb_rev + pick_rev * kept
+
+        bounds = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        rev_m, rn_m = np.add.reduceat(final_rev, bounds, axis=1), np.add.reduceat(final_rn, bounds, axis=1)
+        rev_q, rn_q = np.percentile(rev_m, QUANTILES, axis=0), np.percentile(rn_m, QUANTILES, axis=0)
+        sp.set(months=len(periods))
+
+    rows = []
+    for i, (year, month) in enumerate(periods):
+        target = targets.get(month) or {}
+        t_rev, t_rn = target.get('rev_won'), target.get('rn')
+        row = {'year': year, 'month': month, 'otb_rev': otb_rev[bounds[i]:bounds[i] + lengths[i]].sum(),
+               'otb_rn': otb_rn[bounds[i]:bounds[i] + lengths[i]].sum(), 'target_rev': t_rev, 'target_rn': t_rn,
+               'rev_prob': (rev_m[:, i] >= t_rev).mean() * 100 if t_rev else np.nan,
+               'rn_prob': (rn_m[:, i] >= t_rn).mean() * 100 if t_rn else np.nan,
+               'rev_mean': rev_m[:, i].mean()}
+        for q, rev_v, rn_v in zip(QUANTILES, rev_q[:, i], rn_q[:, i]):
+            row[f'rev_p{q}'], row[f'rn_p{q}'] = rev_v, rn_v
+        row['rev_pct_p50'] = row['rev_p50'] / t_rev * 100 if t_rev else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def describe_forecast(fc):
+    # AI 프롬프트용: 월별 월말 매출 분포와 버짓 달성 확률 (모델이 %를 지어내지 않도록 계산값을 그대로 제공)
+    if fc is None or fc.empty:
+        return "- 월말 예측 불가 (데이터 없음)"
+    return "\n".join(
+        f"- {r.year}년 {r.month}월: 확보 {r.otb_rev:,.0f}원 → 월말 예상 P10 {r.rev_p10:,.0f} / P50 {r.rev_p50:,.0f} / "
+        f"P90 {r.rev_p90:,.0f}원 (버짓 대비 P50 {r.rev_pct_p50:.1f}%), 매출 버짓 달성 확률 {r.rev_prob:.0f}%, "
+        f"RN 버짓 달성 확률 {r.rn_prob:.0f}%"
+        for r in fc.itertuples())
@@ -0,0 +1,218 @@
+import calendar
+from datetime import timedelta
+
+import pandas as pd
+
+from cube import breakfast_ratio, mean_of, segment, slice_cubes, slice_stay, top_value, totals
+from snapshot_store import STLY_OFFSET_DAYS
+
+# 🚀 KPI 계산 계층: Streamlit 과 무관하게 (집계 큐브 / OTB 프레임 → 숫자)만 계산합니다.
+# 대시보드(app.py)와 야간 배치(batch_report.py)가 같은 계산을 공유합니다.
+
+# 🚀 [이미지 데이터 기반 12개월 4대 버짓 박제]
+BUDGET_DATA = {
+    1:  {"rev": 514992575,  "rn": 2270, "adr": 226869, "occ": 56.3},
+    2:  {"rev": 786570856,  "rn": 2577, "adr": 305227, "occ": 70.8},
+    3:  {"rev": 529599040,  "rn": 2248, "adr": 235587, "occ": 55.8},
+    4:  {"rev": 695351004,  "rn": 2414, "adr": 288049, "occ": 61.9},
+    5:  {"rev": 903705440,  "rn": 3082, "adr": 293220, "occ": 76.5},
+    6:  {"rev": 808203820,  "rn": 2776, "adr": 291140, "occ": 71.2},
+    7:  {"rev": 1231949142, "rn": 3671, "adr": 335590, "occ": 91.1},
+    8:  {"rev": 1388376999, "rn": 3873, "adr": 358476, "occ": 96.1},
+    9:  {"rev": 952171506,  "rn": 2932, "adr": 324752, "occ": 75.2},
+    10: {"rev": 897171539,  "rn": 3009, "adr": 298163, "occ": 74.7},
+    11: {"rev": 667146771,  "rn": 2402, "adr": 277746, "occ": 61.6},
+    12: {"rev": 804030110,  "rn": 2765, "adr": 290788, "occ": 68.6}
+}
+TOTAL_ROOMS = 130
+MONTHLY_OCC_DAYS = 30  # 월간(MONTHLY) 탭 OCC 게이지는 30일 기준
+FUTURE_MONTHS = 4      # Future OTB 탭의 향후 월별 달성 현황 개수
+
+
+def budget_targets(budget=None):
+    # BUDGET_DATA → 대시보드와 같은 형태의 월별 목표 {"rev_won", "rn", "occ", "adr"}
+    budget = budget or BUDGET_DATA
+    return {m: {"rev_won": b['rev'], "rn": b['rn'], "occ": b['occ'], "adr": b['adr']} for m, b in budget.items()}
+
+
+def pct_change(curr, prev):
+    return None if prev == 0 else (curr - prev) / prev * 100
+
+
+COMPARE_PREVIOUS, COMPARE_YOY = 'previous', 'yoy'
+
+
+def _range_label(start, end):
+    last = end - timedelta(days=1)
+    return f"{start:%m/%d}" if last <= start else f"{start:%m/%d}~{last:%m/%d}"
+
+
+def yoy_range(start, end):
+    # 전년 동기 = 52주(364일) 전 같은 길이 구간 (요일 구성이 같아 주중/주말 믹스가 맞습니다, STLY 와 같은 기준)
+    offset = timedelta(days=STLY_OFFSET_DAYS)
+    return start - offset, end - offset
+
+
+def period_windows(latest_booking_date, open_end=True, compare=COMPARE_PREVIOUS):
+    # 탭별 (현재 [start, end), 비교 [start, end), 현재 라벨, 비교 라벨)
+    # open_end=True 면 현재 구간은 데이터 끝까지(대시보드), False 면 기준일까지(과거 기준일 배치)
+    # compare='yoy' 면 비교 구간을 직전 기간 대신 전년 동기(기준일까지 같은 길이)로 잡습니다.
+    d = latest_booking_date
+    end = None if open_end else d + timedelta(days=1)
+    w_start = d - timedelta(days=d.weekday())
+    m_start = d.replace(day=1)
+    windows = {
+        'DAILY': ((d, d + timedelta(days=1)), (d - timedelta(days=1), d), "오늘", "어제"),
+        'WEEKLY': ((w_start, end), (w_start - timedelta(days=7), w_start), "이번주", "지난주"),
+        'MONTHLY': ((m_start, end), ((m_start - timedelta(days=1)).replace(day=1), m_start), "이번달", "지난달"),
+    }
+    if compare == COMPARE_YOY:
+        for key, ((start, stop), _, label, _) in windows.items():
+            prev = yoy_range(start, stop or d + timedelta(days=1))
+            windows[key] = ((start, stop), prev, label, f"전년 동기 ({prev[0]:%Y}년 {_range_label(*prev)})")
+    return windows
+
+
+def range_window(start, end, compare=COMPARE_PREVIOUS):
+    # 임의 예약일 구간 [start, end) vs 직전 같은 길이 구간 또는 전년 동기
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    if compare == COMPARE_YOY:
+        prev, prefix = yoy_range(start, end), "전년 동기"
+    else:
+        prev, prefix = (start - (end - start), start), "직전 기간"
+    return (start, end), prev, _range_label(start, end), f"{prefix} ({_range_label(*prev)})"
+
+
+def rolling_window(latest_booking_date, days, compare=COMPARE_PREVIOUS):
+    # 기준일 포함 최근 N일 (롤링)
+    end = pd.Timestamp(latest_booking_date).normalize() + timedelta(days=1)
+    return range_window(end - timedelta(days=days), end, compare)
+
+
+def window_slices(cubes, window):
+    (c_start, c_end), (p_start, p_end), _, _ = window
+    return slice_cubes(cubes, c_start, c_end), slice_cubes(cubes, p_start, p_end)
+
+
+def stay_totals(cubes, start, end, rooms=TOTAL_ROOMS):
+    # 투숙일 [start, end) 에 묵는 (박 단위) RN / 객실매출 / ADR / OCC — 투숙일 정렬 수요 큐브에서 이진 탐색
+    nights = slice_stay(cubes, start, end)
+    rn = nights['room_nights'].sum() if not nights.empty else 0
+    rev = nights['객실매출액'].sum() if not nights.empty else 0
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    return {'rn': rn, 'rev': rev, 'adr': rev / rn if rn > 0 else 0, 'occ': rn / (rooms * days) * 100 if days > 0 else 0}
+
+
+def period_metrics(booking):
+    # 예약일 구간 하나(booking 큐브 조각)의 전체 / FIT / Group 성과 (bookings = 예약 건수, 포트폴리오 가중 평균용)
+    fit, group = segment(booking, 'FIT'), segment(booking, 'Group')
+    out = {}
+    for prefix, cube in (('', booking), ('fit_', fit), ('group_', group)):
+        total_sales, room_sales, rn, adr = totals(cube)
+        out.update({f'{prefix}total_sales': total_sales, f'{prefix}room_sales': room_sales,
+                    f'{prefix}room_nights': rn, f'{prefix}adr': adr, f'{prefix}bookings': cube['count'].sum(),
+                    f'{prefix}breakfast_ratio': breakfast_ratio(cube)})
+    out['fit_lead_time'] = mean_of(fit, 'lead_time')
+    out['fit_los'] = mean_of(fit, 'los')
+    out['fit_top_country'] = top_value(fit, 'country')
+    return out
+
+
+def budget_attainment(rev, rn, adr, target, days, rooms=TOTAL_ROOMS):
+    # 매출/RN/ADR/OCC 버짓 달성률(%) — OCC 는 rooms(객실 수) × days 기준 점유율
+    # capacity / target_* 는 여러 호텔을 합산(포트폴리오)할 때 비율을 다시 계산하기 위한 가산 값입니다.
+    capacity = rooms * days
+    occ = rn / capacity * 100
+    return {'rev': rev, 'rn': rn, 'adr': adr, 'occ': occ,
+            'rev_pct': rev / target['rev_won'] * 100, 'rn_pct': rn / target['rn'] * 100,
+            'adr_pct': adr / target['adr'] * 100, 'occ_pct': occ / target['occ'] * 100,
+            'capacity': capacity, 'target_rev': target['rev_won'], 'target_rn': target['rn'],
+            'target_occ_rn': target['occ'] * capacity / 100}
+
+
+def monthly_booking_attainment(booking, target, rooms=TOTAL_ROOMS):
+    # MONTHLY 탭 게이지: 이번달 생성 예약(총매출/RN/객실 ADR) 대비 버짓
+    total_sales, _, rn, adr = totals(booking)
+    return budget_attainment(total_sales, rn, adr, target, MONTHLY_OCC_DAYS, rooms)
+
+
+def month_otb(otb_clean, month):
+    # 투숙월(month)의 OTB 합계 (지나간 날짜의 확정 실적 + 남은 날짜 예약)
+    m_data = otb_clean[otb_clean['일자_dt'].dt.month == month]
+    rev = m_data['합계_매출'].sum()
+    rn = m_data['합계_객실'].sum()
+    return m_data, rev, rn, (rev / rn) if rn > 0 else 0
+
+
+def future_months(as_of, months=FUTURE_MONTHS):
+    return [(as_of.month - 1 + i) % 12 + 1 for i in range(months)]
+
+
+def otb_month_attainment(otb_clean, month, target, year, rooms=TOTAL_ROOMS):
+    m_data, rev, rn, adr = month_otb(otb_clean, month)
+    if m_data.empty:
+        return None
+    return budget_attainment(rev, rn, adr, target, calendar.monthrange(year, month)[1], rooms)
+
+
+def shortfall_simulation(otb_clean, as_of, target):
+    # 당월 버짓 100% 달성까지 남은 과제: 잔여 일수, 부족 매출/RN, 일일 필요 판매량, 필요 단가
+    m_data, c_rev, c_rn, c_adr = month_otb(otb_clean, as_of.month)
+    if m_data.empty:
+        return None
+    days_left = calendar.monthrange(as_of.year, as_of.month)[1] - as_of.day
+    sim = {'rev': c_rev, 'rn': c_rn, 'adr': c_adr,
+           'rev_ach_rate': (c_rev / target['rev_won']) * 100, 'rn_ach_rate': (c_rn / target['rn']) * 100,
+           'days_left': days_left, 'short_rev': None, 'short_rn': None, 'req_rn_day': None, 'req_adr': None}
+    if days_left > 0:
+        short_rev = max(0, target['rev_won'] - c_rev)
+        short_rn = max(0, target['rn'] - c_rn)
+        sim.update(short_rev=short_rev, short_rn=short_rn, req_rn_day=short_rn / days_left,
+                   req_adr=short_rev / short_rn if short_rn > 0 else 0)
+    return sim
+
+
+def describe_shortfall(sim, month):
+    # AI 프롬프트용 당월 현황: 당월 OTB 가 없거나(sim None) 월말(days_left <= 0)이면 필요 판매량/단가는 빼고 그렇다고 적습니다.
+    if sim is None:
+        return f"- 당월({month}월) 버짓 시뮬레이션 불가 (당월 OTB 데이터 없음)"
+    lines = [f"- 당월({month}월) 매출 달성률: {sim['rev_ach_rate']:.1f}%", f"- 남은 일수: {sim['days_left']}일"]
+    if sim['days_left'] > 0:
+        lines += [f"- 목표 달성 위해 매일 필요한 판매량: {sim['req_rn_day']:.1f}실", f"- 목표 달성 위해 필요한 단가: {sim['req_adr']:,.0f}원"]
+    else:
+        lines.append("- 월말: 남은 판매 기간 없음 (필요 판매량/단가 산출 대상 아님)")
+    return "\n".join(lines)
+
+
+SIM_FIELDS = ['days_left', 'short_rev', 'short_rn', 'req_rn_day', 'req_adr']
+
+
+def period_rows(cubes, as_of, open_end=False):
+    # 기준일 하나의 기간(DAILY/WEEKLY/MONTHLY)별 현재/비교 성과 → 표 형태(행 목록)
+    rows = []
+    for period, window in period_windows(as_of, open_end).items():
+        for side, part, label in zip(('current', 'previous'), window_slices(cubes, window), window[2:]):
+            rows.append({'as_of': as_of, 'period': period, 'side': side, 'label': label, **period_metrics(part['booking'])})
+    return rows
+
+
+def booking_budget_row(cubes, as_of, targets, rooms=TOTAL_ROOMS, open_end=False):
+    monthly = window_slices(cubes, period_windows(as_of, open_end)['MONTHLY'])[0]['booking']
+    return {'as_of': as_of, 'month': as_of.month, 'source': 'production',
+            **monthly_booking_attainment(monthly, targets[as_of.month], rooms)}
+
+
+def otb_budget_rows(otb_df, as_of, targets, rooms=TOTAL_ROOMS):
+    # OTB 는 올린 시점의 스냅샷 하나이므로 기준일(as_of) 한 번만: 향후 4개월 달성률 + 당월 숏폴 시뮬레이션
+    otb_clean = otb_df[otb_df['일자_dt'].notna()]
+    sim = shortfall_simulation(otb_clean, as_of, targets[as_of.month])
+    rows = []
+    for month in future_months(as_of):
+        att = otb_month_attainment(otb_clean, month, targets[month], as_of.year, rooms)
+        if att is None:
+            continue
+        row = {'as_of': as_of, 'month': month, 'source': 'otb', **att}
+        if month == as_of.month and sim is not None:
+            row.update({k: sim[k] for k in SIM_FIELDS})
+        rows.append(row)
+    return rows
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# 🌙 숙박일(night) 단위 전개: 예약 1건(객실 rooms × 박수 los)을 투숙일별 행으로 펼칩니다.
+# 파이썬 루프 없이 np.repeat(예약 위치, 박수) + 예약 안 순번(0..los-1) 오프셋으로 만들고,
+# 룸나잇/금액은 박수로 균등 분배합니다 → 투숙일별 합계를 다시 더하면 원본 합계와 정확히 같습니다.
+STAY_NIGHT_COL = '투숙일'
+SPREAD_MEASURES = ['room_nights', '객실매출액']
+CHUNK_ROWS = 500_000  # nights_by 가 한 번에 펼치는 예약 수 (펼친 뒤 메모리 상한)
+
+
+def night_offsets(nights):
+    # 박수 [2, 3] → 예약 안 순번 [0, 1, 0, 1, 2]
+    starts = np.repeat(np.cumsum(nights) - nights, nights)
+    return np.arange(len(starts)) - starts
+
+
+def expand_nights(df, arrival_col='도착일', nights_col='los', spread=SPREAD_MEASURES, keep=()):
+    # 반환: 투숙일 + keep 컬럼(원래 dtype 유지) + spread 측정값(1박 몫)
+    # 박수 0(데이유즈)·결측은 도착일 하루로 두어 합계를 보존하고, 도착일 결측 예약은 제외합니다.
+    arrival = df[arrival_col].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    los = pd.to_numeric(df[nights_col], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    nights = np.where(np.isnat(arrival), 0, np.maximum(np.rint(los), 1)).astype('int64')
+    rows = np.repeat(np.arange(len(df)), nights)
+
+    out = {STAY_NIGHT_COL: (arrival[rows] + night_offsets(nights)).astype('datetime64[ns]')}
+    for col in keep:
+        out[col] = df[col].take(rows).reset_index(drop=True)
+    per_night = np.maximum(nights, 1)
+    for col in spread:
+        out[col] = (df[col].to_numpy(dtype='float64') / per_night)[rows]
+    return pd.DataFrame(out)
+
+
+def nights_by(df, by=(), arrival_col='도착일', nights_col='los', spread=SPREAD_MEASURES, chunk_rows=CHUNK_ROWS):
+    # (by + 투숙일) 별 합계. 예약을 chunk_rows 건씩 펼쳐 바로 합산하므로 펼친 전체를 한꺼번에 들고 있지 않습니다.
+    keys = list(by) + [STAY_NIGHT_COL]
+    parts = []
+    for start in range(0, len(df), chunk_rows):
+        nights = expand_nights(df.iloc[start:start + chunk_rows], arrival_col, nights_col, spread, by)
+        parts.append(nights.groupby(keys, dropna=False, observed=True, sort=False)[list(spread)].sum())
+    if not parts:
+        return pd.DataFrame(columns=keys + list(spread))
+    out = parts[0] if len(parts) == 1 else pd.concat(parts).groupby(level=keys, dropna=False, observed=True, sort=False).sum()
+    return out.reset_index()
+
+
+def occupancy_by_stay(df, rooms, start=None, end=None, arrival_col='도착일', nights_col='los'):
+    # 투숙일별 판매 객실(RN) / 객실 매출 / 점유율(%) / ADR — 예약 원본에서 바로 계산 (OTB 리포트가 없을 때도 사용 가능)
+    nights = nights_by(df, (), arrival_col, nights_col).sort_values(STAY_NIGHT_COL, ignore_index=True)
+    if start is not None:
+        nights = nights[nights[STAY_NIGHT_COL] >= pd.Timestamp(start)]
+    if end is not None:
+        nights = nights[nights[STAY_NIGHT_COL] < pd.Timestamp(end)]
+    nights = nights.assign(occ=nights['room_nights'] / rooms * 100,
+                           adr=nights['객실매출액'] / nights['room_nights'].where(nights['room_nights'] > 0))
+    return nights.reset_index(drop=True)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# 🚀 Pace / Pick-up 엔진: 여러 OTB 스냅샷(현재 / 1주일 전 / STLY ...)을 일자_dt 기준으로 맞춰 한 번에 비교
+PACE_MEASURES = ['합계_객실', '합계_매출', '개인_객실', '단체_객실']
+
+
+def _indexed(df):
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PACE_MEASURES + ['ADR'], index=pd.DatetimeIndex([], name='일자_dt'), dtype=float)
+    out = df.drop_duplicates('일자_dt').set_index('일자_dt')[PACE_MEASURES].astype(float)
+    out['ADR'] = out['합계_매출'] / out['합계_객실'].where(out['합계_객실'] > 0)
+    return out
+
+
+def build_pace(current, comparisons):
+    # comparisons = {'1주전': snap_df, 'STLY': stly_df, ...}
+    # 결과: 현재 투숙일마다 현재 수치 + 비교 스냅샷별 픽업(객실/매출/ADR 차이) + FIT/Group 픽업
+    cur = _indexed(current)
+    out = cur.copy()
+    out['FIT_비중'] = out['개인_객실'] / out['합계_객실'].where(out['합계_객실'] > 0) * 100
+    for label, frame in comparisons.items():
+        # 현재 투숙일 기준 left join: 비교 스냅샷에 없는 날짜는 NaN 으로 남겨 '비교 불가'를 구분합니다.
+        comp = _indexed(frame).reindex(cur.index)
+        diff = cur[PACE_MEASURES + ['ADR']] - comp[PACE_MEASURES + ['ADR']]
+        out[f'{label}_객실'] = comp['합계_객실']
+        out[f'{label}_매출'] = comp['합계_매출']
+        out[f'{label}_ADR'] = comp['ADR']
+        out[f'픽업_{label}_객실'] = diff['합계_객실']
+        out[f'픽업_{label}_매출'] = diff['합계_매출']
+        out[f'픽업_{label}_ADR'] = diff['ADR']
+        out[f'픽업_{label}_FIT'] = diff['개인_객실']
+        out[f'픽업_{label}_Group'] = diff['단체_객실']
+    return out
+
+
+def summarize_pace(pace_df, labels, by='M'):
+    # 월별 합계 (AI 프롬프트/메트릭 카드용 실제 수치)
+    if pace_df.empty:
+        return pd.DataFrame()
+    cols = ['합계_객실', '합계_매출', '개인_객실', '단체_객실']
+    for label in labels:
+        cols += [c for c in (f'{label}_객실', f'{label}_매출', f'픽업_{label}_객실', f'픽업_{label}_매출',
+                             f'픽업_{label}_FIT', f'픽업_{label}_Group') if c in pace_df.columns]
+    summary = pace_df[cols].groupby(pace_df.index.to_period(by)).sum(min_count=1)
+    summary['ADR'] = summary['합계_매출'] / summary['합계_객실'].where(summary['합계_객실'] > 0)
+    for label in labels:
+        if f'{label}_객실' in summary.columns:
+            summary[f'{label}_ADR'] = summary[f'{label}_매출'] / summary[f'{label}_객실'].where(summary[f'{label}_객실'] > 0)
+    return summary
+
+
+def pace_matrix(history, measure='합계_객실'):
+    # history: snapshot_store.load_history() 결과 (snapshot_date × 일자_dt 롱 포맷)
+    # 반환: (투숙일 × 스냅샷일) 누적 OTB 행렬과, 스냅샷 사이 구간별 픽업 행렬 (np.diff, 루프 없음)
+    if history.empty:
+        empty = pd.DataFrame()
+        return empty, empty
+    stay, stay_idx = np.unique(history['일자_dt'].to_numpy(), return_inverse=True)
+    snaps, snap_idx = np.unique(history['snapshot_date'].to_numpy(), return_inverse=True)
+    grid = np.full((len(stay), len(snaps)), np.nan)
+    grid[stay_idx, snap_idx] = pd.to_numeric(history[measure], errors='coerce').to_numpy(dtype=float)
+    # 투숙일이 이미 지나 이후 스냅샷에 빠진 경우 등은 직전 값으로 이어 붙입니다.
+    otb = pd.DataFrame(grid, index=pd.DatetimeIndex(stay, name='일자_dt'), columns=pd.DatetimeIndex(snaps, name='snapshot_date')).ffill(axis=1)
+    pickup = otb.diff(axis=1).iloc[:, 1:]
+    return otb, pickup
+
+
+def pace_by_days_out(history, measure='합계_객실', max_days_out=90):
+    # 투숙일까지 남은 일수(D-n) 기준 누적 OTB 곡선: 행 = 투숙일, 열 = D-n
+    if history.empty:
+        return pd.DataFrame()
+    days_out = (history['일자_dt'] - history['snapshot_date']).dt.days
+    sub = history.loc[(days_out >= 0) & (days_out <= max_days_out)].assign(D=days_out)
+    return sub.pivot_table(index='일자_dt', columns='D', values=measure, aggfunc='sum').sort_index(axis=1, ascending=False)
+
+
+def describe_pace(summary, labels, periods=4):
+    # 월별 요약을 AI 프롬프트용 불렛 텍스트로 (비교 스냅샷이 없으면 '비교불가'로 명시)
+    if summary.empty:
+        return "- Pace 데이터 없음"
+    lines = []
+    for period, row in summary.head(periods).iterrows():
+        parts = [f"OTB {row['합계_객실']:,.0f}RN / 매출 {row['합계_매출']:,.0f}원 / ADR {row['ADR']:,.0f}원",
+                 f"FIT {row['개인_객실']:,.0f}RN · Group {row['단체_객실']:,.0f}RN"]
+        for label in labels:
+            if pd.notna(row.get(f'픽업_{label}_객실', np.nan)):
+                parts.append(f"{label} 대비 {row[f'픽업_{label}_객실']:+,.0f}RN ({row[f'픽업_{label}_매출']:+,.0f}원, "
+                             f"FIT {row[f'픽업_{label}_FIT']:+,.0f} / Group {row[f'픽업_{label}_Group']:+,.0f})")
+            else:
+                parts.append(f"{label} 비교불가")
+        lines.append(f"- {period}: " + " / ".join(parts))
+    return "\n".join(lines)
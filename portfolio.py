@@ -0,0 +1,138 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from cache import cached_process_data
+from columnar import file_bytes
+from cube import build_cubes
+from metrics import booking_budget_row, budget_targets, otb_budget_rows, period_rows
+
+# 🏨 멀티 프로퍼티: 호텔별 파이프라인(파싱 → 큐브 → KPI 요약)을 호텔마다 별도 프로세스(코어)에서 동시에 돌리고,
+# 포트폴리오 화면은 호텔별로 미리 계산된 요약 표만 합산합니다 (예약 원본을 다시 훑지 않음).
+PERIOD_SUMS = [f'{p}{m}' for p in ('', 'fit_', 'group_') for m in ('total_sales', 'room_sales', 'room_nights', 'bookings')]
+BUDGET_SUMS = ['rev', 'rn', 'capacity', 'target_rev', 'target_rn', 'target_occ_rn']
+
+
+def _payloads(files):
+    files = files if isinstance(files, list) else [files] if files else []
+    return [(f.name, file_bytes(f)) for f in files]
+
+
+def _files(payloads):
+    # 프로세스 경계에서는 (파일명, 바이트)만 주고받고 워커 안에서 다시 파일처럼 감쌉니다.
+    out = []
+    for name, data in payloads:
+        buf = io.BytesIO(data)
+        buf.name = name
+        out.append(buf)
+    return out
+
+
+def latest_booking_date(prod_payloads):
+    # 워커 프로세스: 호텔별 최신 예약일 (파싱 결과는 Parquet 캐시에 남아 이어지는 run_property 는 다시 파싱하지 않음)
+    prod_df = cached_process_data(_files(prod_payloads), is_otb=False)
+    return None if prod_df.empty else prod_df['예약일'].max()
+
+
+def common_as_of(latest_dates):
+    # 호텔마다 내보내기 마지막 날이 다르면 '오늘/이번주'가 서로 다른 날이 되므로, 모두 데이터가 있는 가장 이른 최신일로 맞춥니다.
+    dates = [d for d in latest_dates if d is not None and pd.notna(d)]
+    return min(dates) if dates else None
+
+
+def run_property(property_id, prop, prod_payloads, otb_payloads, as_of=None):
+    # 워커 프로세스: 파싱 결과는 Parquet 캐시에도 남으므로 이후 단일 호텔 화면은 다시 파싱하지 않습니다.
+    errors = []
+    prod_df = cached_process_data(_files(prod_payloads), is_otb=False, errors=errors)
+    otb_df = cached_process_data(_files(otb_payloads), is_otb=True, errors=errors)
+    result = {'property': property_id, 'errors': errors, 'periods': pd.DataFrame(), 'budget': pd.DataFrame()}
+    if prod_df.empty:
+        return result
+
+    latest = prod_df['예약일'].max()
+    as_of = as_of or latest
+    targets = budget_targets(prop['budget'])
+    cubes = build_cubes(prod_df)
+    budget_rows = [booking_budget_row(cubes, as_of, targets, prop['rooms'], open_end=True)]
+    if not otb_df.empty:
+        budget_rows += otb_budget_rows(otb_df, as_of, targets, prop['rooms'])
+    # 대시보드와 같은 기준(기준일까지 열린 구간)으로 요약합니다. latest = 이 호텔 자체의 최신 예약일 (표시용)
+    result['periods'] = pd.DataFrame(period_rows(cubes, as_of, open_end=True)).assign(property=property_id, latest=latest)
+    result['budget'] = pd.DataFrame(budget_rows).assign(property=property_id)
+    return result
+
+
+def _map(fn, args, max_workers=None):
+    # 호텔이 하나면 현재 프로세스에서, 여럿이면 호텔당 프로세스 하나씩
+    if len(args) == 1:
+        return [fn(*args[0])]
+    workers = max_workers or min(len(args), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *zip(*args)))
+
+
+def run_properties(jobs, max_workers=None, as_of=None):
+    # jobs = {property_id: (prop, prod_files, otb_files)} → {property_id: 요약 결과}
+    # as_of 를 주지 않으면 호텔별 최신 예약일 중 가장 이른 날을 모든 호텔의 공통 기준일로 씁니다.
+    if not jobs:
+        return {}
+    args = [(pid, prop, _payloads(prod), _payloads(otb)) for pid, (prop, prod, otb) in jobs.items()]
+    if as_of is None:
+        as_of = common_as_of(_map(latest_booking_date, [(a[2],) for a in args], max_workers))
+    results = _map(run_property, [a + (as_of,) for a in args], max_workers)
+    return {r['property']: r for r in results}
+
+
+def _same_as_of(frame, what):
+    # 기준일이 다른 호텔 요약을 같은 '오늘/이번달' 라벨로 더하면 서로 다른 날짜가 섞이므로 합산을 거부합니다.
+    if frame['as_of'].nunique() > 1:
+        dates = ', '.join(f"{d:%Y-%m-%d}" for d in sorted(frame['as_of'].unique()))
+        raise ValueError(f"기준일이 서로 다른 호텔 {what}은 합산할 수 없습니다 ({dates})")
+
+
+def _ratio(num, den, scale=1):
+    return num / den.where(den > 0) * scale
+
+
+def rollup_periods(periods):
+    # 호텔별 기간 요약 → 포트폴리오 합계 (ADR / 조식 비중 / 평균 LOS·리드타임은 합계·건수로 다시 계산)
+    if periods.empty:
+        return pd.DataFrame()
+    _same_as_of(periods, '기간 요약')
+    weighted = periods.assign(
+        **{f'{p}breakfast_w': periods[f'{p}breakfast_ratio'] * periods[f'{p}bookings'] for p in ('', 'fit_', 'group_')},
+        fit_lead_time_w=periods['fit_lead_time'].fillna(0) * periods['fit_bookings'],
+        fit_los_w=periods['fit_los'].fillna(0) * periods['fit_bookings'])
+    extra = [c for c in weighted.columns if c.endswith('_w')]
+    out = weighted.groupby(['period', 'side', 'label'], sort=False)[PERIOD_SUMS + extra].sum().reset_index()
+    for p in ('', 'fit_', 'group_'):
+        out[f'{p}adr'] = _ratio(out[f'{p}room_sales'], out[f'{p}room_nights']).fillna(0)
+        out[f'{p}breakfast_ratio'] = _ratio(out[f'{p}breakfast_w'], out[f'{p}bookings']).fillna(0)
+    out['fit_lead_time'] = _ratio(out['fit_lead_time_w'], out['fit_bookings'])
+    out['fit_los'] = _ratio(out['fit_los_w'], out['fit_bookings'])
+    out['properties'] = periods.groupby(['period', 'side', 'label'], sort=False)['property'].nunique().to_numpy()
+    return out.drop(columns=extra)
+
+
+def rollup_budget(budget):
+    # 호텔별 버짓 달성 → 포트폴리오 합계 (달성률은 합산한 실적 / 합산한 목표로 다시 계산)
+    if budget.empty:
+        return pd.DataFrame()
+    _same_as_of(budget, '버짓 달성')
+    out = budget.groupby(['source', 'month'], sort=False)[BUDGET_SUMS].sum().reset_index()
+    out['adr'] = _ratio(out['rev'], out['rn']).fillna(0)
+    out['occ'] = _ratio(out['rn'], out['capacity'], 100)
+    out['rev_pct'] = _ratio(out['rev'], out['target_rev'], 100)
+    out['rn_pct'] = _ratio(out['rn'], out['target_rn'], 100)
+    out['adr_pct'] = _ratio(out['adr'], _ratio(out['target_rev'], out['target_rn']), 100)
+    out['occ_pct'] = _ratio(out['rn'], out['target_occ_rn'], 100)
+    return out
+
+
+def rollup_portfolio(results):
+    periods = pd.concat([r['periods'] for r in results.values()], ignore_index=True) if results else pd.DataFrame()
+    budget = pd.concat([r['budget'] for r in results.values()], ignore_index=True) if results else pd.DataFrame()
+    return {'periods': rollup_periods(periods), 'budget': rollup_budget(budget),
+            'by_property': periods, 'budget_by_property': budget}
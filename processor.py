@@ -1,63 +1,285 @@
+import contextvars
+import hashlib
+import importlib.util
+import io
+import os
+import uuid
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timedelta
+from channels import attach_channels
+from classifier import classify
+from columnar import CACHE_DIR, file_bytes, write_parquet
+from telemetry import laps, span
 
-def process_data(uploaded_files, is_otb=False):
+# 파싱/분류 로직이 바뀌면 올려주세요 (파싱 캐시 무효화 기준)
+PROCESSOR_VERSION = '15.5.4'
+
+OTB_COLUMNS = ['일자', '요일', '개인_객실', '개인_비율', '개인_ADR', '개인_매출', '개인_매출비율',
+               '단체_객실', '단체_비율', '단체_ADR', '단체_매출', '단체_매출비율',
+               '내부이용', '무료', '합계_객실', '점유율', '합계_ADR', 'RevPAR', '합계_매출']
+
+PROD_MAPPING = {
+    '예약일자': '예약일', '입실일자': '도착일', '퇴실일자': '출발일',
+    '총금액': '총매출액', '객실료': '객실매출액', '박수': 'los',
+    '객실타입': 'room_type', '국적': 'country', '시장': 'market',
+    '상태': 'status', '거래처': 'account', '객실수': 'rooms',
+    '서비스코드': 'service_code', '요금타입': 'rate_type', '패키지': 'package'
+}
+
+
+# 🚀 메모리 압축: 반복이 많은 문자열은 category, 개수형 숫자는 작은 정수형으로
+CATEGORY_COLUMNS = ['account', 'country', 'market', 'status', 'room_type', 'rate_type', 'market_segment',
+                    'breakfast_status', 'service_code', 'package', 'channel']
+COUNT_COLUMNS = ['rooms', 'los', 'room_nights', 'lead_time']
+CATEGORY_MAX_RATIO = 0.5  # 고유값 비율이 이보다 낮은 문자열 컬럼은 자동으로 category 처리
+
+
+def compact_frame(df):
+    # 금액(총매출액/객실매출액)은 정밀도 때문에 float64 그대로 둡니다.
+    # 압축 전/후 메모리(bytes)는 df.attrs['memory'] 에 남깁니다 (Parquet 캐시에도 함께 저장됨).
+    before = int(df.memory_usage(deep=True).sum())
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if not (pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)) or isinstance(s.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.infer_dtype(s, skipna=True) not in ('string', 'empty'):
+            continue  # 숫자/문자가 섞인 컬럼은 원본 유지
+        if col in CATEGORY_COLUMNS or (len(s) and s.nunique(dropna=True) / len(s) < CATEGORY_MAX_RATIO):
+            df[col] = s.astype('category')
+    for col in COUNT_COLUMNS:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col]
+            if values.notna().all() and (values == values.round()).all():
+                df[col] = pd.to_numeric(values, downcast='integer')
+    after = int(df.memory_usage(deep=True).sum())
+    df.attrs['memory'] = {'before': before, 'after': after}
+    return df
+
+
+# 🚀 엑셀 고속 경로: 가능한 경우 calamine(Rust) 엔진, 필요한 컬럼만 읽고,
+# 한 번 읽은 시트는 Parquet 로 바꿔 두어 같은 파일은 다음부터 엑셀을 아예 열지 않습니다.
+EXCEL_COLUMNAR_DIR = os.path.join(CACHE_DIR, 'excel')
+
+
+def excel_engine():
+    return 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+
+def read_excel_columnar(uploaded_file, skip, usecols=None):
+    # 키 = 파일 내용 + skiprows + 읽는 컬럼 목록 + 처리기 버전 (매핑/파싱이 바뀌면 예전 변환본을 쓰지 않음)
+    data = file_bytes(uploaded_file)
+    cols = 'all' if usecols is None else ','.join(sorted(PROD_MAPPING) + ['고객명'])
+    h = hashlib.sha256(f"{PROCESSOR_VERSION}|skip={skip}|cols={cols}".encode())
+    h.update(data)
+    key = h.hexdigest()
+    path = os.path.join(EXCEL_COLUMNAR_DIR, f"{key}.parquet")
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            pass
+    df = pd.read_excel(io.BytesIO(data), sheet_name=0, skiprows=skip, usecols=usecols, engine=excel_engine())
+    try:
+        write_parquet(df, path)
+    except Exception:
+        pass  # 변환 실패(pyarrow 미설치 등) 시에도 이번 결과는 그대로 사용
+    return df
+
+
+def read_raw(uploaded_file, is_otb=False):
+    skip = 3 if is_otb else 2
+    if uploaded_file.name.endswith('.csv'):
+        return pd.read_csv(uploaded_file, skiprows=skip)
+    return read_excel_columnar(uploaded_file, skip, None if is_otb else _is_wanted_column)
+
+
+def clean_production(df):
+    timer = laps('process.clean_production')
+    df = df.rename(columns=PROD_MAPPING)
+    if '고객명' in df.columns:
+        df = df[df['고객명'].str.contains('합계|총합계') == False]
+    df = df[df['status'].str.strip().isin(['RR', 'CI', 'RC'])]
+    df = df[df['status'] != '취소']
+    timer.lap('filter', rows=len(df))
+
+    df['총매출액'] = pd.to_numeric(df['총매출액'], errors='coerce').fillna(0)
+    df['객실매출액'] = pd.to_numeric(df['객실매출액'], errors='coerce').fillna(0)
+    df['los'] = pd.to_numeric(df['los'], errors='coerce').fillna(0)
+    df['rooms'] = pd.to_numeric(df['rooms'], errors='coerce').fillna(1)
+    df['room_nights'] = df['rooms'] * df['los']
+    df['예약일'] = pd.to_datetime(df['예약일'], errors='coerce')
+    df['도착일'] = pd.to_datetime(df['도착일'], errors='coerce')
+    df['lead_time'] = (df['도착일'] - df['예약일']).dt.days.fillna(0)
+    timer.lap('convert', rows=len(df))
+
+    # 조식/세그먼트 분류 (규칙 테이블: classifier.CLASSIFICATION_RULES)
+    # 채널/거래처 플래그는 거래처 차원(channels)에서 거래처별로 한 번만 판정해 코드로 펼칩니다.
+    with span('process.classify', rows=len(df)):
+        return attach_channels(classify(df))
+
+
+def clean_otb(df):
+    if len(df.columns) < 19:
+        raise ValueError(f"OTB 컬럼 수 부족 ({len(df.columns)}/19)")
+    df = df.iloc[:, :19]
+    df.columns = OTB_COLUMNS
+    df['일자_dt'] = pd.to_datetime(df['일자'], errors='coerce')
+    df = df.dropna(subset=['일자_dt'])
+    for col in ['점유율', '합계_매출', '합계_ADR', '합계_객실', 'RevPAR', '개인_객실', '단체_객실']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+# 🚀 대용량 실적 CSV 스트리밍: 필요한 컬럼만, 정해진 행 수씩 읽어 바로 필터/분류
+STREAM_CHUNK_ROWS = 200_000
+STREAM_THRESHOLD_BYTES = 50 * 1024 ** 2  # 이보다 큰 실적 CSV 는 자동으로 청크 단위 처리
+STREAM_DIR = os.path.join(CACHE_DIR, 'stream')  # 청크를 흘려 쓰는 임시 Parquet 위치
+
+
+def _is_wanted_column(name):
+    name = str(name).strip()
+    return name in PROD_MAPPING or name == '고객명'
+
+
+def iter_production_chunks(source, chunksize=STREAM_CHUNK_ROWS):
+    # 모든 컬럼을 문자열로 읽어 청크마다 dtype 이 달라지지 않게 하고, 숫자/날짜 변환은 clean_production 에서 합니다.
+    reader = pd.read_csv(source, skiprows=2, usecols=_is_wanted_column, dtype=str, chunksize=chunksize)
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip()
+        cleaned = clean_production(chunk)
+        if not cleaned.empty:
+            yield cleaned
+
+
+def _stream_schema(table):
+    # 첫 청크에서 값이 전부 비어 있는 컬럼은 Arrow 가 null 타입으로 잡아 다음 청크 cast 가 실패하므로 문자열로 넓혀 둡니다.
+    import pyarrow as pa
+    fields = [f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema]
+    return pa.schema(fields, metadata=table.schema.metadata)
+
+
+def stream_production_csv(source, out_path, chunksize=STREAM_CHUNK_ROWS):
+    # 처리된 청크를 Parquet row group 으로 바로 써 내려갑니다 → 최대 메모리 = 청크 크기
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    writer, rows = None, 0
+    try:
+        for chunk in iter_production_chunks(source, chunksize):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, _stream_schema(table))
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+        if writer is not None:
+            writer.close()
+            os.replace(tmp, out_path)
+        return rows
+    finally:
+        # 중간에 실패하면 반쯤 쓴 임시 파일을 남기지 않습니다.
+        if writer is not None and writer.is_open:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_streamed(path):
+    # 스트리밍 결과는 필요한 컬럼(usecols)만 담겨 있으므로 그대로 읽되, 반복 문자열은 Arrow 사전(dictionary) → category 로 바로 받습니다.
+    import pyarrow.parquet as pq
+    names = pq.read_schema(path).names
+    table = pq.read_table(path, read_dictionary=[c for c in CATEGORY_COLUMNS if c in names])
+    return table.to_pandas()
+
+
+def _file_size(uploaded_file):
+    size = getattr(uploaded_file, 'size', None)
+    if size is None and hasattr(uploaded_file, 'getbuffer'):
+        size = uploaded_file.getbuffer().nbytes
+    elif size is None and hasattr(uploaded_file, 'fileno'):
+        size = os.fstat(uploaded_file.fileno()).st_size  # 배치(CLI)에서 디스크 파일을 직접 연 경우
+    return size or 0
+
+
+def parse_file(uploaded_file, is_otb=False):
+    if not is_otb and uploaded_file.name.endswith('.csv') and _file_size(uploaded_file) > STREAM_THRESHOLD_BYTES:
+        # 청크를 메모리에 모으지 않고 디스크(Parquet)로 흘려 쓴 뒤 한 번에 읽어 옵니다 → 원본 문자열 청크가 동시에 쌓이지 않음
+        path = os.path.join(STREAM_DIR, f"{uuid.uuid4().hex}.parquet")
+        with span('process.stream_csv', file=uploaded_file.name) as sp:
+            try:
+                rows = stream_production_csv(uploaded_file, path)
+                df = read_streamed(path) if rows else pd.DataFrame()
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+            sp.set(rows=len(df))
+        return df
+    with span('process.read_raw', file=uploaded_file.name) as sp:
+        df = read_raw(uploaded_file, is_otb)
+        sp.set(rows=len(df))
+    df.columns = df.columns.str.strip()
+    if is_otb:
+        with span('process.clean_otb', rows=len(df)):
+            return clean_otb(df)
+    return clean_production(df)
+
+
+def _try_parse(uploaded_file, is_otb):
+    # 기존의 bare except: continue 대신 어떤 파일이 왜 빠졌는지 (결과, 오류) 쌍으로 남깁니다.
+    try:
+        return parse_file(uploaded_file, is_otb), None
+    except Exception as e:
+        return None, f"{getattr(uploaded_file, 'name', uploaded_file)}: {e}"
+
+
+def _try_parse_payload(name, data, is_otb):
+    # 프로세스 풀 작업용: 업로드 객체 대신 (파일명, 바이트)만 넘겨받아 다시 파일처럼 감쌉니다.
+    buf = io.BytesIO(data)
+    buf.name = name
+    return _try_parse(buf, is_otb)
+
+
+def process_data(uploaded_files, is_otb=False, errors=None, max_workers=None, executor=None):
     if not uploaded_files:
         return pd.DataFrame()
-    
+
     files = uploaded_files if isinstance(uploaded_files, list) else [uploaded_files]
-    combined_df = pd.DataFrame()
 
-    for uploaded_file in files:
-        try:
-            if is_otb:
-                df = pd.read_csv(uploaded_file, skiprows=3) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file, skiprows=3)
-            else:
-                df = pd.read_csv(uploaded_file, skiprows=2) if uploaded_file.name.endswith('.csv') else pd.read_excel(uploaded_file, skiprows=2)
-        except:
-            continue
+    # 파일별 파싱은 풀에서 동시에 진행하고, 결과는 업로드 순서대로 모아 마지막에 한 번만 합칩니다.
+    # CSV 는 C 파서가 GIL 을 놓기 때문에 스레드로 충분하지만, openpyxl(xlsx)은 순수 파이썬이라 프로세스로 나눕니다.
+    if executor is None:
+        executor = 'process' if any(not f.name.endswith('.csv') for f in files) else 'thread'
+    workers = max_workers or min(len(files), 8)
 
-        df.columns = df.columns.str.strip()
-
-        if not is_otb:
-            mapping = {
-                '예약일자': '예약일', '입실일자': '도착일', '퇴실일자': '출발일',
-                '총금액': '총매출액', '객실료': '객실매출액', '박수': 'los', 
-                '객실타입': 'room_type', '국적': 'country', '시장': 'market',
-                '상태': 'status', '거래처': 'account', '객실수': 'rooms',
-                '서비스코드': 'service_code', '요금타입': 'rate_type', '패키지': 'package'
-            }
-            df = df.rename(columns=mapping)
-            if '고객명' in df.columns:
-                df = df[df['고객명'].str.contains('합계|총합계') == False]
-            df = df[df['status'].str.strip().isin(['RR', 'CI', 'RC'])]
-            df = df[df['status'] != '취소'] 
-
-            df['총매출액'] = pd.to_numeric(df['총매출액'], errors='coerce').fillna(0)
-            df['객실매출액'] = pd.to_numeric(df['객실매출액'], errors='coerce').fillna(0)
-            df['los'] = pd.to_numeric(df['los'], errors='coerce').fillna(0)
-            df['rooms'] = pd.to_numeric(df['rooms'], errors='coerce').fillna(1)
-            df['room_nights'] = df['rooms'] * df['los']
-            df['예약일'] = pd.to_datetime(df['예약일'], errors='coerce')
-            df['도착일'] = pd.to_datetime(df['도착일'], errors='coerce')
-            df['lead_time'] = (df['도착일'] - df['예약일']).dt.days.fillna(0)
-
-            df['breakfast_status'] = df.apply(lambda r: '조식포함' if any(kw in f"{r.get('service_code','')} {r.get('rate_type','')} {r.get('package','')}".upper() for kw in ['BF', '조식', 'BFR', 'BB', 'B.F']) else '조식불포함', axis=1)
-            df['market_segment'] = df['market'].apply(lambda x: 'Group' if any(k in str(x).upper() for k in ['GRP', 'GROUP', 'DOS', 'BGRP', 'MICE']) else 'FIT')
-            df['is_global_ota'] = df['account'].apply(lambda x: any(g in str(x).upper() for g in ['AGODA', 'EXPEDIA', 'BOOKING', 'TRIP', '아고다', '부킹닷컴', '익스피디아', '트립닷컴']))
-            combined_df = pd.concat([combined_df, df])
+    # ⏱️ 프로세스 풀 워커 안의 구간은 메인 프로세스 패널에 모이지 않으므로 여기서는 파일 전체 파싱 구간으로 잽니다.
+    with span('process.parse', files=len(files), executor='single' if len(files) == 1 else executor, otb=is_otb) as sp:
+        if len(files) == 1:
+            outcomes = [_try_parse(files[0], is_otb)]
+        elif executor == 'process':
+            payloads = [f.getvalue() if hasattr(f, 'getvalue') else f.read() for f in files]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_try_parse_payload, [f.name for f in files], payloads, [is_otb] * len(files)))
         else:
-            if len(df.columns) >= 19:
-                df = df.iloc[:, :19]
-                df.columns = ['일자', '요일', '개인_객실', '개인_비율', '개인_ADR', '개인_매출', '개인_매출비율', 
-                              '단체_객실', '단체_비율', '단체_ADR', '단체_매출', '단체_매출비율', 
-                              '내부이용', '무료', '합계_객실', '점유율', '합계_ADR', 'RevPAR', '합계_매출']
-                df['일자_dt'] = pd.to_datetime(df['일자'], errors='coerce')
-                df = df.dropna(subset=['일자_dt'])
-                for col in ['점유율', '합계_매출', '합계_ADR', '합계_객실', 'RevPAR', '개인_객실', '단체_객실']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-                combined_df = pd.concat([combined_df, df])
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # 작업마다 현재 컨텍스트를 복사해 넘겨야 파일별 구간이 이번 실행의 계측에 함께 잡힙니다.
+                futures = [pool.submit(contextvars.copy_context().run, _try_parse, f, is_otb) for f in files]
+                outcomes = [f.result() for f in futures]
+        sp.set(rows=sum(len(df) for df, _ in outcomes if df is not None))
+
+    if errors is not None:
+        errors.extend(err for _, err in outcomes if err)
+    frames = [df for df, _ in outcomes if df is not None]
 
+    with span('process.concat', files=len(frames)) as sp:
+        combined_df = pd.concat(frames) if frames else pd.DataFrame()
+        sp.set(rows=len(combined_df))
     if not combined_df.empty and is_otb:
         combined_df = combined_df.sort_values('일자_dt').drop_duplicates('일자_dt')
+    elif not combined_df.empty:
+        # 파일별 category 가 서로 달라지지 않도록 합친 뒤에 한 번만 압축합니다.
+        with span('process.compact', rows=len(combined_df)):
+            combined_df = compact_frame(combined_df)
     return combined_df
@@ -0,0 +1,351 @@
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from columnar import write_parquet
+from processor import PROD_MAPPING, PROCESSOR_VERSION, _is_wanted_column, clean_production, compact_frame, read_excel_columnar
+from snapshot_store import STORE_DIR
+from telemetry import span
+
+# 📚 실적 누적 창고: 매일 올리는 실적(Production) 내보내기를 예약 단위로 합쳐 쌓아 두는 로컬 컬럼형 저장소
+# 구조: <STORE_DIR>/production/
+#   index.parquet         예약 키 → 원본 행 해시 / 예약일 / 파티션 (변경 감지용, 숫자 4컬럼)
+#   part=YYYY-MM.parquet  처리(clean_production)가 끝난 예약 행, 예약일 월별 파티션
+#   raw=YYYY-MM.parquet   같은 예약의 내보내기 원본 컬럼 (처리기 버전이 바뀌면 이것으로 다시 처리 = 이력 보존)
+# → 새 내보내기는 원본 해시만 비교하고, 새로 생기거나 바뀐 예약만 파싱/분류해 해당 월 파티션만 다시 씁니다.
+#   (상태가 RR/CI/RC 를 벗어나면 삭제, 내보내기 예약일 기간 안에서 사라진 예약도 삭제)
+PRODUCTION_SUBDIR = 'production'
+ACTIVE_STATUS = ['RR', 'CI', 'RC']
+# 예약번호 컬럼이 있으면 그것을 키로, 없으면 고객명/예약일/입실일/거래처/객실타입 조합 + 같은 조합 내 순번
+KEY_COLUMNS = ['예약번호', '예약 번호', 'RSVN NO', 'Confirmation No', '확인번호']
+IDENTITY_COLUMNS = ['고객명', '예약일', '도착일', 'account', 'room_type']
+# 같은 조합이 여러 줄일 때 순번을 매기는 기준 (파일 안 행 순서나 함께 들어온 취소 행과 무관하게 같은 순번)
+TIEBREAK_COLUMNS = ['출발일', 'rooms', 'los', '객실매출액', '총매출액']
+MAX_LOADED = 2
+# 해시 전에 형식을 맞추는 컬럼: CSV '2025-01-01' / 엑셀 '2025-01-01 00:00:00', '150000' / '150000.0' 이 같은 값이 되도록
+DATE_COLUMNS = ['예약일', '도착일', '출발일']
+NUMBER_COLUMNS = ['총매출액', '객실매출액', 'los', 'rooms']
+STORE_FORMAT = 3  # 키/해시 정의가 바뀌면 올립니다 (이때만 이관 시 키를 다시 계산)
+
+_loaded = OrderedDict()
+
+
+class StoreVersionError(Exception):
+    pass
+
+
+def _root(store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, PRODUCTION_SUBDIR)
+
+
+def _store_path(store_dir=None, name=''):
+    return os.path.join(_root(store_dir), name)
+
+
+def _part_path(part, store_dir=None):
+    return _store_path(store_dir, f"part={part}.parquet")
+
+
+def _file(root, kind, part):
+    # kind = 'part' (처리 결과) / 'raw' (내보내기 원본 컬럼, 처리기 버전이 바뀌면 여기서 다시 처리)
+    return os.path.join(root, f"{kind}={part}.parquet")
+
+
+def _is_store_column(name):
+    return _is_wanted_column(name) or str(name).strip() in KEY_COLUMNS
+
+
+def read_export(uploaded_file):
+    # 해시가 파일 형식과 무관하게 안정적이도록 모든 값을 문자열(object)로 읽습니다 (숫자/날짜 변환은 clean_production)
+    # Arrow 문자열(dtype=str)보다 object 가 읽기·해시 모두 약 2배 빠릅니다.
+    uploaded_file.seek(0)  # 미리보기 후 같은 업로드를 다시 읽을 수 있도록
+    if uploaded_file.name.endswith('.csv'):
+        df = pd.read_csv(uploaded_file, skiprows=2, usecols=_is_store_column, dtype=object)
+    else:
+        df = read_excel_columnar(uploaded_file, 2)
+        df = df[[c for c in df.columns if _is_store_column(c)]]
+        df = df.apply(lambda s: s.where(s.isna(), s.astype(str)).astype(object))
+    df.columns = df.columns.str.strip()
+    df = df.rename(columns=PROD_MAPPING)
+    if '고객명' in df.columns:
+        df = df[~_on_uniques(df['고객명'], lambda u: u.fillna('').str.contains('합계|총합계'))]
+    return normalize_export(df.reset_index(drop=True))
+
+
+def _date_text(parsed):
+    midnight = parsed == parsed.dt.normalize()
+    return parsed.dt.strftime('%Y-%m-%d').where(midnight, parsed.dt.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def _number_text(parsed):
+    # 정수면 '150000', 아니면 repr ('1500.5') — 금액은 고유값이 많아 배열 단위로 변환합니다.
+    values = parsed.to_numpy(dtype='float64')
+    whole = np.isfinite(values) & (values == np.floor(values))
+    text = pd.Series(np.where(whole, values, 0).astype('int64'), index=parsed.index).astype(str).astype(object)
+    text[~whole] = [repr(float(v)) for v in values[~whole]]
+    return text
+
+
+def _canonical(series, parse, fmt):
+    # 고유값만 변환해 표준 문자열로 (변환 안 되는 값은 원래 문자열 그대로 → clean_production 결과도 그대로)
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = parse(uniques)
+    ok = parsed.notna().to_numpy()
+    text = uniques.to_numpy(dtype=object).copy()
+    text[ok] = fmt(parsed[ok]).to_numpy(dtype=object)
+    return pd.Series(np.append(text, np.nan).take(codes), index=series.index)  # 결측(-1) → NaN
+
+
+def normalize_export(df):
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = _canonical(df[col], lambda u: pd.to_datetime(u, errors='coerce', format='mixed'), _date_text)
+    for col in NUMBER_COLUMNS:
+        if col in df.columns:
+            df[col] = _canonical(df[col], lambda u: pd.to_numeric(u, errors='coerce'), _number_text)
+    return df
+
+
+def _on_uniques(series, fn):
+    # 문자열 판정은 고유값에만 한 번씩 하고 코드로 펼칩니다 (classifier.match_keywords 와 같은 방식)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return fn(pd.Series(uniques, dtype=object)).to_numpy(dtype=bool)[codes]
+
+
+def reservation_keys(df):
+    key_col = next((c for c in KEY_COLUMNS if c in df.columns), None)
+    cols = [key_col] if key_col else [c for c in IDENTITY_COLUMNS if c in df.columns]
+    base = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    # 같은 조합이 여러 줄(객실 여러 개 / 동명이인)이면 객실/퇴실일/금액 순으로 순번을 매겨 구분합니다 (행 순서와 무관).
+    ties = [c for c in TIEBREAK_COLUMNS if c in df.columns] if not key_col else []
+    tiebreak = pd.util.hash_pandas_object(df[ties], index=False).to_numpy() if ties else np.zeros(len(df), dtype='uint64')
+    order = np.lexsort((tiebreak, base))
+    occurrence = np.empty(len(df), dtype='int64')
+    occurrence[order] = pd.Series(base[order]).groupby(base[order]).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame({'k': base, 'n': occurrence}), index=False).to_numpy()
+
+
+def _dates(series):
+    # 예약일은 고유값이 적으므로 고유값만 한 번씩 변환한 뒤 펼칩니다.
+    codes, uniques = pd.factorize(series)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce')
+    return pd.Series(parsed.reindex(codes).to_numpy(), index=series.index)  # 결측(-1)은 NaT
+
+
+def _partition(booked):
+    # 'YYYY-MM' 파티션 이름 (strftime 을 행마다 돌리지 않고 연월 고유값만 문자열로)
+    codes, uniques = pd.factorize(booked.dt.year * 100 + booked.dt.month)
+    names = [f"{int(v) // 100:04d}-{int(v) % 100:02d}" for v in uniques] + ['unknown']
+    return np.array(names, dtype=object)[codes]
+
+
+def _empty_index():
+    return pd.DataFrame({'_key': pd.Series(dtype='uint64'), '_hash': pd.Series(dtype='uint64'),
+                         '예약일': pd.Series(dtype='datetime64[ns]'), '_part': pd.Series(dtype=object)})
+
+
+def _read_manifest(root):
+    path = os.path.join(root, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(root, manifest):
+    path = os.path.join(root, 'manifest.json')
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _load_index(root):
+    path = os.path.join(root, 'index.parquet')
+    return pd.read_parquet(path) if os.path.exists(path) else _empty_index()
+
+
+def load_index(store_dir=None):
+    return _load_index(_root(store_dir))
+
+
+def _list(root, kind='part'):
+    if not os.path.isdir(root):
+        return []
+    prefix = f"{kind}="
+    return sorted(n[len(prefix):-len('.parquet')] for n in os.listdir(root) if n.startswith(prefix) and n.endswith('.parquet'))
+
+
+def list_partitions(store_dir=None):
+    return _list(_root(store_dir))
+
+
+def _plan(raw, index, window_deletes):
+    # 창고 인덱스와 비교한 변경 계획 (쓰기 없음): 미리보기와 실제 적재가 같은 숫자를 냅니다.
+    active = _on_uniques(raw['status'], lambda u: u.fillna('').str.strip().isin(ACTIVE_STATUS))
+    pos = pd.Index(index['_key']).get_indexer(raw['_key'])
+    in_store = pos >= 0
+    stored_hash = np.append(index['_hash'].to_numpy(dtype='uint64'), np.uint64(0))[pos]  # pos=-1 → 자리표시 0
+    same = in_store & (stored_hash == raw['_hash'].to_numpy())
+
+    removed = set(raw['_key'][in_store & ~same])
+    missing, lo, hi = set(), None, None
+    if window_deletes and not index.empty:
+        # 내보내기 = 예약일 기간 전체 목록이므로, 그 기간 안인데 이번 파일에 없는 예약은 취소/삭제로 봅니다.
+        booked = _dates(raw['예약일'])
+        lo, hi = booked.min(), booked.max()
+        if pd.notna(lo):
+            in_window = index['예약일'].between(lo, hi) & ~index['_key'].isin(raw['_key'])
+            missing = set(index['_key'][in_window])
+
+    updated = int((in_store & ~same & active).sum())
+    stats = {'rows': len(raw), 'new': int((~in_store & active).sum()), 'updated': updated,
+             'deleted': len(removed) + len(missing) - updated, 'missing': len(missing), 'unchanged': int(same.sum()),
+             'window': (lo, hi)}
+    return active & ~same, removed | missing, stats
+
+
+def _merge(raw, root, window_deletes):
+    # raw(_key/_hash 포함 원본 컬럼)를 root 창고에 합칩니다: 바뀌거나 새로 생긴 예약만 처리해 해당 월 파티션(처리본 + 원본)만 다시 씁니다.
+    index = _load_index(root)
+    upsert, removed, stats = _plan(raw, index, window_deletes)
+
+    cleaned = clean_production(raw[upsert].drop(columns='_hash'))
+    # 금액은 process_data 결과와 같이 float64 로 고정 (파티션마다 int/float 가 갈리지 않도록)
+    cleaned = cleaned.astype({'총매출액': 'float64', '객실매출액': 'float64'})
+    cleaned['_part'] = _partition(cleaned['예약일'])
+    hashes = raw.set_index('_key')['_hash']
+    added = pd.DataFrame({'_key': cleaned['_key'].to_numpy(dtype='uint64'),
+                          '_hash': hashes.loc[cleaned['_key']].to_numpy(dtype='uint64'),
+                          '예약일': cleaned['예약일'].to_numpy(), '_part': cleaned['_part'].to_numpy()})
+    # 원본 행도 같은 월 파티션에 보관합니다 (처리기 버전이 바뀌면 이것으로 다시 처리 → 이력 보존)
+    originals = raw[raw['_key'].isin(added['_key'])]
+    originals = originals.assign(_part=pd.Series(added['_part'].to_numpy(), index=added['_key']).loc[originals['_key']].to_numpy())
+
+    old = index[index['_key'].isin(removed)]
+    affected = sorted(set(old['_part']) | set(added['_part']))
+    for part in affected:
+        for kind, new_rows in (('part', cleaned), ('raw', originals)):
+            path = _file(root, kind, part)
+            rows = pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame()
+            if not rows.empty:
+                rows = rows[~rows['_key'].isin(removed)]
+            rows = pd.concat([rows, new_rows[new_rows['_part'] == part].drop(columns='_part')], ignore_index=True)
+            if rows.empty and os.path.exists(path):
+                os.remove(path)
+            elif not rows.empty:
+                write_parquet(rows, path, index=False)
+
+    index = pd.concat([index[~index['_key'].isin(removed)], added], ignore_index=True)
+    write_parquet(index, os.path.join(root, 'index.parquet'), index=False)
+    _write_manifest(root, {'processor_version': PROCESSOR_VERSION, 'format': STORE_FORMAT, 'reservations': len(index),
+                           'key': next((c for c in KEY_COLUMNS if c in raw.columns), '+'.join(IDENTITY_COLUMNS))})
+    return {**stats, 'partitions': len(affected)}
+
+
+def _with_keys(raw):
+    raw['_key'] = reservation_keys(raw)
+    raw['_hash'] = pd.util.hash_pandas_object(raw.drop(columns='_key'), index=False).to_numpy()
+    return raw
+
+
+def migrate_production(store_dir=None):
+    # 처리기 버전이 바뀌면 보관한 원본(raw=*.parquet)을 새 처리기로 다시 처리해 창고를 통째로 새로 만듭니다.
+    # 임시 폴더에 다 만든 뒤 교체하므로 중간에 실패해도 기존 창고는 그대로입니다. 절대 이력을 지우고 새로 시작하지 않습니다.
+    root = _root(store_dir)
+    parts, manifest = _list(root), _read_manifest(root)
+    if not parts or (manifest.get('processor_version'), manifest.get('format')) == (PROCESSOR_VERSION, STORE_FORMAT):
+        return False
+    raw_parts = _list(root, 'raw')
+    if set(raw_parts) != set(parts):
+        raise StoreVersionError(
+            f"실적 누적 창고가 이전 처리기 버전({manifest.get('processor_version')})으로 만들어졌고 원본이 보관돼 있지 않아 "
+            f"새 버전({PROCESSOR_VERSION})으로 다시 처리할 수 없습니다. 기존 창고는 그대로 두었습니다 — "
+            "과거 내보내기를 다시 올려 창고를 새로 만들려면 '창고 다시 만들기'를 직접 실행해 주세요.")
+    with span('store.migrate', partitions=len(parts)) as sp:
+        staging, retired = f"{root}.migrating", f"{root}.retired"
+        for folder in (staging, retired):
+            shutil.rmtree(folder, ignore_errors=True)
+        os.makedirs(staging)
+        rows = 0
+        same_format = manifest.get('format') == STORE_FORMAT
+        for part in raw_parts:
+            raw = pd.read_parquet(_file(root, 'raw', part))
+            if same_format:
+                # 처리기만 바뀜: 키/해시는 적재 당시 값 그대로 (보관 원본엔 활성 예약만 있어 다시 계산하면 중복 순번이 바뀜)
+                rows += _merge(raw, staging, window_deletes=False)['rows']
+            else:
+                # 키/해시 정의가 바뀜: 지금 정의로 다시 계산해야 다음 내보내기와 비교됩니다.
+                raw = normalize_export(raw.drop(columns=['_key', '_hash']).astype(object))
+                rows += _merge(_with_keys(raw), staging, window_deletes=False)['rows']
+        os.replace(root, retired)
+        os.replace(staging, root)
+        shutil.rmtree(retired, ignore_errors=True)
+        _loaded.clear()
+        sp.set(rows=rows)
+    return True
+
+
+def preview_production(uploaded_file, store_dir=None, window_deletes=False):
+    # 적재하면 바뀔 건수만 계산합니다 (쓰기 없음) → ingest_production 과 같은 통계, 'partitions' 제외
+    with span('store.preview', file=uploaded_file.name):
+        return _plan(_with_keys(read_export(uploaded_file)), load_index(store_dir), window_deletes)[2]
+
+
+def ingest_production(uploaded_file, store_dir=None, window_deletes=False):
+    # 내보내기 한 개를 창고에 합칩니다 → {'rows', 'new', 'updated', 'deleted', 'missing', 'unchanged', 'window', 'partitions'}
+    # window_deletes=True 면 내보내기 예약일 기간 안인데 파일에 없는 기존 예약(missing)도 지웁니다 — preview_production 으로 먼저 확인하세요.
+    with span('store.ingest', file=uploaded_file.name) as sp:
+        raw = _with_keys(read_export(uploaded_file))
+        migrate_production(store_dir)
+        root = _root(store_dir)
+        os.makedirs(root, exist_ok=True)
+        stats = _merge(raw, root, window_deletes)
+        sp.set(rows=stats['rows'], **{k: v for k, v in stats.items() if k not in ('rows', 'window')})
+    return stats
+
+
+def store_version(store_dir=None):
+    # 창고가 바뀔 때마다 달라지는 값 (적재 결과 캐시 키)
+    path = _store_path(store_dir, 'index.parquet')
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+
+def load_production(store_dir=None, start=None, end=None):
+    # [start, end) 예약일 구간의 누적 실적을 process_data 와 같은 형태(압축 포함)로 돌려줍니다.
+    # 월 파티션 이름으로 먼저 거르고, 파일 안은 Parquet 필터로 필요한 행만 읽습니다.
+    version = store_version(store_dir)
+    if version is None:
+        return pd.DataFrame()
+    key = (store_dir, version, start, end)
+    if key in _loaded:
+        _loaded.move_to_end(key)
+        return _loaded[key].copy(deep=False)
+
+    with span('store.load') as sp:
+        lo = None if start is None else f"{pd.Timestamp(start):%Y-%m}"
+        hi = None if end is None else f"{pd.Timestamp(end):%Y-%m}"
+        filters = [f for f in (None if start is None else ('예약일', '>=', pd.Timestamp(start)),
+                               None if end is None else ('예약일', '<', pd.Timestamp(end))) if f] or None
+        frames = [pd.read_parquet(_part_path(p, store_dir), filters=filters) for p in list_partitions(store_dir)
+                  if p == 'unknown' and start is None or p != 'unknown' and (lo is None or p >= lo) and (hi is None or p <= hi)]
+        frames = [f for f in frames if not f.empty]
+        df = compact_frame(pd.concat(frames, ignore_index=True).drop(columns='_key')) if frames else pd.DataFrame()
+        sp.set(rows=len(df), partitions=len(frames))
+
+    _loaded[key] = df
+    while len(_loaded) > MAX_LOADED:
+        _loaded.popitem(last=False)
+    return df.copy(deep=False)
+
+
+def clear_production(store_dir=None):
+    folder = _store_path(store_dir)
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+    _loaded.clear()
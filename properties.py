@@ -0,0 +1,33 @@
+import json
+import os
+
+from metrics import BUDGET_DATA, TOTAL_ROOMS
+from snapshot_store import STORE_DIR
+
+# 🏨 프로퍼티(호텔) 레지스트리: 호텔별 객실 수(인벤토리)와 12개월 버짓
+# properties.json 예시 (없으면 엠버퓨어힐 130실 단일 모드):
+# {"purehill": {"name": "엠버퓨어힐", "rooms": 130},
+#  "seaside": {"name": "시사이드", "rooms": 210, "budget": {"1": {"rev": 612000000, "rn": 3900, "adr": 156923, "occ": 60.0}, ...}}}
+# budget 에 없는 달은 metrics.BUDGET_DATA 기본값을 씁니다.
+PROPERTIES_FILE = os.environ.get('PMS_PROPERTIES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'properties.json'))
+DEFAULT_PROPERTY = 'purehill'
+PORTFOLIO = '__portfolio__'
+
+
+def load_properties(path=None):
+    path = path or PROPERTIES_FILE
+    if not os.path.exists(path):
+        return {DEFAULT_PROPERTY: {'name': '엠버퓨어힐', 'rooms': TOTAL_ROOMS, 'budget': BUDGET_DATA}}
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    props = {}
+    for property_id, conf in raw.items():
+        budget = {int(m): b for m, b in conf.get('budget', {}).items()}
+        props[property_id] = {'name': conf.get('name', property_id), 'rooms': int(conf.get('rooms', TOTAL_ROOMS)),
+                              'budget': {**BUDGET_DATA, **budget}}
+    return props
+
+
+def property_store_dir(property_id):
+    # 스냅샷 창고도 호텔별로 분리: 기본 프로퍼티는 기존 위치 그대로, 나머지는 <STORE_DIR>/properties/<id>
+    return None if property_id == DEFAULT_PROPERTY else os.path.join(STORE_DIR, 'properties', property_id)
@@ -0,0 +1,101 @@
+import bisect
+import os
+
+import pandas as pd
+
+from columnar import write_parquet
+
+# 🚀 OTB 스냅샷 창고: 업로드된 OTB 를 '기준일(as-of)' 스냅샷으로 차곡차곡 쌓아 두는 로컬 컬럼형 저장소
+# 구조: <STORE_DIR>/otb_snapshots/<YYYY-MM-DD>.parquet  (파일 = 스냅샷 일자, 파일 안은 일자_dt 정렬)
+# → (snapshot_date, stay_date) 조회 = 파일명 이진탐색 + Parquet 통계 기반 일자 필터
+STORE_DIR = os.environ.get('PMS_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.pms_store'))
+SNAPSHOT_SUBDIR = 'otb_snapshots'
+STLY_OFFSET_DAYS = 364  # 요일을 맞춘 전년 동기 (52주 전)
+
+
+def _snapshot_dir(store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, SNAPSHOT_SUBDIR)
+
+
+def _snapshot_path(snapshot_date, store_dir=None):
+    return os.path.join(_snapshot_dir(store_dir), f"{pd.Timestamp(snapshot_date):%Y-%m-%d}.parquet")
+
+
+def save_snapshot(otb_df, snapshot_date, store_dir=None):
+    # 같은 기준일로 다시 올리면 최신 업로드로 교체됩니다 (다른 날짜 스냅샷은 건드리지 않음 = 증분 적재)
+    snap = otb_df[otb_df['일자_dt'].notna()].sort_values('일자_dt').drop_duplicates('일자_dt')
+    snap = snap.assign(snapshot_date=pd.Timestamp(snapshot_date).normalize()).reset_index(drop=True)
+    return write_parquet(snap, _snapshot_path(snapshot_date, store_dir), index=False, row_group_size=64)
+
+
+def list_snapshots(store_dir=None):
+    folder = _snapshot_dir(store_dir)
+    if not os.path.isdir(folder):
+        return []
+    names = sorted(n for n in os.listdir(folder) if n.endswith('.parquet'))
+    return [pd.Timestamp(n[:-len('.parquet')]) for n in names]
+
+
+def nearest_snapshot(target_date, tolerance_days=3, store_dir=None, snapshots=None):
+    # target_date 당일 또는 그 이전 가장 가까운 스냅샷 (tolerance_days 이내), 없으면 None
+    snapshots = list_snapshots(store_dir) if snapshots is None else snapshots
+    target = pd.Timestamp(target_date).normalize()
+    pos = bisect.bisect_right(snapshots, target)
+    if pos == 0:
+        return None
+    found = snapshots[pos - 1]
+    return found if (target - found).days <= tolerance_days else None
+
+
+def _stay_filters(stay_start, stay_end):
+    filters = []
+    if stay_start is not None:
+        filters.append(('일자_dt', '>=', pd.Timestamp(stay_start)))
+    if stay_end is not None:
+        filters.append(('일자_dt', '<', pd.Timestamp(stay_end)))
+    return filters or None
+
+
+def load_snapshot(snapshot_date, stay_start=None, stay_end=None, store_dir=None):
+    # [stay_start, stay_end) 투숙일 구간만 읽습니다 (Parquet 필터 → 필요한 row group 만 스캔)
+    path = _snapshot_path(snapshot_date, store_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_parquet(path, filters=_stay_filters(stay_start, stay_end))
+
+
+def lookup_days_ago(as_of, days, stay_start=None, stay_end=None, tolerance_days=3, store_dir=None):
+    # 'N일 전' 스냅샷에서 같은 투숙일 구간을 조회 (예: 1주일 전 = days=7)
+    snap_date = nearest_snapshot(pd.Timestamp(as_of) - pd.Timedelta(days=days), tolerance_days, store_dir)
+    if snap_date is None:
+        return pd.DataFrame()
+    return load_snapshot(snap_date, stay_start, stay_end, store_dir)
+
+
+def lookup_stly(as_of, stay_start=None, stay_end=None, tolerance_days=3, store_dir=None):
+    # 전년 동기(STLY): 364일 전 스냅샷에서 364일 전 투숙일 구간을 읽고,
+    # 일자_dt 를 올해 날짜로 옮겨 현재 OTB 와 같은 키로 비교할 수 있게 합니다 (원래 날짜는 원_일자_dt)
+    offset = pd.Timedelta(days=STLY_OFFSET_DAYS)
+    snap_date = nearest_snapshot(pd.Timestamp(as_of) - offset, tolerance_days, store_dir)
+    if snap_date is None:
+        return pd.DataFrame()
+    df = load_snapshot(snap_date,
+                       None if stay_start is None else pd.Timestamp(stay_start) - offset,
+                       None if stay_end is None else pd.Timestamp(stay_end) - offset,
+                       store_dir)
+    df['원_일자_dt'] = df['일자_dt']
+    df['일자_dt'] = df['일자_dt'] + offset
+    return df
+
+
+def load_history(snapshot_start, snapshot_end, stay_start=None, stay_end=None, columns=None, store_dir=None):
+    # [snapshot_start, snapshot_end] 기간의 모든 스냅샷을 한 번에 읽어 (snapshot_date, 일자_dt) 롱 포맷으로 반환
+    import pyarrow.parquet as pq
+
+    lo, hi = pd.Timestamp(snapshot_start).normalize(), pd.Timestamp(snapshot_end).normalize()
+    paths = [_snapshot_path(d, store_dir) for d in list_snapshots(store_dir) if lo <= d <= hi]
+    if not paths:
+        return pd.DataFrame()
+    # 여러 파일을 pyarrow 가 멀티스레드로 스캔합니다.
+    dataset = pq.ParquetDataset(paths, filters=_stay_filters(stay_start, stay_end))
+    return dataset.read(columns=columns, use_threads=True).to_pandas()
@@ -0,0 +1,136 @@
+import glob
+import importlib
+import importlib.util
+import os
+import re
+
+import pandas as pd
+
+from production_store import PRODUCTION_SUBDIR
+from snapshot_store import SNAPSHOT_SUBDIR, STLY_OFFSET_DAYS, STORE_DIR
+from telemetry import span
+
+# 🗄️ SQL 분석 엔진: 로컬 창고(Parquet)에 쌓인 처리 결과를 DuckDB(내장 컬럼형 SQL)로 바로 조회합니다.
+# 테이블(뷰) — 파일을 pandas 로 올리지 않고 Parquet 를 직접 스캔:
+#   production     실적 누적 창고 (production_store, 예약일 월별 파티션 part=YYYY-MM.parquet)
+#   otb_snapshots  OTB 스냅샷 창고 (snapshot_store, 기준일별 파일, snapshot_date 컬럼 포함)
+# 날짜 조건(WHERE "예약일" >= ...)은 Parquet row group 통계로 내려보내(pushdown) 필요한 구간만 읽고, 스캔은 멀티스레드.
+# DuckDB 는 선택 설치입니다 (pip install duckdb) — 없으면 sql_available() 이 False 이고 화면은 안내만 표시합니다.
+# 화면에서 SQL 을 직접 받으므로 연결은 창고 폴더 읽기만 허용하고(외부 파일/네트워크/확장/설정 변경 차단),
+# 실행은 SELECT/WITH 조회문 한 개만 받습니다.
+MAX_RESULT_ROWS = 10_000
+SOURCES = {
+    'production': (PRODUCTION_SUBDIR, 'part=*.parquet'),
+    'otb_snapshots': (SNAPSHOT_SUBDIR, '*.parquet'),
+}
+
+# 저장된 분석 쿼리: $start / $end (조회 구간), $as_of (기준일) 파라미터는 화면에서 채워 넣습니다.
+# STLY 페이스: 올해 [start, end) 도착분의 기준일까지 예약 vs 364일 전 같은 구간·같은 시점.
+# 구간이 364일보다 길면 STLY 구간을 올해 구간 시작 전까지로 잘라 두 조건이 겹치지 않게 합니다 (한 행이 양쪽에 잡히지 않도록).
+_CURRENT = '"도착일" >= $start AND "도착일" < $end AND "예약일" <= $as_of'
+_STLY = (f'"도착일" >= $start - INTERVAL {STLY_OFFSET_DAYS} DAY AND "도착일" < LEAST($end - INTERVAL {STLY_OFFSET_DAYS} DAY, $start) '
+         f'AND "예약일" <= $as_of - INTERVAL {STLY_OFFSET_DAYS} DAY')
+SAVED_QUERIES = {
+    '국적 × 리드타임 구간별 ADR': """
+SELECT country AS 국적,
+       CASE WHEN lead_time < 7 THEN '0-6일' WHEN lead_time < 30 THEN '7-29일'
+            WHEN lead_time < 90 THEN '30-89일' ELSE '90일+' END AS 리드타임,
+       COUNT(*) AS 예약수, SUM(room_nights) AS RN,
+       SUM("객실매출액") / NULLIF(SUM(room_nights), 0) AS ADR
+FROM production
+WHERE "예약일" >= $start AND "예약일" < $end
+GROUP BY ALL
+ORDER BY 국적, MIN(lead_time)
+""",
+    '객실타입별 STLY 페이스 (도착월)': f"""
+SELECT room_type AS 객실타입,
+       SUM(room_nights) FILTER (WHERE {_CURRENT}) AS 현재_RN,
+       SUM(room_nights) FILTER (WHERE {_STLY}) AS STLY_RN,
+       SUM("객실매출액") FILTER (WHERE {_CURRENT}) AS 현재_매출,
+       SUM("객실매출액") FILTER (WHERE {_STLY}) AS STLY_매출
+FROM production
+WHERE ({_CURRENT}) OR ({_STLY})
+GROUP BY ALL
+ORDER BY 현재_RN DESC NULLS LAST
+""",
+    '거래처 × 예약월 실적': """
+SELECT date_trunc('month', "예약일") AS 예약월, account AS 거래처,
+       COUNT(*) AS 예약수, SUM(room_nights) AS RN, SUM("총매출액") AS 총매출,
+       SUM("객실매출액") / NULLIF(SUM(room_nights), 0) AS ADR
+FROM production
+WHERE "예약일" >= $start AND "예약일" < $end
+GROUP BY ALL
+ORDER BY 예약월, RN DESC
+""",
+    '스냅샷별 투숙월 OTB 추이': """
+SELECT snapshot_date AS 기준일, date_trunc('month', "일자_dt") AS 투숙월,
+       SUM("합계_객실") AS OTB_RN, SUM("합계_매출") AS OTB_매출,
+       SUM("합계_매출") / NULLIF(SUM("합계_객실"), 0) AS ADR
+FROM otb_snapshots
+WHERE "일자_dt" >= $start AND "일자_dt" < $end
+GROUP BY ALL
+ORDER BY 투숙월, 기준일
+""",
+}
+_PARAM = re.compile(r'\$([A-Za-z_]\w*)')
+_READ_ONLY = re.compile(r'\s*(?:(?:--[^\n]*(?:\n|$)|/\*.*?\*/)\s*)*\(*\s*(?:SELECT|WITH)\b', re.IGNORECASE | re.DOTALL)
+
+
+def sql_available():
+    return importlib.util.find_spec('duckdb') is not None
+
+
+def _source_glob(name, store_dir=None):
+    subdir, pattern = SOURCES[name]
+    return os.path.join(os.path.abspath(store_dir or STORE_DIR), subdir, pattern)
+
+
+def available_tables(store_dir=None):
+    # 파일이 하나라도 쌓인 소스만 테이블로 노출합니다.
+    return [name for name in SOURCES if glob.glob(_source_glob(name, store_dir))]
+
+
+def _quote(text):
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def connect(store_dir=None, threads=None):
+    # 메모리 전용 연결 + 창고 Parquet 뷰 (데이터는 쿼리할 때 필요한 컬럼/row group 만 읽힘)
+    duckdb = importlib.import_module('duckdb')
+    con = duckdb.connect(config={'threads': threads or os.cpu_count() or 1})
+    tables = available_tables(store_dir)
+    for name in tables:
+        con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet({_quote(_source_glob(name, store_dir))}, union_by_name = true)")
+    # 🔒 뷰를 만든 뒤 잠급니다: 창고 폴더 밖 파일 읽기/쓰기(COPY TO, read_csv 등)·확장 설치·ATTACH 불가, 설정도 되돌릴 수 없음
+    folders = [os.path.join(os.path.dirname(_source_glob(name, store_dir)), '') for name in tables]
+    con.execute(f"SET allowed_directories = [{', '.join(_quote(f) for f in folders)}]")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    return con
+
+
+def check_query(con, sql):
+    # SELECT/WITH 조회문 한 개만 (DuckDB 파서로 문장 수/종류를 확인 — PRAGMA 처럼 SELECT 로 바뀌는 문장은 첫 단어로 거름)
+    duckdb = importlib.import_module('duckdb')
+    statements = con.extract_statements(sql)
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT or not _READ_ONLY.match(sql):
+        raise ValueError("SELECT 또는 WITH 로 시작하는 조회문 한 개만 실행할 수 있습니다.")
+
+
+def query_params(sql, params):
+    # SQL 에 실제로 쓰인 $이름 파라미터만 넘깁니다 (안 쓰는 파라미터를 넘기면 DuckDB 가 거부)
+    used = set(_PARAM.findall(sql))
+    return {k: pd.Timestamp(v) if hasattr(v, 'year') else v for k, v in (params or {}).items() if k in used}
+
+
+def run_query(sql, params=None, store_dir=None, limit=MAX_RESULT_ROWS, threads=None):
+    # 결과만 pandas 로 받습니다 (최대 limit 행)
+    with span('sql.query', tables=','.join(available_tables(store_dir))) as sp:
+        con = connect(store_dir, threads)
+        try:
+            check_query(con, sql)
+            df = con.sql(sql, params=query_params(sql, params) or None).limit(limit).df()
+        finally:
+            con.close()
+        sp.set(rows=len(df))
+    return df
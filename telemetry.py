@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import itertools
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+# ⏱️ 계측: 구간(span)별 소요 시간 / 행 수를 모아 사이드바 패널과 JSON 로그(한 줄 = 한 구간)로 내보냅니다.
+# 꺼져 있으면 span()/laps() 가 공용 no-op 객체를 돌려주므로 비용은 플래그 확인 한 번뿐입니다.
+# 켜기: 사이드바 토글 또는 환경변수 PMS_TRACE=1 (로그 파일: PMS_TRACE_LOG=경로, 없으면 stderr)
+# 토글은 실행(run) 단위입니다: enable() 은 ContextVar 에 이번 실행의 수집 번호를 두므로 같은 서버의 다른 세션에는 영향이 없고,
+# 패널(spans_since)은 자기 실행 번호가 붙은 구간만 봅니다. PMS_TRACE=1 은 서버 전체 JSON 로그용 (실행 번호 없이도 기록).
+MAX_SPANS = 2000
+logger = logging.getLogger('pms.telemetry')
+
+_env_enabled = os.environ.get('PMS_TRACE') == '1'
+_run = ContextVar('pms_trace_run', default=None)  # 이번 실행의 수집 번호 (None = 이 실행은 수집 안 함)
+_run_ids = itertools.count(1)
+_spans = deque(maxlen=MAX_SPANS)
+_lock = threading.Lock()
+_seq = 0
+
+
+def _ensure_handler():
+    if logger.handlers:
+        return
+    path = os.environ.get('PMS_TRACE_LOG')
+    handler = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def enable(on=True):
+    # 현재 컨텍스트(Streamlit 세션의 이번 스크립트 실행)에만 적용하고, 켜면 새 수집 번호를 받습니다.
+    run = next(_run_ids) if on else None
+    _run.set(run)
+    if run is not None or _env_enabled:
+        _ensure_handler()
+    return is_enabled()
+
+
+def is_enabled():
+    return _run.get() is not None or _env_enabled
+
+
+def current_run():
+    return _run.get()
+
+
+def _record(name, ms, rows, attrs, run):
+    global _seq
+    rec = {'ts': time.time(), 'span': name, 'ms': round(ms, 3), 'rows': rows, 'thread': threading.current_thread().name,
+           'run': run, **attrs}
+    with _lock:
+        _seq += 1
+        rec['seq'] = _seq
+        _spans.append(rec)
+    logger.info(json.dumps(rec, ensure_ascii=False, default=str))
+
+
+class _Span:
+    def __init__(self, name, rows, attrs, run):
+        self.name, self.rows, self.attrs, self.run = name, rows, attrs, run
+
+    def set(self, rows=None, **attrs):
+        if rows is not None:
+            self.rows = int(rows)
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        _record(self.name, (time.perf_counter() - self._start) * 1000, self.rows, self.attrs, self.run)
+        return False
+
+
+class _Laps:
+    # 긴 함수를 다시 들여쓰지 않고 구간을 끊어 재는 랩 타이머: timer.lap('구간명', rows=...)
+    def __init__(self, prefix, attrs, run):
+        self.prefix, self.attrs, self.run = prefix, attrs, run
+        self._last = time.perf_counter()
+
+    def lap(self, name, rows=None, **attrs):
+        now = time.perf_counter()
+        _record(f"{self.prefix}.{name}", (now - self._last) * 1000, None if rows is None else int(rows), {**self.attrs, **attrs}, self.run)
+        self._last = time.perf_counter()
+
+
+class _Noop:
+    def set(self, rows=None, **attrs):
+        pass
+
+    def lap(self, name, rows=None, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _Noop()
+
+
+def span(name, rows=None, **attrs):
+    run = _run.get()
+    if run is None and not _env_enabled:
+        return _NOOP
+    return _Span(name, None if rows is None else int(rows), attrs, run)
+
+
+def laps(prefix, **attrs):
+    run = _run.get()
+    if run is None and not _env_enabled:
+        return _NOOP
+    return _Laps(prefix, attrs, run)
+
+
+def mark():
+    # 지금까지 기록된 마지막 번호 → spans_since(mark) 로 이번 실행(rerun) 이후 구간만 조회
+    with _lock:
+        return _seq
+
+
+def spans_since(seq=0, run=None):
+    # 기본은 현재 실행의 구간만 (동시에 도는 다른 세션의 구간은 섞지 않음)
+    run = _run.get() if run is None else run
+    if run is None:
+        return []
+    with _lock:
+        return [s for s in _spans if s['seq'] > seq and s['run'] == run]
@@ -0,0 +1,10 @@
+# 공통 준비: 저장소 루트/benchmarks(synth) 를 import 경로에 넣고, 캐시/창고는 테스트 전용 임시 폴더로 (실제 .pms_cache 를 건드리지 않음)
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix='pms_tests_')
+os.environ['PMS_CACHE_DIR'] = os.path.join(WORK_DIR, 'cache')
+os.environ['PMS_STORE_DIR'] = os.path.join(WORK_DIR, 'store')
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
@@ -0,0 +1,148 @@
+# GeminiClient 를 로컬 http.server 대역(stand-in) 서버에 붙여 검증합니다: 모델 목록 TTL / 응답 캐시 / 429·5xx 재시도 백오프 / 타임아웃
+# 실행: python -m pytest -q tests
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import ai_engine
+from ai_engine import GeminiClient, GeminiError
+
+MODEL = 'models/gemini-1.5-flash'
+
+
+class FakeGemini(BaseHTTPRequestHandler):
+    # 서버 상태는 server 객체에 둡니다: calls(경로별 호출 수), statuses(POST 응답 코드 대기열), delay(응답 지연 초)
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        self.server.calls[path] = self.server.calls.get(path, 0) + 1
+        self._send(200, {'models': [{'name': 'models/other', 'supportedGenerationMethods': ['embedContent']},
+                                    {'name': MODEL, 'supportedGenerationMethods': ['generateContent']}]})
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        self.server.calls[path] = self.server.calls.get(path, 0) + 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)  # time.sleep 은 sleeps 픽스처가 가로채므로 사용하지 않습니다
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        if status != 200:
+            self._send(status, {'error': {'message': f'status {status}'}})
+            return
+        self._send(200, {'candidates': [{'content': {'parts': [{'text': f'리포트 #{self.server.calls[path]}'}]}}]})
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeGemini)
+    httpd.calls, httpd.statuses, httpd.delay = {}, [], 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # 백오프 대기 시간만 기록하고 실제로 자지는 않습니다.
+    recorded = []
+    monkeypatch.setattr(ai_engine.time, 'sleep', recorded.append)
+    return recorded
+
+
+def client_for(server, **kwargs):
+    return GeminiClient(' test-key ', base_url=f"http://127.0.0.1:{server.server_address[1]}/v1beta", **kwargs)
+
+
+def generate_path():
+    return f"/v1beta/{MODEL}:generateContent"
+
+
+def test_model_list_is_cached_for_ttl(server):
+    client = client_for(server)
+    client.generate('첫 번째')
+    client.generate('두 번째')
+    assert server.calls['/v1beta/models'] == 1
+
+    expired = client_for(server, model_ttl=0)
+    expired.generate('첫 번째')
+    expired.generate('두 번째')
+    assert server.calls['/v1beta/models'] == 3
+
+
+def test_same_prompt_hits_response_cache(server):
+    client = client_for(server)
+    first = client.generate('같은 요약')
+    assert client.generate('같은 요약') == first
+    assert server.calls[generate_path()] == 1
+
+    assert client.generate('같은 요약', use_cache=False) != first
+    assert server.calls[generate_path()] == 2
+
+
+def test_retries_429_and_5xx_with_exponential_backoff(server, sleeps):
+    server.statuses = [429, 503]
+    client = client_for(server, retries=2, backoff=0.5)
+    assert client.generate('재시도') == '리포트 #3'
+    assert server.calls[generate_path()] == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_last_retry(server, sleeps):
+    server.statuses = [500, 500, 500]
+    client = client_for(server, retries=1, backoff=0.1)
+    with pytest.raises(GeminiError, match='status 500'):
+        client.generate('계속 실패')
+    assert server.calls[generate_path()] == 2
+    assert sleeps == [0.1]
+
+
+def test_read_timeout_fails_fast_without_retry(server, sleeps):
+    client = client_for(server, timeout=(1, 0.2), retries=2)
+    client.resolve_model()
+    server.delay = 1.0
+    started = time.perf_counter()
+    with pytest.raises(requests.ReadTimeout):
+        client.generate('느린 응답')
+    assert time.perf_counter() - started < 0.9
+    assert server.calls[generate_path()] == 1
+    assert sleeps == []
+
+
+def test_connect_failure_is_retried_then_raised(sleeps):
+    # 아무도 듣지 않는 포트: 연결 실패는 재시도(백오프) 후 ConnectionError
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    client = GeminiClient('test-key', base_url=f"http://127.0.0.1:{port}/v1beta", timeout=(0.5, 1), retries=2, backoff=0.25)
+    with pytest.raises(requests.ConnectionError):
+        client.resolve_model()
+    assert sleeps == [0.25, 0.5]
+
+
+def test_get_client_keeps_only_recent_keys(monkeypatch):
+    monkeypatch.setattr(ai_engine, '_clients', ai_engine.OrderedDict())
+    monkeypatch.setattr(ai_engine, 'MAX_CLIENTS', 2)
+    first = ai_engine.get_client('key-1')
+    assert ai_engine.get_client(' key-1 ') is first
+    ai_engine.get_client('key-2')
+    assert ai_engine.get_client('key-1') is first   # 최근 사용으로 갱신
+    ai_engine.get_client('key-3')
+    assert [k for k, _ in ai_engine._clients] == ['key-1', 'key-3']
+    assert ai_engine.get_client('key-2') is not None and len(ai_engine._clients) == 2
@@ -0,0 +1,49 @@
+# 파싱 결과 캐시(cache): 메모리/해시/디스크 모두 최근 사용분만 유지
+# 실행: python -m pytest -q tests
+import io
+import os
+
+import pandas as pd
+import pytest
+
+import cache
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, file_id):
+        super().__init__(data)
+        self.name, self.file_id = 'p.csv', file_id
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+    cache.clear_cache()
+    yield tmp_path
+    cache.clear_cache()
+
+
+def test_digests_keep_only_recent_uploads(cache_dir, monkeypatch):
+    monkeypatch.setattr(cache, 'MAX_DIGEST_ENTRIES', 3)
+    for i in range(5):
+        cache.file_digest(Upload(f"file {i}".encode(), f"id{i}"))
+    assert list(cache._digests) == ['id2', 'id3', 'id4']
+    cache.file_digest(Upload(b"file 2", 'id2'))
+    cache.file_digest(Upload(b"file 5", 'id5'))
+    assert list(cache._digests) == ['id4', 'id2', 'id5']
+
+
+def test_disk_cache_keeps_most_recently_used_files(cache_dir, monkeypatch):
+    monkeypatch.setattr(cache, 'MAX_DISK_ENTRIES', 2)
+    df = pd.DataFrame({'a': [1, 2]})
+    for i, name in enumerate(['old', 'used', 'new']):
+        cache._spill(df, os.path.join(cache_dir, f"{name}.parquet"))
+        os.utime(cache_dir / f"{name}.parquet", (1_000 + i, 1_000 + i))
+    assert sorted(os.listdir(cache_dir)) == ['new.parquet', 'used.parquet']
+
+    pd.testing.assert_frame_equal(cache._load(str(cache_dir / 'used.parquet')), df)  # 읽으면 최근 사용
+    cache._spill(df, os.path.join(cache_dir, 'next.parquet'))
+    assert sorted(os.listdir(cache_dir)) == ['next.parquet', 'used.parquet']
+
+    cache.clear_cache(disk=True)
+    assert os.listdir(cache_dir) == []
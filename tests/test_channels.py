@@ -0,0 +1,40 @@
+# 거래처(채널) 차원(channels): 기존 글로벌 OTA 표의 부분 일치('부킹', '트립') / 채널 우선순위 / 행에 붙는 채널·플래그
+# 실행: python -m pytest -q tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from channels import CHANNELS, attach_channels, resolve_account
+
+BASELINE_GLOBAL_OTA = ['아고다', 'AGODA', '익스피디아', '부킹', '트립']  # 기존 app.py 글로벌 OTA 표 기준
+
+
+@pytest.mark.parametrize('name, channel, is_global_ota', [
+    ('부킹', '글로벌 OTA', True),
+    ('부킹닷컴', '글로벌 OTA', True),
+    ('트립 홀세일', '글로벌 OTA', True),
+    ('Agoda.com', '글로벌 OTA', True),
+    ('익스피디아 h.c', '글로벌 OTA', True),
+    ('마이리얼트립', '국내 OTA', True),
+    ('네이버', '국내 OTA', False),
+    ('마이스 부킹', 'MICE/그룹', True),
+    ('홈페이지', '다이렉트', False),
+    ('CORP 삼성', '기타', False),
+])
+def test_resolve_account(name, channel, is_global_ota):
+    resolved = resolve_account(name)
+    assert resolved['channel'] == channel
+    assert resolved['is_global_ota'] == is_global_ota
+    assert resolved['is_global_ota'] == any(g in name.upper() for g in BASELINE_GLOBAL_OTA)
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_attach_channels_by_account_code(categorical):
+    accounts = pd.Series(['부킹', '트립 홀세일', '네이버', None, '부킹', '그룹 GRP', 'personal'], dtype=object)
+    df = attach_channels(pd.DataFrame({'account': accounts.astype('category') if categorical else accounts}))
+    assert list(df['channel'].cat.categories) == CHANNELS
+    assert df['channel'].tolist() == ['글로벌 OTA', '글로벌 OTA', '국내 OTA', '기타', '글로벌 OTA', 'MICE/그룹', '다이렉트']
+    assert df['is_global_ota'].tolist() == [True, True, False, False, True, False, False]
+    assert df['is_mice_group'].tolist() == [False, False, False, False, False, True, False]
+    assert df['is_breakfast_target'].tolist() == [False, False, True, False, False, False, True]
+    assert df['is_global_ota'].dtype == np.bool_
@@ -0,0 +1,78 @@
+# 집계 큐브(cube) ↔ 예약 원본 groupby 동일성: 합계/조식 비중/거래처 통계를 탭별 현재·비교 구간(직전/전년 동기)마다 대조
+# 예약일 결측(NaT) 행은 원본 필터(>= / <)처럼 어떤 구간에도 들어가지 않아야 합니다.
+# 실행: python -m pytest -q tests
+import pandas as pd
+import pytest
+
+import processor
+import synth
+from cube import account_stats, breakfast_ratio, build_cubes, segment, slice_cubes, totals
+from metrics import COMPARE_PREVIOUS, COMPARE_YOY, period_windows, range_window, rolling_window
+
+
+@pytest.fixture(scope='module')
+def prod(tmp_path_factory):
+    path = synth.write_production(4_000, tmp_path_factory.mktemp('prod') / 'p.csv', start='2025-01-01', days=540, seed=3)
+    df = processor.process_data(synth.as_upload(path))
+    df.loc[df.index[::97], '예약일'] = pd.NaT
+    return df
+
+
+@pytest.fixture(scope='module')
+def cubes(prod):
+    return build_cubes(prod)
+
+
+def windows(latest):
+    for compare in (COMPARE_PREVIOUS, COMPARE_YOY):
+        for open_end in (True, False):
+            yield from period_windows(latest, open_end, compare).values()
+        yield range_window(latest - pd.Timedelta(days=45), latest - pd.Timedelta(days=3), compare)
+        yield rolling_window(latest, 30, compare)
+
+
+def raw_slice(df, start, end):
+    keep = df['예약일'] >= start
+    if end is not None:
+        keep &= df['예약일'] < end
+    return df[keep]
+
+
+def raw_account_stats(df):
+    # 기존 app.py 의 거래처별 groupby (평균 LOS/리드타임 = 예약 건 평균)
+    stats = df.groupby('account', observed=True).agg({'room_nights': 'sum', '객실매출액': 'sum', 'los': 'mean', 'lead_time': 'mean'}).reset_index()
+    stats['Net_ADR'] = stats['객실매출액'] / stats['room_nights']
+    return stats
+
+
+def raw_breakfast_ratio(df):
+    return len(df[df['breakfast_status'] == '조식포함']) / len(df) * 100 if len(df) else 0
+
+
+def sorted_stats(stats):
+    return stats.astype({'account': str}).sort_values('account').reset_index(drop=True)
+
+
+def test_nat_booking_dates_fall_in_no_window(prod, cubes):
+    assert prod['예약일'].isna().sum() > 0
+    assert slice_cubes(cubes)['booking']['count'].sum() == prod['예약일'].notna().sum()
+    assert slice_cubes(cubes)['demand']['room_nights'].sum() == pytest.approx(prod.loc[prod['예약일'].notna(), 'room_nights'].sum())
+
+
+def test_cube_slices_match_raw_groupby(prod, cubes):
+    latest = prod['예약일'].max()
+    checked = 0
+    for current, previous, _, _ in windows(latest):
+        for start, end in (current, previous):
+            raw, cube = raw_slice(prod, start, end), slice_cubes(cubes, start, end)['booking']
+            assert cube['count'].sum() == len(raw)
+            assert totals(cube) == pytest.approx(totals(raw))
+            assert breakfast_ratio(cube) == pytest.approx(raw_breakfast_ratio(raw))
+            for name in ('FIT', 'Group'):
+                assert totals(segment(cube, name)) == pytest.approx(totals(raw[raw['market_segment'] == name]))
+                assert breakfast_ratio(segment(cube, name)) == pytest.approx(raw_breakfast_ratio(raw[raw['market_segment'] == name]))
+            if raw.empty:
+                continue
+            pd.testing.assert_frame_equal(sorted_stats(account_stats(cube)), sorted_stats(raw_account_stats(raw)), check_dtype=False)
+            checked += 1
+    assert checked >= 16
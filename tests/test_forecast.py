@@ -0,0 +1,83 @@
+# 월말 예측(forecast): 확보 OTB = 월 합계 / 분위수 단조 / 같은 시드 같은 결과 / 픽업 이력 없음 / 월말(남은 일수 0) / AI 프롬프트 당월 현황
+# 실행: python -m pytest -q tests
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast
+import processor
+import synth
+from metrics import describe_shortfall, shortfall_simulation
+
+AS_OF = pd.Timestamp('2026-03-10')
+TARGETS = {3: {'rev_won': 900_000_000, 'rn': 2_500}, 4: {'rev_won': 1_200_000_000, 'rn': 3_000}}
+
+
+@pytest.fixture(scope='module')
+def prod(tmp_path_factory):
+    path = synth.write_production(3_000, tmp_path_factory.mktemp('prod') / 'p.csv', start='2025-03-01', days=375, seed=1)
+    return processor.process_data(synth.as_upload(path))
+
+
+@pytest.fixture(scope='module')
+def otb_clean(tmp_path_factory):
+    path = synth.write_otb(tmp_path_factory.mktemp('otb') / 'o.csv', start='2026-03-01', days=120, seed=2)
+    otb = processor.process_data(synth.as_upload(path), is_otb=True)
+    return otb[otb['일자_dt'].notna()].copy()
+
+
+def month_sum(otb_clean, year, month, col):
+    dates = otb_clean['일자_dt']
+    return otb_clean.loc[(dates.dt.year == year) & (dates.dt.month == month), col].sum()
+
+
+def simulate(otb_clean, history, as_of=AS_OF, seed=0):
+    return forecast.simulate_month_end(otb_clean, history, as_of, TARGETS, rooms=130, months=3, n_sims=500, seed=seed)
+
+
+def test_otb_is_month_sum_and_quantiles_are_monotonic(prod, otb_clean):
+    history = forecast.pickup_history(prod, AS_OF)
+    assert history is not None and history['rn'].sum() > 0
+    fc = simulate(otb_clean, history)
+
+    assert list(zip(fc['year'], fc['month'])) == [(2026, 3), (2026, 4), (2026, 5)]
+    for r in fc.itertuples():
+        assert r.otb_rev == month_sum(otb_clean, r.year, r.month, '합계_매출')
+        assert r.otb_rn == month_sum(otb_clean, r.year, r.month, '합계_객실')
+        # 픽업은 순증(≥0)이라 분위수는 확보 OTB 이상, 낮은 분위수부터 커집니다
+        assert r.otb_rev <= r.rev_p10 <= r.rev_p50 <= r.rev_p90
+        assert r.otb_rn <= r.rn_p10 <= r.rn_p50 <= r.rn_p90
+    assert fc['rev_p90'].gt(fc['otb_rev']).any()
+    pd.testing.assert_frame_equal(fc, simulate(otb_clean, history))
+
+
+def test_without_pickup_history_forecast_is_otb(prod, otb_clean):
+    assert forecast.pickup_history(prod.iloc[:0]) is None
+    assert forecast.pickup_history(prod.assign(예약일=pd.NaT)) is None
+    fc = simulate(otb_clean, None)
+    for q in forecast.QUANTILES:
+        assert (fc[f'rev_p{q}'] == fc['otb_rev']).all() and (fc[f'rn_p{q}'] == fc['otb_rn']).all()
+    assert fc.loc[fc['month'] == 3, 'rev_prob'].iloc[0] == (100.0 if fc['otb_rev'].iloc[0] >= TARGETS[3]['rev_won'] else 0.0)
+    assert fc.loc[fc['month'] == 5, 'rev_prob'].isna().all()
+
+
+def test_month_end_adds_no_pickup_to_current_month(prod, otb_clean):
+    as_of = pd.Timestamp('2026-03-31')
+    fc = simulate(otb_clean, forecast.pickup_history(prod, as_of), as_of)
+    march = fc[fc['month'] == 3].iloc[0]
+    assert march.rev_p10 == march.rev_p90 == march.otb_rev
+    assert march.rn_p10 == march.rn_p90 == march.otb_rn
+
+    sim = shortfall_simulation(otb_clean, as_of, TARGETS[3])
+    assert sim['days_left'] == 0 and sim['req_rn_day'] is None and sim['req_adr'] is None
+    text = describe_shortfall(sim, 3)
+    assert '남은 일수: 0일' in text and '필요한 판매량' not in text
+
+
+def test_shortfall_prompt_lines(otb_clean):
+    assert '시뮬레이션 불가' in describe_shortfall(None, 7)
+    sim = shortfall_simulation(otb_clean, AS_OF, TARGETS[3])
+    text = describe_shortfall(sim, 3)
+    assert f"남은 일수: {sim['days_left']}일" in text
+    assert f"{sim['req_rn_day']:.1f}실" in text and f"{sim['req_adr']:,.0f}원" in text
+    assert np.isfinite(sim['rev_ach_rate'])
@@ -0,0 +1,55 @@
+# 숙박일 전개(nights): 박 수만큼 펼친 RN 합 = room_nights / 월 경계를 넘는 연박 분할 / 압축(int8) 컬럼 합산 / 청크 합산
+# 실행: python -m pytest -q tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from nights import STAY_NIGHT_COL, expand_nights, nights_by, occupancy_by_stay
+from processor import compact_frame
+
+
+def bookings(rows):
+    df = pd.DataFrame(rows, columns=['예약일', '도착일', 'rooms', 'los', '객실매출액'])
+    for col in ['예약일', '도착일']:
+        df[col] = pd.to_datetime(df[col])
+    df['room_nights'] = df['rooms'] * df['los']
+    return df
+
+
+def test_expanded_nights_add_up_to_room_nights():
+    df = bookings([('2026-01-02', '2026-01-10', 3, 4, 1_200_000),
+                   ('2026-01-03', '2026-01-11', 1, 1, 150_000),
+                   ('2026-01-04', '2026-01-12', 2, 0, 80_000),      # 데이유즈: 도착일 하루
+                   ('2026-01-05', None, 1, 2, 300_000)])            # 도착일 결측: 제외
+    nights = expand_nights(df, keep=['예약일'])
+    assert len(nights) == 4 + 1 + 1
+    per_booking = nights.groupby('예약일')[['room_nights', '객실매출액']].sum()
+    assert per_booking['room_nights'].tolist() == [12, 1, 0]
+    assert per_booking['객실매출액'].tolist() == [1_200_000, 150_000, 80_000]
+    first = nights[nights['예약일'] == '2026-01-02']
+    assert first[STAY_NIGHT_COL].tolist() == list(pd.date_range('2026-01-10', periods=4))
+    assert (first['room_nights'] == 3).all()
+
+
+def test_stay_crossing_month_end_is_split_by_night():
+    df = bookings([('2026-01-15', '2026-01-30', 2, 5, 1_000_000),
+                   ('2026-01-20', '2026-02-01', 1, 1, 100_000)])
+    nights = nights_by(df)
+    by_month = nights.groupby(nights[STAY_NIGHT_COL].dt.month)[['room_nights', '객실매출액']].sum()
+    assert by_month.loc[1].tolist() == [4, 400_000]
+    assert by_month.loc[2].tolist() == [6 + 1, 600_000 + 100_000]
+    assert nights[STAY_NIGHT_COL].max() == pd.Timestamp('2026-02-03')  # 퇴실일(02-04) 전날 밤까지
+
+    occ = occupancy_by_stay(df, rooms=10, start='2026-02-01', end='2026-03-01')
+    assert occ[STAY_NIGHT_COL].min() == pd.Timestamp('2026-02-01')
+    assert occ.loc[occ[STAY_NIGHT_COL] == '2026-02-01', 'occ'].iloc[0] == pytest.approx(30.0)
+
+
+def test_compacted_int8_measures_are_widened_before_summing():
+    # 같은 밤에 100 RN 짜리 예약 3건: int8(최대 127)로 더하면 넘칩니다.
+    df = compact_frame(bookings([('2026-03-01', '2026-03-10', 50, 2, 5_000_000)] * 3))
+    assert df['room_nights'].dtype == np.int8 and df['los'].dtype == np.int8
+    for chunk_rows in (1, 2, 10):
+        nights = nights_by(df, chunk_rows=chunk_rows).sort_values(STAY_NIGHT_COL)
+        assert nights['room_nights'].tolist() == [150, 150]
+        assert nights['객실매출액'].tolist() == [7_500_000, 7_500_000]
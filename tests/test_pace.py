@@ -0,0 +1,55 @@
+# Pace 엔진(pace): STLY(364일 전, 같은 요일) 스냅샷과 투숙일을 맞춘 픽업 / 비교 불가 날짜 / D-n 곡선 / 스냅샷 사이 픽업
+# 실행: python -m pytest -q tests
+import numpy as np
+import pandas as pd
+
+import snapshot_store as ss
+from pace import build_pace, pace_by_days_out, pace_matrix, summarize_pace
+
+AS_OF = pd.Timestamp('2026-03-10')
+
+
+def otb(start, days, rooms, fit_share=0.6):
+    dates = pd.date_range(start, periods=days)
+    rooms = np.asarray(rooms, dtype=float) * np.ones(days)
+    return pd.DataFrame({'일자_dt': dates, '합계_객실': rooms, '합계_매출': rooms * 100_000,
+                         '개인_객실': rooms * fit_share, '단체_객실': rooms * (1 - fit_share)})
+
+
+def test_stly_pickup_aligns_stay_dates_364_days_back(tmp_path):
+    store = str(tmp_path)
+    current = otb('2026-04-01', 30, np.arange(30) + 50)
+    # 작년 스냅샷: 투숙일 k 의 객실 = k (날짜별로 값이 달라 하루만 어긋나도 드러남), 4/20 이후는 없음
+    last_year = otb('2025-03-01', 50, np.arange(50))
+    ss.save_snapshot(last_year, AS_OF - pd.Timedelta(days=ss.STLY_OFFSET_DAYS), store)
+    stly = ss.lookup_stly(AS_OF, '2026-04-01', '2026-05-01', store_dir=store)
+
+    pace = build_pace(current, {'STLY': stly})
+    assert pace.index.equals(pd.DatetimeIndex(current['일자_dt'], name='일자_dt'))
+    compared = pace['STLY_객실'].notna()
+    assert compared.sum() == (pd.Timestamp('2025-04-20') - pd.Timestamp('2025-04-02')).days
+    prior = pace.index[compared] - pd.Timedelta(days=364)
+    assert (prior.dayofweek == pace.index[compared].dayofweek).all()
+    expected = (prior - pd.Timestamp('2025-03-01')).days.to_numpy(dtype=float)
+    np.testing.assert_array_equal(pace.loc[compared, 'STLY_객실'], expected)
+    np.testing.assert_array_equal(pace.loc[compared, '픽업_STLY_객실'], pace.loc[compared, '합계_객실'] - expected)
+    np.testing.assert_allclose(pace.loc[compared, '픽업_STLY_FIT'], (pace.loc[compared, '합계_객실'] - expected) * 0.6)
+    assert pace.loc[~compared, ['STLY_객실', '픽업_STLY_객실', '픽업_STLY_ADR']].isna().all().all()
+
+    summary = summarize_pace(pace, ['STLY'])
+    assert summary.loc['2026-04', 'STLY_객실'] == expected.sum()
+    assert summary.loc['2026-04', '합계_객실'] == current['합계_객실'].sum()
+
+
+def test_pace_by_days_out_and_matrix():
+    history = pd.concat([otb('2026-04-01', 3, rooms).assign(snapshot_date=pd.Timestamp(snap))
+                         for snap, rooms in (('2026-03-25', 10), ('2026-03-29', 14), ('2026-04-02', 15))], ignore_index=True)
+    curve = pace_by_days_out(history, max_days_out=7)
+    assert list(curve.columns) == [7, 5, 4, 3, 1, 0]  # 관측된 D-n 만, 먼 날짜부터
+    assert curve.loc['2026-04-01', 7] == 10 and curve.loc['2026-04-01', 3] == 14
+    assert curve.loc['2026-04-03', 1] == 15 and curve.loc['2026-04-03', 5] == 14
+    assert np.isnan(curve.loc['2026-04-01', 0])  # 04-02 스냅샷은 04-01 투숙일 이후(D-1) → 곡선에서 제외
+
+    otb_grid, pickup = pace_matrix(history)
+    assert otb_grid.shape == (3, 3) and pickup.shape == (3, 2)
+    assert (pickup.iloc[:, 0] == 4).all() and (pickup.iloc[:, 1] == 1).all()
@@ -0,0 +1,119 @@
+# 멀티 프로퍼티(portfolio): 호텔 2곳 병렬 처리 → 공통 기준일 / 포트폴리오 합계 = 호텔별 합 / 기준일이 다른 요약은 합산 거부
+# 실행: python -m pytest -q tests
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import processor
+from cube import build_cubes
+from metrics import BUDGET_DATA, period_rows
+from portfolio import BUDGET_SUMS, PERIOD_SUMS, rollup_budget, rollup_periods, rollup_portfolio, run_properties
+
+KEYS = ['period', 'side', 'label']
+
+
+def upload(name, title_rows, df):
+    buf = io.BytesIO(("\n".join(title_rows) + "\n" + df.to_csv(index=False)).encode('utf-8-sig'))
+    buf.name = name
+    return buf
+
+
+def production_csv(name, n, start, days, seed):
+    rng = np.random.default_rng(seed)
+    booked = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n), 'D')
+    booked = booked.where(np.arange(n) != 0, pd.Timestamp(start) + pd.Timedelta(days=days - 1))  # 마지막 날 = 최신 예약일
+    arrival = booked + pd.to_timedelta(rng.integers(0, 90, n), 'D')
+    los, rooms = rng.choice([1, 2, 3], n), rng.choice([1, 1, 2], n)
+    rate = rng.integers(80, 300, n) * 1000 * los * rooms
+    df = pd.DataFrame({'고객명': 'GUEST', '예약일자': booked.strftime('%Y-%m-%d'), '입실일자': arrival.strftime('%Y-%m-%d'),
+                       '퇴실일자': (arrival + pd.to_timedelta(los, 'D')).strftime('%Y-%m-%d'), '총금액': rate + 20_000, '객실료': rate,
+                       '박수': los, '객실타입': rng.choice(['DLX', 'STE'], n), '국적': rng.choice(['KOR', 'JPN'], n),
+                       '시장': rng.choice(['FIT', 'OTA', 'GRP'], n), '상태': rng.choice(['RR', 'CI', 'CX'], n, p=[.6, .3, .1]),
+                       '거래처': rng.choice(['아고다', '네이버', '그룹 GRP', '홈페이지'], n), '객실수': rooms,
+                       '서비스코드': rng.choice(['BF', 'RO'], n), '요금타입': 'BAR', '패키지': ''})
+    return upload(name, ['Production Report', f'기간: {start}'], df)
+
+
+def otb_csv(name, start, days, rooms, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days)
+    fit, grp = rng.integers(0, rooms // 2, days), rng.integers(0, rooms // 3, days)
+    fit_rev, grp_rev = fit * 150_000, grp * 110_000
+    df = pd.DataFrame({'일자': dates.strftime('%Y-%m-%d'), '요일': dates.day_name(),
+                       '개인 객실': fit, '개인 비율': 0, '개인 ADR': 150_000, '개인 매출': fit_rev, '개인 매출비율': 0,
+                       '단체 객실': grp, '단체 비율': 0, '단체 ADR': 110_000, '단체 매출': grp_rev, '단체 매출비율': 0,
+                       '내부이용': 0, '무료': 0, '합계 객실': fit + grp, '점유율': (fit + grp) / rooms * 100, '합계 ADR': 0,
+                       'RevPAR': 0, '합계 매출': fit_rev + grp_rev})
+    return upload(name, ['On The Books Report', f'기준일: {start}', '단위: 실 / 원'], df)
+
+
+@pytest.fixture(scope='module')
+def jobs():
+    jobs = {}
+    for pid, rooms, days, seed in (('north', 130, 300, 6), ('south', 210, 290, 7)):
+        prod = production_csv(f'{pid}_p.csv', 2_000, '2025-06-01', days, seed)
+        otb = otb_csv(f'{pid}_o.csv', '2026-03-01', 150, rooms, seed)
+        jobs[pid] = ({'name': pid, 'rooms': rooms, 'budget': BUDGET_DATA}, [prod], [otb])
+    return jobs
+
+
+@pytest.fixture(scope='module')
+def results(jobs):
+    return run_properties(jobs, max_workers=2)
+
+
+def parsed(job):
+    job[1][0].seek(0)
+    return processor.process_data(job[1])
+
+
+def latest(job):
+    return parsed(job)['예약일'].max()
+
+
+def test_properties_share_the_earliest_latest_booking_date(jobs, results):
+    as_of = min(latest(job) for job in jobs.values())
+    assert latest(jobs['north']) != latest(jobs['south'])
+    for pid, job in jobs.items():
+        periods = results[pid]['periods']
+        assert (periods['as_of'] == as_of).all() and (periods['latest'] == latest(job)).all()
+        assert (results[pid]['budget']['as_of'] == as_of).all()
+        expected = pd.DataFrame(period_rows(build_cubes(parsed(job)), as_of, open_end=True))
+        pd.testing.assert_frame_equal(periods[expected.columns], expected, check_dtype=False)
+
+
+def test_rollups_equal_per_property_sums(results):
+    rolled = rollup_portfolio(results)
+    by_property = rolled['by_property']
+    sums = by_property.groupby(KEYS, sort=False)[PERIOD_SUMS].sum().reset_index()
+    periods = rolled['periods']
+    pd.testing.assert_frame_equal(periods[KEYS + PERIOD_SUMS], sums, check_dtype=False)
+    assert (periods['properties'] == 2).all()
+    np.testing.assert_allclose(periods['adr'], (sums['room_sales'] / sums['room_nights']).fillna(0))
+    bf = (by_property['breakfast_ratio'] * by_property['bookings']).groupby([by_property[k] for k in KEYS], sort=False).sum()
+    np.testing.assert_allclose(periods['breakfast_ratio'], (bf.to_numpy() / sums['bookings']).fillna(0))
+
+    budget, by_hotel = rolled['budget'], rolled['budget_by_property']
+    assert set(by_hotel['property']) == {'north', 'south'}
+    totals = by_hotel.groupby(['source', 'month'], sort=False)[BUDGET_SUMS].sum().reset_index()
+    pd.testing.assert_frame_equal(budget[['source', 'month'] + BUDGET_SUMS], totals, check_dtype=False)
+    np.testing.assert_allclose(budget['rev_pct'], totals['rev'] / totals['target_rev'] * 100)
+    np.testing.assert_allclose(budget['occ'], totals['rn'] / totals['capacity'] * 100)
+
+
+def test_rollup_refuses_mixed_as_of(jobs, results):
+    periods = pd.concat([r['periods'] for r in results.values()], ignore_index=True)
+    shifted = periods.assign(as_of=periods['as_of'].where(periods['property'] == 'north', periods['as_of'] + pd.Timedelta(days=1)))
+    with pytest.raises(ValueError, match='기준일'):
+        rollup_periods(shifted)
+    budget = pd.concat([r['budget'] for r in results.values()], ignore_index=True)
+    with pytest.raises(ValueError, match='기준일'):
+        rollup_budget(budget.assign(as_of=budget['as_of'].where(budget['property'] == 'south', pd.Timestamp('2026-01-01'))))
+    assert rollup_periods(periods.iloc[:0]).empty
+
+    as_of = pd.Timestamp('2026-02-10')
+    fixed = run_properties(jobs, as_of=as_of)
+    assert all((r['periods']['as_of'] == as_of).all() for r in fixed.values())
+    assert not rollup_portfolio(fixed)['periods'].empty
@@ -0,0 +1,44 @@
+# 엑셀 컬럼형 캐시(read_excel_columnar): 같은 파일은 변환본을 다시 쓰고, 처리기 버전이 바뀌면 새로 변환합니다
+# 실행: python -m pytest -q tests
+import io
+import os
+
+import pandas as pd
+
+import processor
+
+
+def production_xlsx(path):
+    # 실적 내보내기 모양: 제목 2줄 + 헤더 + 예약 행 (매핑 밖 컬럼 '메모' 포함)
+    rows = pd.DataFrame({
+        '고객명': ['홍길동', 'KIM', 'LEE'], '예약일자': ['2026-01-02', '2026-01-03', '2026-01-04'],
+        '입실일자': ['2026-01-10', '2026-01-11', '2026-01-12'], '퇴실일자': ['2026-01-11', '2026-01-13', '2026-01-13'],
+        '총금액': [120_000, 260_000, 90_000], '객실료': [100_000, 240_000, 90_000], '박수': [1, 2, 1],
+        '객실타입': ['DLX', 'STE', 'TWN'], '국적': ['KOR', 'JPN', 'USA'], '시장': ['FIT', 'OTA', 'GRP'],
+        '상태': ['RR', 'CI', 'RC'], '거래처': ['아고다', '네이버', '그룹 GRP'], '객실수': [1, 1, 2],
+        '서비스코드': ['BF', '', 'RO'], '요금타입': ['BAR', 'BB_PKG', 'corp'], '패키지': ['', '조식', ''], '메모': ['', 'VIP', ''],
+    })
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame([['Production Report'], ['기간: 2026-01-01 ~ 2026-01-31']]).to_excel(writer, index=False, header=False)
+        rows.to_excel(writer, index=False, startrow=2)
+    with open(path, 'rb') as f:
+        upload = io.BytesIO(f.read())
+    upload.name = os.path.basename(path)
+    return rows, upload
+
+
+def test_excel_columnar_cache_is_keyed_by_processor_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor, 'EXCEL_COLUMNAR_DIR', str(tmp_path / 'excel'))
+    df, upload = production_xlsx(tmp_path / 'p.xlsx')
+
+    first = processor.read_raw(upload)
+    assert set(first.columns) == set(processor.PROD_MAPPING) | {'고객명'}
+    assert len(os.listdir(tmp_path / 'excel')) == 1
+    pd.testing.assert_frame_equal(processor.read_raw(upload), first)
+    assert len(os.listdir(tmp_path / 'excel')) == 1
+    assert list(processor.read_excel_columnar(upload, 2).columns) == list(df.columns)  # 전체 컬럼은 따로 변환
+    assert len(os.listdir(tmp_path / 'excel')) == 2
+
+    monkeypatch.setattr(processor, 'PROCESSOR_VERSION', 'next')
+    pd.testing.assert_frame_equal(processor.read_raw(upload), first)
+    assert len(os.listdir(tmp_path / 'excel')) == 3
@@ -0,0 +1,162 @@
+# 실적 누적 창고(production_store): 재적재 0건 / CSV·XLSX 동일 해시 / 기간 내 사라진 예약 삭제 / 버전 이관 / 비우기
+# 실행: python -m pytest -q tests
+import os
+
+import pandas as pd
+import pytest
+
+import processor
+import production_store as ps
+import synth
+
+ZERO = {'new': 0, 'updated': 0, 'deleted': 0, 'missing': 0}
+
+
+def export_frame(n=400, seed=0):
+    return synth.production_frame(n, start='2026-01-01', days=60, seed=seed, subtotal_every=100)
+
+
+def write_export(df, path, fmt='csv'):
+    title = synth._title_rows(synth.PROD_TITLE_ROWS, '2026-01-01', '2026-03-01')
+    if fmt == 'csv':
+        return synth.as_upload(synth.write_csv(df, path, title))
+    # 엑셀은 날짜/금액을 실제 날짜·실수 셀로 (CSV 문자열과 형식이 다른 같은 값)
+    df = df.copy()
+    rows = ~df['고객명'].isin(['합계', '총합계'])
+    for col in ['예약일자', '입실일자', '퇴실일자']:
+        df[col] = pd.to_datetime(df[col].where(rows)).astype(object).where(rows, '')
+    for col in ['총금액', '객실료']:
+        df[col] = df[col].astype(float)
+    return synth.as_upload(synth.write_xlsx(df, path, title))
+
+
+def changes(stats):
+    return {k: stats[k] for k in ZERO}
+
+
+def canon(df, cols):
+    keys = ['예약일', '도착일', '고객명', 'account', 'room_type', '총매출액', '객실매출액']
+    return df[cols].astype({c: object for c in cols if isinstance(df[c].dtype, pd.CategoricalDtype)}) \
+                   .sort_values(keys).reset_index(drop=True)
+
+
+def assert_same_rows(stored, expected):
+    # 창고는 매핑된 컬럼만 보관합니다 (process_data 는 메모 등 나머지 컬럼도 그대로 둠)
+    cols = sorted(stored.columns)
+    pd.testing.assert_frame_equal(canon(stored, cols), canon(expected, cols), check_dtype=False)
+
+
+@pytest.fixture
+def store(tmp_path):
+    ps._loaded.clear()
+    return str(tmp_path / 'store')
+
+
+def test_reingesting_same_export_changes_nothing(tmp_path, store):
+    upload = write_export(export_frame(), tmp_path / 'p.csv')
+    first = ps.ingest_production(upload, store, window_deletes=True)
+    assert first['new'] > 0 and first['partitions'] > 0
+
+    again = ps.ingest_production(upload, store, window_deletes=True)
+    assert changes(again) == ZERO
+    assert again['unchanged'] == first['new'] and again['partitions'] == 0
+    upload.seek(0)
+    assert_same_rows(ps.load_production(store), processor.process_data(upload))
+
+
+def test_csv_and_xlsx_of_same_export_hash_equal(tmp_path, store):
+    df = export_frame()
+    csv = write_export(df, tmp_path / 'p.csv')
+    xlsx = write_export(df, tmp_path / 'p.xlsx', 'xlsx')
+    keyed = [ps._with_keys(ps.read_export(f)) for f in (csv, xlsx)]
+    pd.testing.assert_frame_equal(*keyed)
+
+    ps.ingest_production(csv, store)
+    assert changes(ps.preview_production(xlsx, store, window_deletes=True)) == ZERO
+    assert changes(ps.ingest_production(xlsx, store, window_deletes=True)) == ZERO
+
+
+def test_reservation_missing_from_window_is_deleted_only_when_asked(tmp_path, store):
+    df = export_frame()
+    ps.ingest_production(write_export(df, tmp_path / 'a.csv'), store)
+    active = df.index[df['상태'].isin(ps.ACTIVE_STATUS)]
+    dropped, cancelled = active[5], active[6]
+    later = df.drop(index=dropped)
+    later.loc[cancelled, '상태'] = 'CX'
+    upload = write_export(later, tmp_path / 'b.csv')
+    before = len(ps.load_production(store))
+
+    kept = ps.preview_production(upload, store, window_deletes=False)
+    assert (kept['missing'], kept['deleted'], kept['updated']) == (0, 1, 0)
+    removed = ps.preview_production(upload, store, window_deletes=True)
+    assert (removed['missing'], removed['deleted']) == (1, 2)
+    assert removed['window'] == (pd.Timestamp(later['예약일자'].replace('', None).min()),
+                                 pd.Timestamp(later['예약일자'].replace('', None).max()))
+
+    assert changes(ps.ingest_production(upload, store, window_deletes=False)) == {**ZERO, 'deleted': 1}
+    assert len(ps.load_production(store)) == before - 1
+    assert ps.ingest_production(upload, store, window_deletes=True)['missing'] == 1
+    assert len(ps.load_production(store)) == before - 2
+
+
+def test_processor_version_change_migrates_without_renumbering(tmp_path, store, monkeypatch):
+    # 같은 조합 2줄 중 먼저 나오는 줄이 취소(CX): 보관 원본엔 활성 줄만 있어도 이관 후 키가 그대로여야 합니다.
+    df = export_frame()
+    twin = df[df['상태'] == 'RR'].iloc[[0]].assign(상태='CX', 객실료=1_000)
+    df = pd.concat([twin, df], ignore_index=True)
+    upload = write_export(df, tmp_path / 'p.csv')
+    ps.ingest_production(upload, store, window_deletes=True)
+    before = ps.load_production(store)
+
+    monkeypatch.setattr(ps, 'PROCESSOR_VERSION', 'next')
+    assert ps.migrate_production(store) is True
+    root = ps._root(store)
+    assert not os.path.exists(f"{root}.migrating") and not os.path.exists(f"{root}.retired")
+    assert ps._read_manifest(root)['processor_version'] == 'next'
+    assert set(ps._list(root, 'raw')) == set(ps.list_partitions(store))
+    assert_same_rows(ps.load_production(store), before)
+    assert changes(ps.preview_production(upload, store, window_deletes=True)) == ZERO
+    assert ps.migrate_production(store) is False
+
+
+def test_failed_migration_leaves_store_untouched(tmp_path, store, monkeypatch):
+    upload = write_export(export_frame(), tmp_path / 'p.csv')
+    ps.ingest_production(upload, store)
+    before = ps.load_production(store)
+    index = ps.load_index(store)
+
+    def broken(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(ps, 'PROCESSOR_VERSION', 'next')
+    monkeypatch.setattr(ps, '_merge', broken)
+    with pytest.raises(OSError):
+        ps.migrate_production(store)
+    monkeypatch.undo()
+
+    pd.testing.assert_frame_equal(ps.load_index(store), index)
+    assert_same_rows(ps.load_production(store), before)
+
+
+def test_store_without_raw_rows_refuses_to_ingest(tmp_path, store, monkeypatch):
+    upload = write_export(export_frame(), tmp_path / 'p.csv')
+    ps.ingest_production(upload, store)
+    root = ps._root(store)
+    for part in ps._list(root, 'raw'):
+        os.remove(ps._file(root, 'raw', part))
+    parts = ps.list_partitions(store)
+
+    monkeypatch.setattr(ps, 'PROCESSOR_VERSION', 'next')
+    with pytest.raises(ps.StoreVersionError):
+        ps.ingest_production(upload, store)
+    assert ps.list_partitions(store) == parts
+
+
+def test_clear_production_empties_store(tmp_path, store):
+    ps.ingest_production(write_export(export_frame(), tmp_path / 'p.csv'), store)
+    assert not ps.load_production(store).empty
+
+    ps.clear_production(store)
+    assert os.listdir(ps._root(store)) == []
+    assert ps.store_version(store) is None
+    assert ps.load_production(store).empty
+    assert ps.load_index(store).empty
@@ -0,0 +1,64 @@
+# OTB 스냅샷 창고(snapshot_store): 기준일 이진 탐색(당일 / 첫 스냅샷 이전 / 빈 날짜 허용 범위) / STLY·N일 전 조회 / 같은 기준일 교체
+# 실행: python -m pytest -q tests
+import pandas as pd
+import pytest
+
+import snapshot_store as ss
+
+SNAPSHOTS = [pd.Timestamp(d) for d in ('2026-01-01', '2026-01-08', '2026-01-20')]
+
+
+def otb(start, days, rooms):
+    dates = pd.date_range(start, periods=days)
+    return pd.DataFrame({'일자_dt': dates, '합계_객실': rooms, '합계_매출': rooms * 100_000})
+
+
+@pytest.mark.parametrize('target, tolerance, expected', [
+    ('2026-01-08', 3, '2026-01-08'),           # 당일
+    ('2026-01-08 15:30', 3, '2026-01-08'),     # 시각은 무시
+    ('2025-12-31', 3, None),                   # 첫 스냅샷 이전
+    ('2026-01-11', 3, '2026-01-08'),           # 빈 날짜: 직전 스냅샷이 허용 범위 안
+    ('2026-01-12', 3, None),                   # 빈 날짜: 허용 범위 밖 (다음 스냅샷은 보지 않음)
+    ('2026-01-12', 4, '2026-01-08'),
+    ('2026-01-19', 0, None),
+    ('2026-01-20', 0, '2026-01-20'),
+    ('2026-02-01', 30, '2026-01-20'),          # 마지막 스냅샷 이후
+])
+def test_nearest_snapshot(target, tolerance, expected):
+    found = ss.nearest_snapshot(target, tolerance, snapshots=SNAPSHOTS)
+    assert found == (None if expected is None else pd.Timestamp(expected))
+
+
+def test_nearest_snapshot_reads_store(tmp_path):
+    store = str(tmp_path)
+    assert ss.nearest_snapshot('2026-01-08', store_dir=store) is None
+    for day in reversed(SNAPSHOTS):
+        ss.save_snapshot(otb('2026-02-01', 5, 10), day, store)
+    assert ss.list_snapshots(store) == SNAPSHOTS
+    assert ss.nearest_snapshot('2026-01-10', store_dir=store) == pd.Timestamp('2026-01-08')
+
+
+def test_lookup_stly_shifts_364_days(tmp_path):
+    store = str(tmp_path)
+    as_of = pd.Timestamp('2026-03-10')
+    # 364일 전(2025-03-11)이 아니라 이틀 전 스냅샷만 있어도 허용 범위(3일) 안이면 사용
+    ss.save_snapshot(otb('2025-03-01', 60, 7), as_of - pd.Timedelta(days=366), store)
+    stly = ss.lookup_stly(as_of, '2026-04-01', '2026-04-08', store_dir=store)
+
+    assert stly['일자_dt'].tolist() == list(pd.date_range('2026-04-01', periods=7))
+    assert (stly['원_일자_dt'] == stly['일자_dt'] - pd.Timedelta(days=364)).all()
+    assert (stly['원_일자_dt'].dt.dayofweek == stly['일자_dt'].dt.dayofweek).all()
+    assert ss.lookup_stly(as_of + pd.Timedelta(days=2), store_dir=store).empty   # 4일 차이: 허용 범위 밖
+    assert ss.lookup_stly('2025-06-01', store_dir=store).empty
+
+
+def test_same_snapshot_date_is_replaced_and_days_ago_lookup(tmp_path):
+    store = str(tmp_path)
+    ss.save_snapshot(otb('2026-02-01', 10, 5), '2026-01-24', store)
+    ss.save_snapshot(otb('2026-02-01', 10, 9), '2026-01-24', store)
+    ss.save_snapshot(otb('2026-02-01', 10, 12), '2026-01-31', store)
+
+    week_ago = ss.lookup_days_ago('2026-01-31', 7, '2026-02-03', '2026-02-05', store_dir=store)
+    assert week_ago['일자_dt'].tolist() == [pd.Timestamp('2026-02-03'), pd.Timestamp('2026-02-04')]
+    assert (week_ago['합계_객실'] == 9).all() and (week_ago['snapshot_date'] == pd.Timestamp('2026-01-24')).all()
+    assert ss.lookup_days_ago('2026-01-31', 14, store_dir=store).empty
@@ -0,0 +1,94 @@
+# SQL 분석 엔진(sql_engine): 조회문 한 개만 / 창고 밖 파일·COPY·ATTACH·INSTALL·설정 변경 차단 / 저장 쿼리 전부 실행 / STLY 페이스 구간 분리
+# DuckDB 는 선택 설치 — 없으면 건너뜁니다.
+# 실행: python -m pytest -q tests
+import pandas as pd
+import pytest
+
+import processor
+import production_store as ps
+import snapshot_store
+import sql_engine as se
+import synth
+
+duckdb = pytest.importorskip('duckdb')
+
+PARAMS = {'start': pd.Timestamp('2026-03-01'), 'end': pd.Timestamp('2026-06-01'), 'as_of': pd.Timestamp('2026-02-15')}
+STLY_QUERY = '객실타입별 STLY 페이스 (도착월)'
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('sql')
+    store_dir = str(tmp / 'store')
+    ps._loaded.clear()
+    ps.ingest_production(synth.as_upload(synth.write_production(3_000, tmp / 'p.csv', start='2025-01-01', days=540, seed=4)), store_dir)
+    otb = processor.process_data(synth.as_upload(synth.write_otb(tmp / 'o.csv', start='2026-01-01', days=180, seed=5)), is_otb=True)
+    for day in ('2026-02-01', '2026-02-08'):
+        snapshot_store.save_snapshot(otb, pd.Timestamp(day), store_dir)
+    return store_dir
+
+
+@pytest.mark.parametrize('sql', [
+    'SELECT 1; SELECT 2',
+    "SELECT 1; COPY production TO 'out.csv'",
+    "COPY (SELECT * FROM production) TO '/tmp/out.csv'",
+    "ATTACH '/tmp/other.db' AS other",
+    'INSTALL httpfs',
+    'PRAGMA version',
+    'SET enable_external_access = true',
+])
+def test_only_a_single_select_is_accepted(store, sql):
+    with pytest.raises(ValueError):
+        se.run_query(sql, store_dir=store)
+
+
+def test_comments_and_with_queries_are_accepted(store):
+    sql = '-- 예약 건수\n/* 창고 */ WITH p AS (SELECT * FROM production) SELECT COUNT(*) AS n FROM p'
+    assert se.run_query(sql, store_dir=store)['n'].iloc[0] == len(ps.load_production(store))
+
+
+def test_connection_is_locked_to_the_store(store, tmp_path):
+    con = se.connect(store)
+    try:
+        with pytest.raises(duckdb.PermissionException):
+            con.sql("SELECT * FROM read_csv('/etc/passwd')").df()
+        for sql in (f"COPY (SELECT 1) TO '{tmp_path / 'out.csv'}'", f"ATTACH '{tmp_path / 'other.db'}' AS other", 'INSTALL httpfs'):
+            with pytest.raises(duckdb.PermissionException):
+                con.execute(sql)
+        for sql in ('SET enable_external_access = true', "SET allowed_directories = ['/']", 'RESET lock_configuration'):
+            with pytest.raises(duckdb.InvalidInputException):
+                con.execute(sql)
+        assert not (tmp_path / 'out.csv').exists()
+    finally:
+        con.close()
+    with pytest.raises(duckdb.PermissionException):
+        se.run_query("SELECT * FROM read_csv('/etc/passwd')", store_dir=store)
+
+
+@pytest.mark.parametrize('name', list(se.SAVED_QUERIES))
+def test_saved_queries_run(store, name):
+    assert set(se.available_tables(store)) == set(se.SOURCES)
+    df = se.run_query(se.SAVED_QUERIES[name], PARAMS, store)
+    assert not df.empty
+
+
+def stly_expected(prod, start, end, as_of, shift=pd.Timedelta(days=snapshot_store.STLY_OFFSET_DAYS)):
+    current = (prod['도착일'] >= start) & (prod['도착일'] < end) & (prod['예약일'] <= as_of)
+    stly = (prod['도착일'] >= start - shift) & (prod['도착일'] < min(end - shift, start)) & (prod['예약일'] <= as_of - shift)
+    assert not (current & stly).any()
+    return pd.DataFrame({'현재_RN': prod['room_nights'].where(current, 0), 'STLY_RN': prod['room_nights'].where(stly, 0),
+                         '현재_매출': prod['객실매출액'].where(current, 0), 'STLY_매출': prod['객실매출액'].where(stly, 0),
+                         '객실타입': prod['room_type'].astype(str)})[current | stly].groupby('객실타입').sum()
+
+
+@pytest.mark.parametrize('start, end, as_of', [
+    ('2026-03-01', '2026-06-01', '2026-02-15'),
+    ('2025-09-01', '2026-12-01', '2026-06-30'),  # 364일보다 긴 구간: STLY 구간이 올해 구간 시작 전에서 끊겨야 함
+])
+def test_stly_pace_matches_pandas_with_disjoint_windows(store, start, end, as_of):
+    start, end, as_of = pd.Timestamp(start), pd.Timestamp(end), pd.Timestamp(as_of)
+    got = se.run_query(se.SAVED_QUERIES[STLY_QUERY], {'start': start, 'end': end, 'as_of': as_of}, store)
+    got = got.assign(객실타입=got['객실타입'].astype(str)).set_index('객실타입').fillna(0).sort_index()
+    expected = stly_expected(ps.load_production(store), start, end, as_of)
+    assert expected['STLY_RN'].sum() > 0 and expected['현재_RN'].sum() > 0
+    pd.testing.assert_frame_equal(got[expected.columns], expected.sort_index(), check_dtype=False)